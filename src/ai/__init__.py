@@ -1,8 +1,12 @@
-"""AI module - Gemini & Groq clients for context-aware LLM processing"""
+"""AI module - Gemini & OpenAI-compatible (Groq, Qwen, ...) clients for context-aware LLM processing"""
 from src.ai.gemini_client import GeminiClient, get_gemini_client, close_gemini_client
+from src.ai.openai_compatible import OpenAICompatibleClient, get_openai_client, close_openai_clients
 from src.ai.groq_client import GroqClient, get_groq_client, close_groq_client
+from src.ai.qwen_client import QwenClient, get_qwen_client, close_qwen_client
 
 __all__ = [
     "GeminiClient", "get_gemini_client", "close_gemini_client",
-    "GroqClient", "get_groq_client", "close_groq_client"
+    "OpenAICompatibleClient", "get_openai_client", "close_openai_clients",
+    "GroqClient", "get_groq_client", "close_groq_client",
+    "QwenClient", "get_qwen_client", "close_qwen_client"
 ]
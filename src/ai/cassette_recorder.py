@@ -0,0 +1,76 @@
+"""
+LLM Cassette Recorder
+Appends real LLM exchanges to a JSONL cassette that src.bench replays offline
+"""
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class CassetteRecorder:
+    """
+    Appends every LLM exchange to a JSONL cassette
+
+    One line per completion: provider, model, the request messages, the
+    raw completion text, provider usage and wall-clock latency. Writes
+    happen under a lock with the file opened in append mode, so concurrent
+    passes (speculation, hedging) interleave whole lines.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.recorded = 0
+        logger.info(f"📼 Recording LLM exchanges to {self.path}")
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        completion: str,
+        usage: Optional[Dict[str, Any]],
+        latency_ms: float,
+        streamed: bool
+    ):
+        """Append one exchange (never raises)"""
+        entry = {
+            "provider": provider,
+            "model": model,
+            "messages": messages,
+            "completion": completion,
+            "usage": usage or {},
+            "latency_ms": round(latency_ms, 1),
+            "streamed": streamed,
+            "recorded_at": time.time(),
+        }
+        try:
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.recorded += 1
+        except Exception as e:
+            logger.error(f"Failed to record LLM exchange (non-critical): {e}")
+
+
+# Global instance (None when recording is disabled)
+_cassette_recorder: Optional[CassetteRecorder] = None
+
+
+def get_cassette_recorder() -> Optional[CassetteRecorder]:
+    """Get the global recorder if LLM_RECORD_PATH is set"""
+    global _cassette_recorder
+    if _cassette_recorder is None:
+        path = get_settings().app.llm_record_path
+        if path:
+            _cassette_recorder = CassetteRecorder(path)
+    return _cassette_recorder
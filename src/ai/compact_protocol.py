@@ -0,0 +1,281 @@
+"""
+Compact Output Protocol
+Token-minimal LLM reply format (short keys, enum codes, response templates) expanded locally
+"""
+import random
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.ai.json_stream import ELEMENT_SUFFIX
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.latency import get_latency_tracker
+
+logger = get_logger(__name__)
+
+PROTOCOL_JSON = "json"
+PROTOCOL_COMPACT = "compact"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_COMPACT)
+
+# Short key -> full response field
+_KEYS = {
+    "n": "needs_context",
+    "f": "is_followup",
+    "i": "intent",
+    "c": "commands",
+    "r": "response",
+    "u": "update_context",
+    "e": "expecting_followup",
+}
+_BOOL_KEYS = {"f", "u", "e"}
+
+# Array fields whose elements are streamed one by one, in both protocols
+STREAMED_ARRAYS = ("commands", "c")
+
+_CONTEXT_CODES = {"a": "installed_apps", "p": "running_processes"}
+
+_INTENT_CODES = {
+    "g": "greeting",
+    "c": "command",
+    "q": "question",
+    "m": "multi_command",
+    "s": "system_command",
+}
+
+# Command code -> (command type, name of its single parameter)
+_COMMAND_CODES: Dict[str, Tuple[str, str]] = {
+    "la": ("launch_app", "name"),
+    "kp": ("kill_process", "name"),
+    "sc": ("system_command", "action"),
+    "fc": ("fan_control", "operation"),
+    "ww": ("wake_word_control", "action"),
+    "sh": ("shell_command", "command"),
+}
+
+# Template id -> fixed reply; None means "describe the commands"
+RESPONSE_TEMPLATES: Dict[int, Optional[str]] = {
+    1: None,
+    2: "Hey! How can I help?",
+    3: "Alright! Let me know if you need anything.",
+    4: "Which app?",
+    5: "Which one?",
+}
+
+_SYSTEM_PHRASES = {
+    "lock": "Locking the computer",
+    "sleep": "Putting the computer to sleep",
+    "shutdown": "Shutting down",
+    "restart": "Restarting",
+}
+
+_FAN_PHRASES = {
+    "on": "Turning on the fan",
+    "off": "Turning off the fan",
+    "mode": "Switching the fan mode",
+}
+
+_WAKE_WORD_PHRASES = {
+    "enable": "Turning on the wake word",
+    "disable": "Turning off the wake word",
+    "toggle": "Toggling the wake word",
+}
+
+
+def is_compact(parsed: Dict[str, Any]) -> bool:
+    """Whether a decoded reply uses the compact protocol"""
+    return "intent" not in parsed and ("i" in parsed or "c" in parsed or "r" in parsed or "t" in parsed)
+
+
+def _app_name(name: str) -> str:
+    """'spotify.exe' -> 'Spotify'"""
+    base = name.rsplit("\\", 1)[-1]
+    if base.lower().endswith(".exe"):
+        base = base[:-4]
+    return base[:1].upper() + base[1:]
+
+
+def describe_commands(commands: List[Dict[str, Any]]) -> str:
+    """Spoken confirmation for a list of expanded commands"""
+    phrases = []
+    for command in commands:
+        kind = command.get("type")
+        params = command.get("params", {})
+        if kind == "launch_app":
+            phrases.append(f"Opening {_app_name(params.get('name', 'that'))}")
+        elif kind == "kill_process":
+            phrases.append(f"Closing {_app_name(params.get('name', 'that'))}")
+        elif kind == "system_command":
+            phrases.append(_SYSTEM_PHRASES.get(params.get("action"), "Done"))
+        elif kind == "fan_control":
+            phrases.append(_FAN_PHRASES.get(params.get("operation"), "Adjusting the fan"))
+        elif kind == "wake_word_control":
+            phrases.append(_WAKE_WORD_PHRASES.get(params.get("action"), "Updating the wake word"))
+        elif kind == "shell_command":
+            phrases.append("Running that command")
+    if not phrases:
+        return "Done"
+    if len(phrases) == 1:
+        return f"{phrases[0]}."
+    return f"{', '.join(phrases[:-1])} and {phrases[-1][:1].lower()}{phrases[-1][1:]}."
+
+
+def _expand_command(item: Any) -> Optional[Dict[str, Any]]:
+    """["la", "notepad.exe"] -> {"type": "launch_app", "params": {"name": "notepad.exe"}}"""
+    if isinstance(item, dict):
+        return item  # Model fell back to a full command object
+    if not isinstance(item, list) or len(item) != 2 or not all(isinstance(v, str) for v in item):
+        return None  # Wrong arity (e.g. cut off by a truncation repair) - never guess the argument
+    spec = _COMMAND_CODES.get(item[0])
+    if spec is None:
+        return None
+    kind, param = spec
+    return {"type": kind, "params": {param: item[1]}}
+
+
+def _expand_context(codes: Any) -> Any:
+    if not isinstance(codes, list):
+        return codes
+    return [_CONTEXT_CODES.get(code, code) for code in codes]
+
+
+def expand(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Expand a compact reply into the full response dict
+
+    Only keys present in the reply are set, so schema defaults (and the
+    decoder's truncation checks) still apply to everything that is missing.
+    """
+    result: Dict[str, Any] = {}
+    for key, value in parsed.items():
+        full = _KEYS.get(key)
+        if full is None:
+            if key != "t":
+                result[key] = value
+            continue
+        if key == "n":
+            value = _expand_context(value)
+        elif key == "i":
+            value = _INTENT_CODES.get(value, value)
+        elif key == "c":
+            value = [cmd for cmd in map(_expand_command, value if isinstance(value, list) else []) if cmd]
+        elif key in _BOOL_KEYS and isinstance(value, int):
+            value = bool(value)
+        result[full] = value
+
+    if "response" not in result and "t" in parsed:
+        template = parsed["t"]
+        if template in RESPONSE_TEMPLATES:
+            text = RESPONSE_TEMPLATES[template]
+            result["response"] = text if text is not None else describe_commands(result.get("commands", []))
+        result["response_template"] = template
+    return result
+
+
+def expand_field(key: str, value: Any) -> Optional[Tuple[str, Any]]:
+    """
+    Translate one streamed top-level field to its full name
+
+    Full-protocol fields pass through unchanged. A "describe the commands"
+    template has no text until the commands are known, so it is not streamed.
+    A streamed command element is expanded on its own, and dropped if it
+    cannot be (a malformed command is never dispatched).
+    """
+    if key == "c" + ELEMENT_SUFFIX:
+        command = _expand_command(value)
+        return ("commands" + ELEMENT_SUFFIX, command) if command else None
+    if key == "t":
+        text = RESPONSE_TEMPLATES.get(value)
+        return ("response", text) if text is not None else None
+    full = _KEYS.get(key)
+    if full is None:
+        return key, value
+    if key == "n":
+        return full, _expand_context(value)
+    if key == "i":
+        return full, _INTENT_CODES.get(value, value)
+    if key == "c":
+        return full, [cmd for cmd in map(_expand_command, value if isinstance(value, list) else []) if cmd]
+    if key in _BOOL_KEYS and isinstance(value, int):
+        return full, bool(value)
+    return full, value
+
+
+class _ProtocolStats:
+    """Outcomes of one protocol"""
+
+    def __init__(self):
+        self.turns = 0
+        self.failed = 0
+        self.completion_tokens = 0
+        self.prompt_tokens = 0
+        self.templated = 0
+
+
+class ProtocolMetrics:
+    """
+    Chooses the output protocol per turn and compares the arms
+
+    In "ab" mode each LLM turn is assigned to the compact protocol with
+    probability `compact_share`. Output tokens, prompt tokens and turn
+    latency (as llm.protocol.<name> in the latency tracker) are recorded per
+    protocol so the two can be compared on the dashboard.
+    """
+
+    def __init__(self, mode: str = PROTOCOL_JSON, compact_share: float = 0.5, seed: Optional[int] = None):
+        self.mode = mode
+        self.compact_share = compact_share
+        self.rng = random.Random(seed)
+        self._stats: Dict[str, _ProtocolStats] = {name: _ProtocolStats() for name in PROTOCOLS}
+
+    def choose(self) -> str:
+        """Protocol for the next LLM turn"""
+        if self.mode == "ab":
+            return PROTOCOL_COMPACT if self.rng.random() < self.compact_share else PROTOCOL_JSON
+        return self.mode if self.mode in PROTOCOLS else PROTOCOL_JSON
+
+    def record(self, protocol: str, response: Optional[Dict[str, Any]], latency_ms: float):
+        """Record the outcome of one LLM turn"""
+        stats = self._stats[protocol]
+        stats.turns += 1
+        get_latency_tracker().record(f"llm.protocol.{protocol}", latency_ms)
+        if not response:
+            stats.failed += 1
+            return
+        usage = response.get("usage") or {}
+        stats.completion_tokens += usage.get("completion_tokens", 0)
+        stats.prompt_tokens += usage.get("prompt_tokens", 0)
+        if "response_template" in response:
+            stats.templated += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-protocol token and latency comparison"""
+        tracker = get_latency_tracker()
+        protocols = {}
+        for name, stats in self._stats.items():
+            answered = max(stats.turns - stats.failed, 1)
+            protocols[name] = {
+                "turns": stats.turns,
+                "failed": stats.failed,
+                "avg_completion_tokens": stats.completion_tokens / answered,
+                "avg_prompt_tokens": stats.prompt_tokens / answered,
+                "templated": stats.templated,
+                "p50_ms": tracker.percentile(f"llm.protocol.{name}", 50),
+                "p95_ms": tracker.percentile(f"llm.protocol.{name}", 95),
+            }
+        return {"mode": self.mode, "compact_share": self.compact_share, "protocols": protocols}
+
+
+# Global instance
+_protocol_metrics: Optional[ProtocolMetrics] = None
+
+
+def get_protocol_metrics() -> ProtocolMetrics:
+    """Get or create global protocol metrics"""
+    global _protocol_metrics
+    if _protocol_metrics is None:
+        settings = get_settings()
+        _protocol_metrics = ProtocolMetrics(
+            mode=settings.app.output_protocol,
+            compact_share=settings.app.compact_protocol_share
+        )
+    return _protocol_metrics
@@ -2,16 +2,27 @@
 Google Gemini AI Client
 High-performance, free-tier friendly AI client with 15 RPM, 1M tokens/day
 """
-import json
+import time
 import logging
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Callable, Tuple
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 
+from src.ai.json_stream import IncrementalJSONScanner
+from src.ai.compact_protocol import STREAMED_ARRAYS, expand_field
+from src.ai.cassette_recorder import get_cassette_recorder
+from src.ai.rate_limiter import Priority, get_rate_limiter
+from src.ai.response_decoder import get_response_decoder
 from src.utils.config import get_settings
 from src.utils.logger import get_logger
+from src.utils.tokens import usage_record
 
 logger = get_logger(__name__)
 
+# Distinct system prompts (Pass 1 / Pass 2 variants) kept as bound models
+_MAX_CACHED_MODELS = 8
+
 
 class GeminiClient:
     """
@@ -25,63 +36,144 @@ class GeminiClient:
         # Configure Gemini
         genai.configure(api_key=self.settings.gemini.api_key)
         
-        # Initialize model
-        self.model = genai.GenerativeModel(
-            model_name=self.settings.gemini.model,
-            generation_config={
-                "temperature": self.settings.gemini.temperature,
-                "max_output_tokens": self.settings.gemini.max_tokens,
-                "response_mime_type": "application/json",
-                "top_p": 0.95,  # Faster, more focused responses
-                "top_k": 40,
-            }
-        )
+        self.generation_config = {
+            "temperature": self.settings.gemini.temperature,
+            "max_output_tokens": self.settings.gemini.max_tokens,
+            "response_mime_type": "application/json",
+            "top_p": 0.95,  # Faster, more focused responses
+            "top_k": 40,
+        }
+        
+        # The system prompt is bound to the model, so keep one model per (model name, prompt)
+        self._models: "OrderedDict[Tuple[str, str], genai.GenerativeModel]" = OrderedDict()
         
         logger.info(f"Gemini client initialized with model: {self.settings.gemini.model}")
     
-    async def chat(self, messages: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    def _model_for(self, system_prompt: str, model_name: Optional[str] = None) -> genai.GenerativeModel:
+        """Get (or create) a model bound to a system instruction"""
+        key = (model_name or self.settings.gemini.model, system_prompt)
+        model = self._models.get(key)
+        if model is not None:
+            self._models.move_to_end(key)
+            return model
+        
+        model = genai.GenerativeModel(
+            model_name=key[0],
+            generation_config=self.generation_config,
+            system_instruction=f"{system_prompt}\n\nRespond with valid JSON only." if system_prompt else None
+        )
+        self._models[key] = model
+        if len(self._models) > _MAX_CACHED_MODELS:
+            self._models.popitem(last=False)
+        return model
+    
+    @staticmethod
+    def _to_contents(messages: List[Dict[str, str]]) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Convert OpenAI-style messages to a system instruction and Gemini contents
+        
+        Consecutive messages from the same role are merged, since Gemini
+        expects user and model turns to alternate.
+        """
+        system_parts = []
+        contents: List[Dict[str, Any]] = []
+        
+        for msg in messages:
+            if msg["role"] == "system":
+                system_parts.append(msg["content"])
+                continue
+            role = "model" if msg["role"] == "assistant" else "user"
+            if contents and contents[-1]["role"] == role:
+                contents[-1]["parts"].append(msg["content"])
+            else:
+                contents.append({"role": role, "parts": [msg["content"]]})
+        
+        return "\n\n".join(system_parts), contents
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        priority: Priority = Priority.VOICE,
+        max_tokens: Optional[int] = None,
+        tier: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Send chat request to Gemini API with context awareness
         
+        Uses the native async API, so the event loop keeps running while
+        Gemini generates, and cancelling the calling task aborts the request.
+        
         Args:
             messages: List of message dicts with 'role' and 'content'
                      Format: [{"role": "system", "content": "..."}, {"role": "user", "content": "..."}]
+            on_field: Called with (key, value) as each top-level JSON field completes
+            priority: Rate limiter priority class of this request
+            max_tokens: Completion token limit for this request (default: configured max_tokens)
+            tier: Model tier (0 = configured model, see escalation_models)
         
         Returns:
             Parsed JSON response with intent, commands, and response text
         """
         try:
-            # Extract system prompt and user messages
-            system_prompt = ""
-            conversation = []
-            
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_prompt = msg["content"]
-                elif msg["role"] == "user":
-                    conversation.append({"role": "user", "parts": [msg["content"]]})
-                elif msg["role"] == "assistant":
-                    conversation.append({"role": "model", "parts": [msg["content"]]})
+            system_prompt, contents = self._to_contents(messages)
             
-            # Get the last user message
-            if not conversation:
+            if not contents or contents[-1]["role"] != "user":
                 logger.error("No user messages found in conversation")
                 return None
             
-            user_message = conversation[-1]["parts"][0]
+            logger.debug(f"Sending request to Gemini API: {contents[-1]['parts'][-1][:100]}...")
             
-            # Build the full prompt with system instructions
-            full_prompt = f"{system_prompt}\n\nUser: {user_message}\n\nRespond with valid JSON only."
+            model_name = self.settings.gemini.model_for_tier(tier)
+            model = self._model_for(system_prompt, model_name)
+            request_options = {"timeout": self.settings.gemini.request_timeout}
+            # Merged over the model's generation_config by the SDK
+            generation_config = {"max_output_tokens": max_tokens} if max_tokens else None
             
-            logger.debug(f"Sending request to Gemini API: {user_message[:100]}...")
+            limiter = get_rate_limiter("gemini")
+            for attempt in range(2):
+                await limiter.acquire(priority)
+                start = time.perf_counter()
+                try:
+                    if self.settings.gemini.stream:
+                        response_text, usage = await self._stream_content(model, contents, request_options, on_field, generation_config)
+                    else:
+                        response = await model.generate_content_async(
+                            contents, generation_config=generation_config, request_options=request_options
+                        )
+                        response_text = response.text
+                        usage = getattr(response, "usage_metadata", None)
+                    break
+                except google_exceptions.ResourceExhausted:
+                    # 429 - back off the whole bucket, then retry once
+                    limiter.penalize()
+                    if attempt == 1:
+                        raise
             
-            # Generate response
-            response = self.model.generate_content(full_prompt)
+            recorder = get_cassette_recorder()
+            if recorder:
+                recorder.record(
+                    "gemini", model_name, messages, response_text,
+                    {
+                        "prompt_tokens": getattr(usage, "prompt_token_count", None),
+                        "completion_tokens": getattr(usage, "candidates_token_count", None),
+                    },
+                    (time.perf_counter() - start) * 1000, self.settings.gemini.stream
+                )
             
             # Parse JSON response
-            parsed_response = self._parse_json_response(response.text)
+            parsed_response = self._parse_json_response(response_text)
             
             if parsed_response:
+                parsed_response["usage"] = usage_record(
+                    messages,
+                    response_text,
+                    getattr(usage, "prompt_token_count", None),
+                    getattr(usage, "candidates_token_count", None)
+                )
+                if on_field and not self.settings.gemini.stream:
+                    for key, value in parsed_response.items():
+                        self._notify_field(on_field, key, value)
                 logger.info(f"Gemini response: intent={parsed_response.get('intent')}, commands={len(parsed_response.get('commands', []))}")
                 return parsed_response
             else:
@@ -92,48 +184,93 @@ class GeminiClient:
             logger.error(f"Error in Gemini chat: {e}", exc_info=True)
             return None
     
-    def _parse_json_response(self, response_text: str) -> Optional[Dict[str, Any]]:
-        """Parse JSON response from Gemini"""
-        try:
-            # Clean the response text
-            text = response_text.strip()
-            
-            # Remove markdown code blocks if present
-            if text.startswith("```json"):
-                text = text[7:]  # Remove ```json
-            if text.startswith("```"):
-                text = text[3:]  # Remove ```
-            if text.endswith("```"):
-                text = text[:-3]  # Remove ```
-            
-            text = text.strip()
-            
-            # Parse JSON
-            parsed = json.loads(text)
-            
-            # Validate required fields
-            if not isinstance(parsed, dict):
-                logger.error("Response is not a JSON object")
-                return None
-            
-            # Ensure all required fields exist
-            response = {
-                "intent": parsed.get("intent", "unknown"),
-                "commands": parsed.get("commands", []),
-                "response": parsed.get("response", "Done"),
-                "update_context": parsed.get("update_context", True),
-                "expecting_followup": parsed.get("expecting_followup", False)
-            }
-            
-            return response
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from Gemini: {e}")
-            logger.error(f"Response text: {response_text[:500]}")
+    async def complete_text(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 50,
+        temperature: float = 0.3,
+        priority: Priority = Priority.BACKGROUND,
+        wait: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Plain-text completion without the JSON response format
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            max_tokens: Completion token limit
+            temperature: Sampling temperature
+            priority: Rate limiter priority class of this request
+            wait: Give up if no rate limit token is free within this many seconds
+        
+        Returns:
+            Completion text, or None if it could not be had in time
+        """
+        if not await get_rate_limiter("gemini").acquire(priority, timeout=wait):
             return None
+        
+        try:
+            system_prompt, contents = self._to_contents(messages)
+            # Not a cached model: those are bound to JSON output
+            model = genai.GenerativeModel(
+                model_name=self.settings.gemini.model,
+                system_instruction=system_prompt or None
+            )
+            response = await model.generate_content_async(
+                contents,
+                generation_config={"temperature": temperature, "max_output_tokens": max_tokens},
+                request_options={"timeout": 10.0}
+            )
+            return response.text.strip()
         except Exception as e:
-            logger.error(f"Error parsing Gemini response: {e}")
+            logger.warning(f"Gemini text completion failed: {e}")
             return None
+    
+    async def _stream_content(
+        self,
+        model: genai.GenerativeModel,
+        contents: List[Dict[str, Any]],
+        request_options: Dict[str, Any],
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Any]:
+        """
+        Stream a completion, reporting JSON fields as they close
+        
+        Returns:
+            Tuple of (full completion text, usage metadata of the last chunk)
+        """
+        scanner = IncrementalJSONScanner(element_keys=STREAMED_ARRAYS)
+        usage = None
+        response = await model.generate_content_async(
+            contents, stream=True, generation_config=generation_config, request_options=request_options
+        )
+        
+        async for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            try:
+                delta = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. safety metadata only)
+                continue
+            for key, value in scanner.feed(delta):
+                if on_field:
+                    self._notify_field(on_field, key, value)
+        
+        return scanner.text, usage
+    
+    def _notify_field(self, on_field: Callable[[str, Any], None], key: str, value: Any):
+        """Invoke field callback (with compact-protocol keys expanded) without letting it break the request"""
+        field = expand_field(key, value)
+        if field is None:
+            return
+        try:
+            on_field(*field)
+        except Exception as e:
+            logger.error(f"Error in field callback for '{key}': {e}")
+    
+    def _parse_json_response(self, response_text: str) -> Optional[Dict[str, Any]]:
+        """Parse JSON response from Gemini (repairing truncated output)"""
+        return get_response_decoder().decode(response_text, "gemini")
 
 
 # Global instance
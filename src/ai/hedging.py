@@ -0,0 +1,258 @@
+"""
+Hedged LLM Requests
+Sends a turn to a backup provider when the primary is slow; first valid response wins
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+from src.ai.json_stream import ELEMENT_SUFFIX
+from src.ai.rate_limiter import Priority
+from src.utils.config import get_settings
+from src.utils.latency import get_latency_tracker
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Samples needed before the percentile replaces the configured hedge delay
+_MIN_SAMPLES = 10
+
+
+class _ProviderStats:
+    """Race outcomes for one provider"""
+
+    def __init__(self):
+        self.requests = 0
+        self.wins = 0
+        self.losses = 0
+        self.invalid = 0
+        self.saved_ms = 0.0
+
+
+class HedgedLLMClient:
+    """
+    Races two LLM clients for the same messages
+
+    The primary provider is asked first. If it has not produced a valid
+    response after its recent p95 latency (or the configured delay while
+    there is too little data), the secondary is asked as well. The first
+    response that parses into a valid command dict wins and the other
+    in-flight request is cancelled. A primary that fails fast triggers the
+    secondary immediately.
+
+    Streamed fields are forwarded from whichever provider emits first; if
+    that provider loses, the winner's fields are replayed. A "response"
+    that was already forwarded is replaced by the winner's if they differ,
+    so what is spoken always matches the commands that run.
+    """
+
+    def __init__(self, primary: Any, secondary: Any, primary_name: str, secondary_name: str):
+        self.settings = get_settings()
+        self.tracker = get_latency_tracker()
+        self.providers: List[Tuple[str, Any]] = [(primary_name, primary), (secondary_name, secondary)]
+        self.hedges_fired = 0
+        self._stats: Dict[str, _ProviderStats] = {
+            primary_name: _ProviderStats(),
+            secondary_name: _ProviderStats(),
+        }
+
+    def hedge_delay_ms(self, provider: str) -> float:
+        """How long to wait on a provider before hedging"""
+        delay = self.tracker.percentile(
+            f"llm.{provider}", self.settings.app.hedge_percentile, min_samples=_MIN_SAMPLES
+        )
+        return delay if delay is not None else self.settings.app.hedge_delay_ms
+
+    @staticmethod
+    def is_valid(response: Optional[Dict[str, Any]]) -> bool:
+        """A response usable as a command dict (client fallbacks are not)"""
+        if not isinstance(response, dict) or response.get("error"):
+            return False
+        if response.get("intent") == "error":
+            return False
+        return "response" in response or "commands" in response
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        priority: Priority = Priority.VOICE,
+        max_tokens: Optional[int] = None,
+        tier: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Send chat request to the primary provider, hedged with the secondary
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            on_field: Called with (key, value) as top-level fields complete
+            priority: Rate limiter priority class of this request
+            max_tokens: Completion token limit for this request (default: configured max_tokens)
+            tier: Model tier (0 = configured model, see escalation_models)
+
+        Returns:
+            First valid parsed response, or the last invalid one if both failed
+        """
+        forwarder = _FieldForwarder(on_field)
+        start = time.perf_counter()
+        tasks: Dict[asyncio.Task, str] = {}
+
+        def launch(index: int):
+            name, client = self.providers[index]
+            self._stats[name].requests += 1
+            task = asyncio.create_task(
+                self._timed_chat(name, client, messages, forwarder.callback_for(name), priority, max_tokens, tier)
+            )
+            tasks[task] = name
+
+        launch(0)
+        primary_name = self.providers[0][0]
+        delay = self.hedge_delay_ms(primary_name) / 1000
+        fallback = None
+
+        try:
+            done, _ = await asyncio.wait(list(tasks), timeout=delay)
+            if done:
+                result = next(iter(done)).result()
+                if self.is_valid(result):
+                    self._stats[primary_name].wins += 1
+                    return result
+                self._stats[primary_name].invalid += 1
+                fallback = result
+                logger.warning(f"{primary_name} returned no valid response - asking {self.providers[1][0]}")
+            else:
+                self.hedges_fired += 1
+                logger.info(f"⏱️ {primary_name} slower than {delay * 1000:.0f} ms - hedging to {self.providers[1][0]}")
+            launch(1)
+
+            pending = {task for task in tasks if not task.done()}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    result = task.result()
+                    if not self.is_valid(result):
+                        self._stats[name].invalid += 1
+                        fallback = fallback or result
+                        continue
+
+                    self._stats[name].wins += 1
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    for other in pending:
+                        self._stats[tasks[other]].losses += 1
+                        if name != primary_name:
+                            # The primary would have finished no earlier than its tail
+                            tail = self.tracker.percentile(f"llm.{tasks[other]}", 99) or elapsed_ms
+                            self._stats[name].saved_ms += max(0.0, tail - elapsed_ms)
+                    forwarder.replay(name, result)
+                    logger.info(f"🏁 {name} won hedged request in {elapsed_ms:.0f} ms")
+                    return result
+
+            return fallback
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def complete_text(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 50,
+        temperature: float = 0.3,
+        priority: Priority = Priority.BACKGROUND,
+        wait: Optional[float] = None
+    ) -> Optional[str]:
+        """Plain-text completion from the primary, or the secondary if it fails (not raced)"""
+        for _, client in self.providers:
+            text = await client.complete_text(
+                messages, max_tokens=max_tokens, temperature=temperature, priority=priority, wait=wait
+            )
+            if text:
+                return text
+        return None
+
+    async def _timed_chat(
+        self,
+        name: str,
+        client: Any,
+        messages: List[Dict[str, str]],
+        on_field: Callable[[str, Any], None],
+        priority: Priority,
+        max_tokens: Optional[int] = None,
+        tier: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Call one provider and record its latency when it completes"""
+        start = time.perf_counter()
+        try:
+            result = await client.chat(messages, on_field=on_field, priority=priority, max_tokens=max_tokens, tier=tier)
+        except Exception as e:
+            logger.error(f"Hedged request to {name} failed: {e}")
+            return None
+        if self.is_valid(result):
+            self.tracker.record(f"llm.{name}", (time.perf_counter() - start) * 1000)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-provider race statistics"""
+        return {
+            "hedges_fired": self.hedges_fired,
+            "providers": {
+                name: {
+                    "requests": stats.requests,
+                    "wins": stats.wins,
+                    "losses": stats.losses,
+                    "invalid": stats.invalid,
+                    "tail_latency_saved_ms": stats.saved_ms,
+                    "hedge_delay_ms": self.hedge_delay_ms(name),
+                }
+                for name, stats in self._stats.items()
+            },
+        }
+
+
+class _FieldForwarder:
+    """
+    Forwards streamed fields from one provider only
+
+    Command elements are not forwarded: the provider streaming first may
+    still lose the race, and a dispatched command cannot be taken back.
+    A forwarded "response" may already be speaking when its provider loses;
+    if the winner's differs it is forwarded too, and is spoken after it,
+    rather than confirming the loser's actions.
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]]):
+        self.on_field = on_field
+        self.owner: Optional[str] = None
+        self._sent: Dict[str, Any] = {}
+
+    def callback_for(self, name: str) -> Callable[[str, Any], None]:
+        def callback(key: str, value: Any):
+            if self.on_field is None or key.endswith(ELEMENT_SUFFIX):
+                return
+            if self.owner is None:
+                self.owner = name
+            if self.owner == name:
+                self._sent[key] = value
+                self.on_field(key, value)
+        return callback
+
+    def replay(self, winner: str, result: Dict[str, Any]):
+        """Send the winner's fields if another provider had been streaming"""
+        if self.on_field is None or self.owner == winner:
+            return
+        self.owner = winner
+        sent = self._sent.get("response")
+        if sent is not None and result.get("response") != sent:
+            logger.warning(
+                f"Hedge winner {winner} replied {result.get('response')!r} after the loser's "
+                f"{sent!r} was forwarded - speaking the winner's"
+            )
+        for key, value in result.items():
+            if self._sent.get(key, object()) != value:
+                try:
+                    self.on_field(key, value)
+                except Exception as e:
+                    logger.error(f"Error in field callback for '{key}': {e}")
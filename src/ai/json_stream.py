@@ -0,0 +1,191 @@
+"""
+Incremental JSON Scanner
+Scans a streamed LLM completion and reports top-level fields as soon as they close
+"""
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Scanner states while inside the top-level object
+_EXPECT_KEY = 0
+_IN_KEY = 1
+_EXPECT_COLON = 2
+_EXPECT_VALUE = 3
+_IN_VALUE = 4
+_AFTER_VALUE = 5
+
+# Appended to an array field's key for events reporting one of its elements
+ELEMENT_SUFFIX = "[]"
+
+
+class IncrementalJSONScanner:
+    """
+    Character-level scanner for a single streamed JSON object
+
+    Feed it completion deltas as they arrive; every call returns the top-level
+    (key, value) pairs whose values closed inside that delta. This lets the
+    assistant act on "response" while "commands" is still being generated.
+    Anything before the first '{' (e.g. a ```json fence) is ignored.
+
+    For the array fields named in `element_keys`, each object or array
+    element is also reported as it closes, as ("<key>[]", element), ahead of
+    the field itself. This lets the first command run while the model is
+    still writing the next one.
+    """
+
+    def __init__(self, element_keys: Iterable[str] = ()):
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = _EXPECT_KEY
+        self._key_start = 0
+        self._key = None
+        self._value_start = 0
+        self._value_is_scalar = False
+        self._element_keys = set(element_keys)
+        self._in_elements = False
+        self._element_start = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Scan the next chunk of the completion
+
+        Args:
+            chunk: Newly received text
+
+        Returns:
+            List of (key, value) pairs completed by this chunk, in order
+            (element events use the key with ELEMENT_SUFFIX)
+        """
+        if not chunk or self.done:
+            return []
+
+        self._text += chunk
+        text = self._text
+        completed: List[Tuple[str, Any]] = []
+
+        i = self._pos
+        n = len(text)
+        while i < n and not self.done:
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._state == _IN_KEY:
+                            self._key = self._decode(text[self._key_start:i + 1])
+                            self._state = _EXPECT_COLON
+                        elif self._state == _IN_VALUE:
+                            self._complete(text, i + 1, completed)
+                i += 1
+                continue
+
+            if self._depth == 0:
+                # Skip anything before the opening brace (code fences, whitespace)
+                if ch == "{":
+                    self._depth = 1
+                    self._state = _EXPECT_KEY
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._state == _EXPECT_KEY:
+                        self._key_start = i
+                        self._state = _IN_KEY
+                    elif self._state == _EXPECT_VALUE:
+                        self._value_start = i
+                        self._value_is_scalar = False
+                        self._state = _IN_VALUE
+            elif ch in "{[":
+                if self._depth == 1 and self._state == _EXPECT_VALUE:
+                    self._value_start = i
+                    self._value_is_scalar = False
+                    self._state = _IN_VALUE
+                    self._in_elements = ch == "[" and self._key in self._element_keys
+                elif self._depth == 2 and self._in_elements:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    # Closing the top-level object
+                    if self._state == _IN_VALUE and self._value_is_scalar:
+                        self._complete(text, i, completed)
+                    self._depth = 0
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 2 and self._element_start is not None:
+                        self._complete_element(text, i + 1, completed)
+                    elif self._depth == 1 and self._state == _IN_VALUE:
+                        self._in_elements = False
+                        self._complete(text, i + 1, completed)
+            elif self._depth == 1:
+                if ch == ":" and self._state == _EXPECT_COLON:
+                    self._state = _EXPECT_VALUE
+                elif ch == ",":
+                    if self._state == _IN_VALUE and self._value_is_scalar:
+                        self._complete(text, i, completed)
+                    self._state = _EXPECT_KEY
+                elif self._state == _EXPECT_VALUE and not ch.isspace():
+                    # number / true / false / null
+                    self._value_start = i
+                    self._value_is_scalar = True
+                    self._state = _IN_VALUE
+
+            i += 1
+
+        self._pos = i
+        return completed
+
+    def _complete(self, text: str, end: int, completed: List[Tuple[str, Any]]):
+        """Decode a finished top-level value and record it"""
+        raw = text[self._value_start:end].strip()
+        self._state = _AFTER_VALUE
+        if self._key is None:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.debug(f"Scanner could not decode value for '{self._key}': {raw[:80]}")
+            return
+        self.fields[self._key] = value
+        completed.append((self._key, value))
+
+    def _complete_element(self, text: str, end: int, completed: List[Tuple[str, Any]]):
+        """Decode a finished element of a streamed array field and record it"""
+        raw = text[self._element_start:end]
+        self._element_start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.debug(f"Scanner could not decode element of '{self._key}': {raw[:80]}")
+            return
+        completed.append((self._key + ELEMENT_SUFFIX, value))
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        """Decode a JSON string literal"""
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return raw.strip('"')
@@ -0,0 +1,224 @@
+"""
+Model Tier Routing
+Sends simple turns to the small model and escalates to larger ones only when needed
+"""
+import re
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional, Callable, Deque, Tuple
+
+from src.ai.hedging import HedgedLLMClient
+from src.ai.rate_limiter import Priority
+from src.utils.config import get_settings
+from src.utils.latency import get_latency_tracker
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WORD = re.compile(r"[a-z0-9']+")
+_QUESTION_STARTS = {"what", "why", "how", "who", "when", "where", "which", "explain", "tell", "describe", "compare", "write", "summarize"}
+# Only a question when no action verb follows ("can you open spotify" is a command)
+_MODAL_STARTS = {"should", "can", "could", "would", "will", "is", "are", "does", "do"}
+_ACTION_VERBS = {"open", "launch", "start", "run", "close", "kill", "quit", "stop", "turn", "switch", "lock", "shutdown", "shut", "restart", "sleep", "enable", "disable"}
+_JOINERS = {"and", "then", "also", "after"}
+
+_KNOWN_INTENTS = {"greeting", "command", "question", "multi_command", "system_command"}
+_KNOWN_COMMANDS = {"launch_app", "kill_process", "system_command", "fan_control", "wake_word_control", "shell_command"}
+
+# Turns of intent history kept per conversation
+_INTENT_HISTORY = 5
+# Turns (including the escalated one) a conversation scores one point higher
+_STICKY_TURNS = 4
+_MAX_CONVERSATIONS = 200
+
+
+class _TierStats:
+    """Outcomes of requests sent to one tier"""
+
+    def __init__(self):
+        self.requests = 0
+        self.failed_validation = 0
+        self.escalated = 0
+
+
+class ModelTierRouter:
+    """
+    Picks a model tier per turn from an estimate of its complexity
+
+    Tier 0 is each provider's configured model; higher tiers are its
+    escalation_models, smallest first. The complexity score adds one point
+    each for a long utterance, a question or open-ended request (a polite
+    "can you open ..." is a command, not a question), a likely
+    multi-command, an answer to a question Aiden asked, and a conversation
+    whose recent turns were questions or needed a larger model. Every
+    `model_tier_threshold` points start the turn one tier higher.
+
+    A reply that fails validation (no usable response, unknown intent or
+    command, a multi_command with a single command, ...) is retried one tier
+    up, unless its response has already started being spoken or its
+    commands started running.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.tracker = get_latency_tracker()
+        providers = ["gemini", *self.settings.app.openai_provider_names()]
+        self.max_tier = max(len(self.settings.provider(name).model_tiers()) for name in providers) - 1
+        self._stats: Dict[int, _TierStats] = {tier: _TierStats() for tier in range(self.max_tier + 1)}
+        self._intents: "OrderedDict[str, Deque[str]]" = OrderedDict()
+        self._escalated: "OrderedDict[str, int]" = OrderedDict()
+
+    def estimate(self, user_text: str, context: Dict[str, Any]) -> Tuple[int, int]:
+        """
+        Estimate the tier a turn should start at
+
+        Returns:
+            Tuple of (tier, complexity score)
+        """
+        words = _WORD.findall(user_text.lower())
+        score = 0
+
+        if len(words) >= 12:
+            score += 1
+        polite_command = bool(words) and words[0] in _MODAL_STARTS and any(word in _ACTION_VERBS for word in words[1:])
+        if not polite_command and (
+            (words and words[0] in _QUESTION_STARTS | _MODAL_STARTS) or user_text.rstrip().endswith("?")
+        ):
+            score += 1
+        if sum(word in _ACTION_VERBS for word in words) >= 2 and any(word in _JOINERS for word in words):
+            score += 1
+        if context.get("expecting_followup"):
+            score += 1
+
+        conversation_id = context.get("conversation_id") or ""
+        recent = self._intents.get(conversation_id, ())
+        if len(recent) >= 2 and sum(intent == "question" for intent in recent) * 2 >= len(recent):
+            score += 1
+        if self._escalated.get(conversation_id, 0) > 0:
+            score += 1
+
+        threshold = max(self.settings.app.model_tier_threshold, 1)
+        return min(score // threshold, self.max_tier), score
+
+    @staticmethod
+    def validate(response: Optional[Dict[str, Any]]) -> bool:
+        """Whether a reply is well-formed enough to act on"""
+        if not HedgedLLMClient.is_valid(response):
+            return False
+        if response.get("needs_context"):
+            return True  # Replaced by Pass 2 anyway
+        if response.get("intent") not in _KNOWN_INTENTS:
+            return False
+        if not isinstance(response.get("response"), str) or not response["response"].strip():
+            return False
+        commands = response.get("commands", [])
+        for command in commands:
+            if command.get("type") not in _KNOWN_COMMANDS or not command.get("params"):
+                return False
+        if response["intent"] == "multi_command" and len(commands) < 2:
+            return False
+        if response["intent"] in ("command", "system_command") and not commands and not response.get("expecting_followup"):
+            return False
+        return True
+
+    async def chat(
+        self,
+        llm: Any,
+        messages: List[Dict[str, str]],
+        tier: int,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        priority: Priority = Priority.VOICE,
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None,
+        spoken: Optional[Callable[[], bool]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Send a request at `tier`, escalating while the reply fails validation
+
+        Args:
+            llm: LLM client (single provider, hedged or routed)
+            messages: List of message dicts with 'role' and 'content'
+            tier: Tier to start at
+            on_field: Called with (key, value) as top-level fields complete
+            priority: Rate limiter priority class of this request
+            max_tokens: Completion token limit for this request
+            conversation_id: Conversation the turn belongs to (for stickiness)
+            spoken: Returns True once the reply has started being spoken or executed
+
+        Returns:
+            First valid reply, or the last reply if every tier failed validation
+        """
+        while True:
+            stats = self._stats.setdefault(tier, _TierStats())
+            stats.requests += 1
+            start = time.perf_counter()
+            response = await llm.chat(messages, on_field=on_field, priority=priority, max_tokens=max_tokens, tier=tier)
+            self.tracker.record(f"llm.tier{tier}", (time.perf_counter() - start) * 1000)
+
+            if self.validate(response):
+                return response
+            stats.failed_validation += 1
+            if tier >= self.max_tier or (spoken and spoken()) or not self.settings.app.model_tier_escalation:
+                return response
+
+            stats.escalated += 1
+            tier += 1
+            if conversation_id:
+                self._remember(self._escalated, conversation_id, _STICKY_TURNS)
+            logger.info(f"🪜 Reply failed validation - escalating to model tier {tier}")
+
+    def record(self, conversation_id: Optional[str], intent: Optional[str]):
+        """Record the intent of a finished turn"""
+        if not conversation_id or not intent:
+            return
+        history = self._intents.get(conversation_id)
+        if history is None:
+            history = self._intents[conversation_id] = deque(maxlen=_INTENT_HISTORY)
+        history.append(intent)
+        self._intents.move_to_end(conversation_id)
+        if len(self._intents) > _MAX_CONVERSATIONS:
+            self._intents.popitem(last=False)
+
+        # An escalation keeps the conversation on a larger model for a few turns
+        remaining = self._escalated.get(conversation_id)
+        if remaining is not None:
+            if remaining <= 1:
+                del self._escalated[conversation_id]
+            else:
+                self._escalated[conversation_id] = remaining - 1
+
+    @staticmethod
+    def _remember(table: "OrderedDict[str, int]", key: str, value: int):
+        table[key] = value
+        table.move_to_end(key)
+        if len(table) > _MAX_CONVERSATIONS:
+            table.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier request, latency and escalation statistics"""
+        tiers = {}
+        for tier, stats in sorted(self._stats.items()):
+            tiers[tier] = {
+                "groq_model": self.settings.groq.model_for_tier(tier),
+                "gemini_model": self.settings.gemini.model_for_tier(tier),
+                "requests": stats.requests,
+                "failed_validation": stats.failed_validation,
+                "escalated": stats.escalated,
+                "escalation_rate": (stats.escalated / max(stats.requests, 1)) * 100,
+                "p50_ms": self.tracker.percentile(f"llm.tier{tier}", 50),
+                "p95_ms": self.tracker.percentile(f"llm.tier{tier}", 95),
+            }
+        return {"max_tier": self.max_tier, "tiers": tiers}
+
+
+# Global instance
+_model_tier_router: Optional[ModelTierRouter] = None
+
+
+def get_model_tier_router() -> ModelTierRouter:
+    """Get or create global model tier router"""
+    global _model_tier_router
+    if _model_tier_router is None:
+        _model_tier_router = ModelTierRouter()
+    return _model_tier_router
@@ -0,0 +1,581 @@
+"""
+OpenAI-Compatible AI Client
+Chat completions against any OpenAI-style endpoint, spread over a pool of API keys
+"""
+import asyncio
+import json
+import time
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Callable, Tuple, Deque
+from urllib.parse import urlparse
+import httpx
+
+from src.utils.config import OpenAICompatibleConfig, get_settings
+from src.utils.logger import get_logger
+from src.utils.http_transport import get_http_transport
+from src.utils.prompt_registry import get_prompt_registry
+from src.utils.tokens import usage_record
+from src.ai.json_stream import IncrementalJSONScanner
+from src.ai.compact_protocol import STREAMED_ARRAYS, expand_field
+from src.ai.cassette_recorder import get_cassette_recorder
+from src.ai.rate_limiter import Priority, TokenBucketScheduler, get_rate_limiter
+from src.ai.response_cache import hash_context
+from src.ai.response_decoder import get_response_decoder
+
+logger = get_logger(__name__)
+
+# Schema defaults this client has always used for missing fields
+_RESPONSE_DEFAULTS = {"intent": "command", "response": "Processing your request"}
+# Window of the aggregate throughput figures
+_THROUGHPUT_WINDOW = 60.0
+
+
+class _KeySlot:
+    """
+    One API key of a provider's pool, with its own quota
+
+    The quota belongs to the key, so a key configured on several endpoints
+    still gets one rate limiter. Requests go to the key's current endpoint;
+    a connection error moves it on to the next one.
+    """
+
+    def __init__(self, name: str, urls: List[str], key: str, config: OpenAICompatibleConfig):
+        self.name = name
+        self.urls = urls
+        self.key = key
+        self._endpoint = 0
+        self.url = urls[0]
+        self.client = get_http_transport().client_for(self.url, timeout=30.0)
+        self.limiter: TokenBucketScheduler = get_rate_limiter(name, rpm=config.rpm, burst=config.burst)
+        self.max_concurrency = max(config.max_concurrency, 1)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+
+        # Stats
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.latency_ms = 0.0
+
+    def next_endpoint(self):
+        """Send later requests to the key's next endpoint (after a connection error)"""
+        if len(self.urls) < 2:
+            return
+        self._endpoint = (self._endpoint + 1) % len(self.urls)
+        self.url = self.urls[self._endpoint]
+        self.client = get_http_transport().client_for(self.url, timeout=30.0)
+        logger.warning(f"{self.name} switching to endpoint {urlparse(self.url).netloc}")
+
+    def avg_latency_ms(self) -> float:
+        return self.latency_ms / self.requests if self.requests else 1000.0
+
+    def score(self, priority: Priority) -> float:
+        """Expected wait before a new request could be sent on this key (lower is better)"""
+        wait = self.limiter.estimated_wait_ms(priority)
+        if self.in_flight >= self.max_concurrency:
+            wait += self.avg_latency_ms()  # Until a request in flight finishes
+        return wait + self.in_flight  # Spread ties across keys
+
+
+class KeyPool:
+    """
+    Every API key a provider is configured with
+
+    Each key has its own token bucket (the provider's rpm/burst apply per
+    key) and at most max_concurrency requests in flight, whichever of the
+    provider's endpoints it is sent to. A request goes to the key it would
+    wait least for; a 429 penalizes that key and the request is retried on
+    the next one, so throughput scales with the number of keys. The first
+    key's rate limiter is named after the provider, later ones
+    "<provider>#2", "<provider>#3", ...
+    """
+
+    def __init__(self, provider: str, config: OpenAICompatibleConfig):
+        self.provider = provider
+        self.config = config
+        urls = config.endpoints()
+        self.slots = [
+            _KeySlot(provider if i == 0 else f"{provider}#{i + 1}", urls, key, config)
+            for i, key in enumerate(config.keys())
+        ]
+        self.rotations = 0
+        self._recent: Deque[Tuple[float, int]] = deque()
+        _pools[provider] = self
+
+    def pick(self, priority: Priority, exclude: set = frozenset()) -> _KeySlot:
+        """Key a new request should use (keys in `exclude` only if nothing else is left)"""
+        candidates = [slot for slot in self.slots if slot not in exclude] or self.slots
+        return min(candidates, key=lambda slot: slot.score(priority))
+
+    def estimated_wait_ms(self, priority: Priority = Priority.VOICE) -> float:
+        """Queue time of the best key (what the provider router charges for this provider)"""
+        return min(slot.score(priority) for slot in self.slots) if self.slots else 0.0
+
+    @asynccontextmanager
+    async def lease(self, slot: _KeySlot, priority: Priority, wait: Optional[float] = None):
+        """
+        Hold one concurrency slot and one rate limit token of a key
+
+        Raises asyncio.TimeoutError if no token is granted within `wait` seconds.
+        """
+        async with slot.semaphore:
+            if not await slot.limiter.acquire(priority, timeout=wait):
+                raise asyncio.TimeoutError(f"no {slot.name} rate limit token within {wait:.1f}s")
+            slot.in_flight += 1
+            try:
+                yield slot
+            finally:
+                slot.in_flight -= 1
+
+    def record(self, slot: _KeySlot, latency_ms: float, completion_tokens: int):
+        """Record a completed request"""
+        slot.requests += 1
+        slot.latency_ms += latency_ms
+        now = time.monotonic()
+        self._recent.append((now, completion_tokens))
+        while self._recent and now - self._recent[0][0] > _THROUGHPUT_WINDOW:
+            self._recent.popleft()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get aggregate throughput and per-key statistics"""
+        now = time.monotonic()
+        recent = [tokens for at, tokens in self._recent if now - at <= _THROUGHPUT_WINDOW]
+        return {
+            "keys": len(self.slots),
+            "capacity_rpm": self.config.rpm * len(self.slots),
+            "requests_last_min": len(recent),
+            "completion_tokens_last_min": sum(recent),
+            "in_flight": sum(slot.in_flight for slot in self.slots),
+            "rotations": self.rotations,
+            "pool": {
+                slot.name: {
+                    "endpoint": urlparse(slot.url).netloc,
+                    "key": f"...{slot.key[-4:]}",
+                    "requests": slot.requests,
+                    "rate_limited": slot.rate_limited,
+                    "errors": slot.errors,
+                    "in_flight": slot.in_flight,
+                    "avg_latency_ms": slot.avg_latency_ms() if slot.requests else None,
+                }
+                for slot in self.slots
+            },
+        }
+
+
+# Key pools by provider, for statistics
+_pools: Dict[str, KeyPool] = {}
+
+
+def get_key_pool_stats() -> Dict[str, Any]:
+    """Get throughput statistics of every key pool in use"""
+    return {name: pool.get_stats() for name, pool in _pools.items()}
+
+
+class OpenAICompatibleClient:
+    """
+    Context-aware command processing over an OpenAI-style chat completions API
+
+    One client serves one provider: its config supplies the models, the
+    endpoints and the API keys, and requests are spread over the key pool.
+    Groq and Qwen are subclasses; any other backend only needs an entry in
+    openai_providers and its <NAME>_* settings.
+    """
+
+    def __init__(self, name: str, config: Optional[OpenAICompatibleConfig] = None):
+        self.settings = get_settings()
+        self.name = name
+        self.display_name = name.title()
+        self.config = config or self.settings.provider(name)
+        self.pool = KeyPool(name, self.config)
+        self.system_prompt = self._load_system_prompt()
+        logger.info(
+            f"{self.display_name} client initialized with model: {self.config.model} "
+            f"({len(self.pool.slots)} keys, {len(self.config.endpoints())} endpoints)"
+        )
+
+    def _load_system_prompt(self) -> str:
+        """Load system prompt from the prompt registry"""
+        prompt = get_prompt_registry().get("system_prompt")
+        if prompt is None:
+            return self._get_default_prompt()
+        return prompt.text
+
+    def _get_default_prompt(self) -> str:
+        """Default system prompt if file not found"""
+        return """You are Aiden, an intelligent Windows assistant.
+        Analyze user messages and return structured JSON responses with commands to execute.
+        Always return valid JSON in format: {"is_followup": bool, "response": str, "intent": str, "commands": [...], "update_context": bool}"""
+
+    def estimated_wait_ms(self, priority: Priority = Priority.VOICE) -> float:
+        """Rough time a new request would spend queued for a key"""
+        return self.pool.estimated_wait_ms(priority)
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]] = None,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        priority: Priority = Priority.VOICE,
+        max_tokens: Optional[int] = None,
+        tier: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Send chat request with context awareness
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            context: Conversation context (history, entities, etc.)
+            on_field: Called with (key, value) as each top-level JSON field completes
+            priority: Rate limiter priority class of this request
+            max_tokens: Completion token limit for this request (default: configured max_tokens)
+            tier: Model tier (0 = configured model, see escalation_models)
+
+        Returns:
+            Parsed command structure
+        """
+        try:
+            user_message = messages[-1]["content"] if messages else ""
+
+            # Response caching happens before Pass 1 in AidenAssistant (see ResponseCache)
+
+            model = self.config.model_for_tier(tier)
+            payload = {
+                "model": model,
+                "messages": messages,
+                "temperature": self.config.temperature,
+                "max_tokens": max_tokens or self.config.max_tokens,
+                "response_format": {"type": "json_object"}  # Force JSON output
+            }
+
+            logger.debug(f"Sending request to {self.display_name} API: {user_message[:100]}...")
+
+            if self.config.stream:
+                # Groq rejects response_format together with stream=True; the
+                # system prompt already demands JSON and _parse_response strips fences
+                payload.pop("response_format")
+                payload["stream"] = True
+                payload["stream_options"] = {"include_usage": True}
+
+            message_content, usage, latency_ms = await self._complete(payload, priority, on_field)
+
+            recorder = get_cassette_recorder()
+            if recorder:
+                recorder.record(
+                    self.name, model, messages, message_content, usage,
+                    latency_ms, bool(payload.get("stream"))
+                )
+
+            # Parse JSON response
+            parsed_response = self._parse_response(message_content, user_message)
+            parsed_response["usage"] = usage_record(
+                messages, message_content, usage.get("prompt_tokens"), usage.get("completion_tokens")
+            )
+
+            if on_field and not self.config.stream:
+                for key, value in parsed_response.items():
+                    self._notify_field(on_field, key, value)
+
+            logger.info(f"{self.display_name} response: intent={parsed_response.get('intent')}, commands={len(parsed_response.get('commands', []))}")
+
+            return parsed_response
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"{self.display_name} API HTTP error: {e.response.status_code} - {e.response.text}")
+            return self._fallback_response(user_message, "API error")
+        except httpx.RequestError as e:
+            logger.error(f"{self.display_name} API request error: {e}")
+            return self._fallback_response(user_message, "Connection error")
+        except Exception as e:
+            logger.error(f"Error in {self.display_name} chat: {e}", exc_info=True)
+            return self._fallback_response(user_message, str(e))
+
+    async def complete_text(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 50,
+        temperature: float = 0.3,
+        priority: Priority = Priority.BACKGROUND,
+        wait: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Plain-text completion without the JSON response format
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            max_tokens: Completion token limit
+            temperature: Sampling temperature
+            priority: Rate limiter priority class of this request
+            wait: Give up if no rate limit token is free within this many seconds
+
+        Returns:
+            Completion text, or None if it could not be had in time
+        """
+        payload = {
+            "model": self.config.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        try:
+            content, _, _ = await self._complete(payload, priority, wait=wait)
+            return content.strip()
+        except asyncio.TimeoutError:
+            return None
+        except Exception as e:
+            logger.warning(f"{self.display_name} text completion failed: {e}")
+            return None
+
+    async def _complete(
+        self,
+        payload: Dict[str, Any],
+        priority: Priority,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        wait: Optional[float] = None
+    ) -> Tuple[str, Dict[str, Any], float]:
+        """
+        Send a completion on the least busy key, rotating to the next key on a 429
+
+        Args:
+            payload: Request payload
+            priority: Rate limiter priority class of this request
+            on_field: Callback for each completed top-level field (streamed payloads)
+            wait: Give up if a key's rate limit token is not free within this many seconds
+
+        Returns:
+            Tuple of (completion text, provider usage if reported, latency in ms)
+        """
+        # One retry when there is only one key
+        tried = set()
+        attempts = max(len(self.pool.slots), 2)
+        for attempt in range(attempts):
+            slot = self.pool.pick(priority, tried)
+            async with self.pool.lease(slot, priority, wait):
+                start = time.perf_counter()
+                try:
+                    content, usage = await self._request_completion(slot, payload, on_field)
+                    break
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code != 429:
+                        slot.errors += 1
+                        raise
+                    slot.rate_limited += 1
+                    slot.limiter.penalize(self._retry_after(e.response))
+                    if attempt == attempts - 1:
+                        raise
+                    tried.add(slot)
+                    self.pool.rotations += 1
+                except httpx.RequestError:
+                    slot.errors += 1
+                    slot.next_endpoint()
+                    raise
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.pool.record(slot, latency_ms, usage.get("completion_tokens") or 0)
+        return content, usage, latency_ms
+
+    async def _request_completion(
+        self,
+        slot: _KeySlot,
+        payload: Dict[str, Any],
+        on_field: Optional[Callable[[str, Any], None]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Send one completion request (streamed or not) with one key of the pool
+
+        Returns:
+            Tuple of (completion text, provider usage if reported)
+        """
+        headers = {
+            "Authorization": f"Bearer {slot.key}",
+            "Content-Type": "application/json"
+        }
+        if payload.get("stream"):
+            return await self._stream_completion(slot, payload, headers, on_field)
+
+        response = await slot.client.post(slot.url, json=payload, headers=headers)
+
+        response.raise_for_status()
+        result = response.json()
+
+        # Extract message from response (OpenAI format)
+        return result["choices"][0]["message"]["content"], result.get("usage") or {}
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """Seconds to wait from a 429's retry-after header"""
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    async def _stream_completion(
+        self,
+        slot: _KeySlot,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        on_field: Optional[Callable[[str, Any], None]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Stream a completion over SSE, reporting JSON fields as they close
+
+        Args:
+            slot: Key (and its current endpoint) to send to
+            payload: Request payload (with stream enabled)
+            headers: Request headers
+            on_field: Callback for each completed top-level field
+
+        Returns:
+            Tuple of (full completion text, provider usage if reported)
+        """
+        scanner = IncrementalJSONScanner(element_keys=STREAMED_ARRAYS)
+        usage: Dict[str, Any] = {}
+
+        async with slot.client.stream("POST", slot.url, json=payload, headers=headers) as response:
+            if response.is_error:
+                await response.aread()  # Make the body available to the error handler
+            response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+
+                chunk = json.loads(data)
+                usage = self._chunk_usage(chunk) or usage
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta", {}).get("content")
+                if not delta:
+                    continue
+
+                for key, value in scanner.feed(delta):
+                    if on_field:
+                        self._notify_field(on_field, key, value)
+
+        return scanner.text, usage
+
+    def _chunk_usage(self, chunk: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Usage reported on a stream chunk (the final one, with include_usage)"""
+        return chunk.get("usage")
+
+    def _notify_field(self, on_field: Callable[[str, Any], None], key: str, value: Any):
+        """Invoke field callback (with compact-protocol keys expanded) without letting it break the request"""
+        field = expand_field(key, value)
+        if field is None:
+            return
+        try:
+            on_field(*field)
+        except Exception as e:
+            logger.error(f"Error in streamed field callback for '{key}': {e}")
+
+    def _parse_response(self, content: str, original_query: str) -> Dict[str, Any]:
+        """Parse JSON response (repairing truncated output)"""
+        parsed = get_response_decoder().decode(content, self.name, defaults=_RESPONSE_DEFAULTS)
+        if parsed is None:
+            # Try to extract information from text response
+            return self._extract_from_text(content.strip(), original_query)
+        return parsed
+
+    def _extract_from_text(self, text: str, original_query: str) -> Dict[str, Any]:
+        """Extract intent from plain text response as fallback"""
+        query_lower = original_query.lower()
+
+        # Detect greetings
+        if any(word in query_lower for word in ["hi", "hello", "hey", "good morning", "good afternoon"]):
+            return {
+                "is_followup": False,
+                "intent": "greeting",
+                "commands": [],
+                "response": f"Hey! How can I help you, {self.settings.app.user_name}?",
+                "update_context": True,
+                "expecting_followup": True
+            }
+
+        # Detect app launch
+        if any(word in query_lower for word in ["open", "launch", "start", "run"]):
+            app_name = self._extract_app_name(query_lower)
+            return {
+                "is_followup": False,
+                "intent": "command",
+                "commands": [{"type": "launch_app", "params": {"name": app_name}}],
+                "response": f"Opening {app_name}",
+                "update_context": True,
+                "expecting_followup": False
+            }
+
+        # Default fallback
+        return {
+            "is_followup": False,
+            "intent": "question",
+            "commands": [],
+            "response": text if text else "I'm not sure how to help with that",
+            "update_context": False,
+            "expecting_followup": False
+        }
+
+    def _extract_app_name(self, query: str) -> str:
+        """Extract app name from query"""
+        words = query.split()
+        keywords = ["open", "launch", "start", "run"]
+
+        for i, word in enumerate(words):
+            if word in keywords and i + 1 < len(words):
+                return words[i + 1]
+
+        return "application"
+
+    def _fallback_response(self, query: str, error: str) -> Dict[str, Any]:
+        """Generate fallback response when API fails"""
+        logger.warning(f"Using fallback response due to: {error}")
+
+        return {
+            "is_followup": False,
+            "intent": "error",
+            "commands": [],
+            "response": "I'm having trouble processing that right now. Could you try again?",
+            "update_context": False,
+            "expecting_followup": False,
+            "error": error
+        }
+
+    def _hash_context(self, context: Optional[Dict[str, Any]]) -> str:
+        """Create hash of context for caching"""
+        return hash_context(context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get key pool throughput statistics"""
+        return {"model": self.config.model, **self.pool.get_stats()}
+
+    async def close(self):
+        """Release HTTP clients (the shared transport owns the connection pools)"""
+        for slot in self.pool.slots:
+            slot.client = None
+
+
+# Clients of providers without a dedicated module
+_clients: Dict[str, OpenAICompatibleClient] = {}
+
+
+async def get_openai_client(name: str) -> OpenAICompatibleClient:
+    """Get or create the global client of an OpenAI-compatible provider"""
+    if name == "groq":
+        from src.ai.groq_client import get_groq_client
+        return await get_groq_client()
+    if name == "qwen":
+        from src.ai.qwen_client import get_qwen_client
+        return await get_qwen_client()
+    client = _clients.get(name)
+    if client is None:
+        client = _clients[name] = OpenAICompatibleClient(name)
+    return client
+
+
+async def close_openai_clients():
+    """Close clients of providers without a dedicated module"""
+    for client in _clients.values():
+        await client.close()
+    _clients.clear()
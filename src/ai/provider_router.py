@@ -0,0 +1,347 @@
+"""
+LLM Provider Router
+Picks the healthiest provider per request using EWMA latency, error rates and circuit breakers
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from src.ai.hedging import HedgedLLMClient
+from src.ai.json_stream import ELEMENT_SUFFIX
+from src.ai.response_decoder import RESPONSE_SCHEMA
+from src.ai.rate_limiter import Priority, get_rate_limiter
+from src.utils.config import get_settings
+from src.utils.latency import get_latency_tracker
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Latency assumed for a provider that has not answered yet
+_PRIOR_LATENCY_MS = 1500.0
+# Samples needed before p99 replaces the maximum timeout
+_MIN_SAMPLES = 10
+_EWMA_ALPHA = 0.2
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after consecutive failures; half-open after a cooldown
+
+    While open, requests skip the provider entirely. After the cooldown a
+    single trial request is let through: success closes the circuit,
+    failure re-opens it for another cooldown. A trial that is cancelled
+    before it finishes also re-opens it, so the next cooldown sends a new
+    trial instead of leaving the circuit half-open for good.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        """The request ended without an outcome (speculation discarded, hedge lost)"""
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class _ProviderHealth:
+    """Rolling health of one provider/model"""
+
+    def __init__(self, model: str, breaker: CircuitBreaker):
+        self.model = model
+        self.breaker = breaker
+        self.ewma_latency_ms: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0
+
+    def record(self, ok: bool, latency_ms: Optional[float] = None):
+        self.requests += 1
+        self.error_rate = (1 - _EWMA_ALPHA) * self.error_rate + _EWMA_ALPHA * (0.0 if ok else 1.0)
+        if ok:
+            self.breaker.record_success()
+            if latency_ms is not None:
+                if self.ewma_latency_ms is None:
+                    self.ewma_latency_ms = latency_ms
+                else:
+                    self.ewma_latency_ms = (1 - _EWMA_ALPHA) * self.ewma_latency_ms + _EWMA_ALPHA * latency_ms
+        else:
+            self.failures += 1
+            self.breaker.record_failure()
+
+
+class _AttemptFields:
+    """
+    Streamed fields of one provider attempt
+
+    Forwards to the caller's callback until the attempt is abandoned and
+    remembers what it forwarded. Once "response" or a command element has
+    gone out the turn has been spoken or acted on, so failing over would
+    speak it twice and run a second provider's commands.
+    """
+
+    def __init__(self, on_field: Callable[[str, Any], None]):
+        self.on_field = on_field
+        self.fields: Dict[str, Any] = {}
+        self.commands: List[Any] = []
+        self.closed = False
+
+    def callback(self, key: str, value: Any):
+        if self.closed:
+            return
+        if key == "commands" + ELEMENT_SUFFIX:
+            self.commands.append(value)
+        else:
+            self.fields[key] = value
+        self.on_field(key, value)
+
+    def close(self):
+        """Stop forwarding - the attempt is over or abandoned"""
+        self.closed = True
+
+    @property
+    def acted(self) -> bool:
+        return "response" in self.fields or bool(self.commands)
+
+    def partial_reply(self) -> Dict[str, Any]:
+        """The reply as far as it was streamed, like a repaired truncated completion"""
+        reply = {key: default for key, (_, default) in RESPONSE_SCHEMA.items()}
+        reply.update(self.fields)
+        if "commands" not in self.fields:
+            reply["commands"] = [cmd for cmd in self.commands if isinstance(cmd, dict)]
+        return reply
+
+
+class ProviderRouter:
+    """
+    Routes each chat() to the healthiest LLM provider
+
+    Providers are ranked by EWMA latency inflated by their recent error
+    rate and by any rate-limit queue they currently have. Each attempt gets
+    a timeout derived from the provider's observed p99 latency, and an
+    invalid or timed-out answer moves on to the next provider, so a degraded
+    provider costs one failed request and then its circuit opens. An attempt
+    that already streamed its response or a command is not failed over;
+    its reply is completed from the streamed fields instead. Health is
+    kept per (provider, model), so a failing escalation model does not
+    open the circuit of the same provider's default model.
+    """
+
+    def __init__(self, clients: Dict[str, Any]):
+        self.settings = get_settings()
+        self.tracker = get_latency_tracker()
+        self.clients = clients
+        self._health: Dict[Tuple[str, str], _ProviderHealth] = {}
+        for name in clients:
+            self._health_for(name)
+        self.failovers = 0
+        self.partial_replies = 0
+        logger.info(f"Provider router initialized with {list(clients)}")
+
+    def _health_for(self, name: str, tier: Optional[int] = None) -> _ProviderHealth:
+        """Health of the model a provider uses for a tier"""
+        model = self.settings.provider(name).model_for_tier(tier)
+        health = self._health.get((name, model))
+        if health is None:
+            app = self.settings.app
+            health = self._health[(name, model)] = _ProviderHealth(
+                model, CircuitBreaker(app.circuit_failure_threshold, app.circuit_cooldown)
+            )
+        return health
+
+    def timeout_for(self, name: str, tier: Optional[int] = None) -> float:
+        """Per-attempt timeout in seconds from the provider model's observed p99"""
+        return self._timeout_for_model(name, self.settings.provider(name).model_for_tier(tier))
+
+    def _timeout_for_model(self, name: str, model: str) -> float:
+        app = self.settings.app
+        p99 = self.tracker.percentile(f"llm.{name}.{model}", 99, min_samples=_MIN_SAMPLES)
+        if p99 is None:
+            return app.llm_max_timeout
+        return min(max(p99 * app.llm_timeout_multiplier / 1000, app.llm_min_timeout), app.llm_max_timeout)
+
+    def _score(self, name: str, priority: Priority, tier: Optional[int] = None) -> float:
+        """Expected cost of sending to a provider now (lower is better)"""
+        health = self._health_for(name, tier)
+        latency = health.ewma_latency_ms if health.ewma_latency_ms is not None else _PRIOR_LATENCY_MS
+        return latency * (1 + 4 * health.error_rate) + self._queue_ms(name, priority)
+    
+    def _queue_ms(self, name: str, priority: Priority) -> float:
+        """Rate-limit queue time of a provider (its least busy key for key pools)"""
+        client = self.clients[name]
+        if hasattr(client, "estimated_wait_ms"):
+            return client.estimated_wait_ms(priority)
+        return get_rate_limiter(name).estimated_wait_ms(priority)
+
+    def rank(self, priority: Priority = Priority.VOICE, tier: Optional[int] = None) -> List[str]:
+        """Providers in the order they would be tried"""
+        return sorted(self.clients, key=lambda name: self._score(name, priority, tier))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        priority: Priority = Priority.VOICE,
+        max_tokens: Optional[int] = None,
+        tier: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Send chat request to the best available provider, failing over on error
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            on_field: Called with (key, value) as top-level fields complete
+            priority: Rate limiter priority class of this request
+            max_tokens: Completion token limit for this request (default: configured max_tokens)
+            tier: Model tier (0 = configured model, see escalation_models)
+
+        Returns:
+            First valid parsed response, the streamed part of a reply that
+            failed after speaking or dispatching, or the last invalid one
+        """
+        fallback = None
+        attempted = 0
+
+        for name in self.rank(priority, tier):
+            health = self._health_for(name, tier)
+            if not health.breaker.allow():
+                health.skipped += 1
+                continue
+
+            if attempted:
+                self.failovers += 1
+                logger.warning(f"↪️ Failing over to {name}")
+            attempted += 1
+
+            # Time spent queued for the rate limit is not the provider's fault
+            timeout = self.timeout_for(name, tier) + self._queue_ms(name, priority) / 1000
+            attempt = _AttemptFields(on_field) if on_field else None
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    self.clients[name].chat(
+                        messages, on_field=attempt.callback if attempt else None,
+                        priority=priority, max_tokens=max_tokens, tier=tier
+                    ),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                health.timeouts += 1
+                health.record(ok=False)
+                logger.warning(f"{name} timed out after {timeout:.1f}s (circuit {health.breaker.state})")
+                if attempt and attempt.acted:
+                    return self._partial_reply(name, attempt)
+                continue
+            except asyncio.CancelledError:
+                health.breaker.record_cancelled()
+                raise
+            except Exception as e:
+                health.record(ok=False)
+                logger.error(f"{name} request failed: {e}")
+                if attempt and attempt.acted:
+                    return self._partial_reply(name, attempt)
+                continue
+            finally:
+                if attempt:
+                    attempt.close()
+
+            if HedgedLLMClient.is_valid(result):
+                latency_ms = (time.perf_counter() - start) * 1000
+                health.record(ok=True, latency_ms=latency_ms)
+                self.tracker.record(f"llm.{name}", latency_ms)
+                self.tracker.record(f"llm.{name}.{health.model}", latency_ms)
+                return result
+
+            health.record(ok=False)
+            fallback = fallback or result
+            logger.warning(f"{name} returned no valid response (circuit {health.breaker.state})")
+            if attempt and attempt.acted:
+                return self._partial_reply(name, attempt)
+
+        if not attempted:
+            logger.error("All LLM provider circuits are open")
+        return fallback
+
+    async def complete_text(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 50,
+        temperature: float = 0.3,
+        priority: Priority = Priority.BACKGROUND,
+        wait: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Plain-text completion from the best provider with a closed circuit
+
+        Side requests like this do not count towards provider health, and
+        never take the trial request of a half-open circuit.
+        """
+        for name in self.rank(priority):
+            if self._health_for(name).breaker.state != CircuitBreaker.CLOSED:
+                continue
+            text = await self.clients[name].complete_text(
+                messages, max_tokens=max_tokens, temperature=temperature, priority=priority, wait=wait
+            )
+            if text:
+                return text
+        return None
+
+    def _partial_reply(self, name: str, attempt: _AttemptFields) -> Dict[str, Any]:
+        """Finish a turn from an attempt that already spoke or dispatched"""
+        self.partial_replies += 1
+        logger.warning(f"{name} failed after streaming part of its reply - not failing over")
+        return attempt.partial_reply()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-provider/model health"""
+        return {
+            "order": self.rank(),
+            "failovers": self.failovers,
+            "partial_replies": self.partial_replies,
+            "providers": {
+                f"{name}:{model}": {
+                    "model": model,
+                    "circuit": health.breaker.state,
+                    "times_opened": health.breaker.times_opened,
+                    "ewma_latency_ms": health.ewma_latency_ms,
+                    "error_rate": health.error_rate * 100,
+                    "timeout_s": self._timeout_for_model(name, model),
+                    "requests": health.requests,
+                    "failures": health.failures,
+                    "timeouts": health.timeouts,
+                    "skipped_open": health.skipped,
+                }
+                for (name, model), health in self._health.items()
+            },
+        }
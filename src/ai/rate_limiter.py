@@ -0,0 +1,234 @@
+"""
+LLM Rate Limiter
+Per-provider token bucket that schedules requests by priority instead of hitting 429s
+"""
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from enum import IntEnum
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Priority(IntEnum):
+    """Request priority classes (lower value is served first)"""
+    VOICE = 0        # Live voice turn - the user is waiting
+    TEXT = 1         # Dashboard / API text message
+    BACKGROUND = 2   # Enhancement, summaries and other deferrable work
+
+
+class _PriorityStats:
+    """Queue-time accounting for one priority class"""
+
+    def __init__(self):
+        self.granted = 0
+        self.deferred = 0
+        self.timeouts = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+
+class TokenBucketScheduler:
+    """
+    Token bucket with a priority queue in front of one provider
+
+    The bucket holds at most `burst` tokens and refills at rpm / 60 per
+    second, so sustained throughput matches the provider's quota. Waiting
+    requests are granted strictly by priority, then arrival order.
+    Background requests are only granted while `voice_reserve` tokens
+    remain for a voice turn that may arrive next (capped at the bucket size,
+    so a small burst cannot starve them). A 429 from the provider empties
+    the bucket and pauses grants until its retry-after has passed.
+    """
+
+    def __init__(self, name: str, rpm: int, burst: int = 3, voice_reserve: int = 1):
+        self.name = name
+        self.capacity = max(1, min(burst, rpm))
+        self.refill_per_sec = max(rpm, 1) / 60.0
+        self.voice_reserve = voice_reserve
+        # A background request needs its own token plus the reserve, but never more than the bucket holds
+        self._background_needed = min(1 + voice_reserve, self.capacity)
+        self.tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.penalties = 0
+        self._stats: Dict[Priority, _PriorityStats] = {p: _PriorityStats() for p in Priority}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    def _needed(self, priority: int) -> int:
+        """Tokens that must be in the bucket to grant a request of this priority"""
+        return self._background_needed if priority == Priority.BACKGROUND else 1
+
+    def _can_grant(self, priority: int) -> bool:
+        if time.monotonic() < self._paused_until:
+            return False
+        return self.tokens >= self._needed(priority)
+
+    async def acquire(self, priority: Priority = Priority.VOICE, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for permission to send one request
+
+        Args:
+            priority: Request priority class
+            timeout: Give up after this many seconds (None waits indefinitely)
+
+        Returns:
+            True if granted, False if the timeout expired first
+        """
+        stats = self._stats[priority]
+        start = time.perf_counter()
+        self._refill()
+
+        # Fast path: nothing queued ahead and a token is available
+        if not self._queue and self._can_grant(priority):
+            self.tokens -= 1
+            stats.granted += 1
+            return True
+
+        stats.deferred += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._seq), future))
+        self._ensure_dispatcher()
+        self._wakeup.set()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted at the same moment the timeout fired - keep it
+                pass
+            else:
+                future.cancel()
+                stats.timeouts += 1
+                logger.info(f"⏳ {self.name} {priority.name} request dropped after {timeout:.1f}s in queue")
+                return False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        waited = (time.perf_counter() - start) * 1000
+        stats.granted += 1
+        stats.wait_ms += waited
+        stats.max_wait_ms = max(stats.max_wait_ms, waited)
+        if waited > 100:
+            logger.info(f"⏳ {self.name} {priority.name} request deferred {waited:.0f} ms by rate limit")
+        return True
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        """Grant queued requests as tokens become available"""
+        while self._queue:
+            self._refill()
+
+            # Drop requests that were cancelled or timed out while waiting
+            while self._queue and self._queue[0][2].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                break
+
+            priority = self._queue[0][0]
+            if self._can_grant(priority):
+                _, _, future = heapq.heappop(self._queue)
+                self.tokens -= 1
+                future.set_result(True)
+                continue
+
+            # Sleep until the head of the queue could be served (or a new arrival)
+            delay = max(
+                (self._needed(priority) - self.tokens) / self.refill_per_sec,
+                self._paused_until - time.monotonic(),
+                0.005
+            )
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def estimated_wait_ms(self, priority: Priority = Priority.VOICE) -> float:
+        """Rough time a new request of this priority would spend queued"""
+        self._refill()
+        ahead = sum(1 for p, _, f in self._queue if p <= priority and not f.done())
+        wait = max((ahead + self._needed(priority) - self.tokens) / self.refill_per_sec, 0.0)
+        return max(wait, self._paused_until - time.monotonic(), 0.0) * 1000
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """
+        Back off after the provider rejected a request with 429
+
+        Args:
+            retry_after: Seconds the provider asked us to wait, if known
+        """
+        self.penalties += 1
+        self._refill()
+        self.tokens = 0.0
+        pause = retry_after if retry_after is not None else 1 / self.refill_per_sec
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        logger.warning(f"{self.name} rate limited (429) - pausing requests for {pause:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bucket and queue statistics"""
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "refill_per_min": self.refill_per_sec * 60,
+            "queue_depth": sum(1 for _, _, f in self._queue if not f.done()),
+            "penalties": self.penalties,
+            "priorities": {
+                priority.name.lower(): {
+                    "granted": stats.granted,
+                    "deferred": stats.deferred,
+                    "timeouts": stats.timeouts,
+                    "avg_wait_ms": stats.wait_ms / max(stats.deferred, 1),
+                    "max_wait_ms": stats.max_wait_ms,
+                }
+                for priority, stats in self._stats.items()
+            },
+        }
+
+
+# Global instances, one per provider
+_rate_limiters: Dict[str, TokenBucketScheduler] = {}
+
+
+def get_rate_limiter(provider: str, rpm: Optional[int] = None, burst: Optional[int] = None) -> TokenBucketScheduler:
+    """
+    Get or create the rate limiter for a provider ("gemini", "groq", ...)
+
+    Args:
+        provider: Provider name, or the name of one API key of a provider's key pool
+        rpm: Quota when created (default: the provider's configured rpm)
+        burst: Burst when created (default: the provider's configured burst)
+    """
+    limiter = _rate_limiters.get(provider)
+    if limiter is None:
+        if rpm is None or burst is None:
+            config = get_settings().provider(provider)
+            rpm, burst = rpm or config.rpm, burst or config.burst
+        limiter = TokenBucketScheduler(provider, rpm=rpm, burst=burst)
+        _rate_limiters[provider] = limiter
+    return limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Any]:
+    """Get statistics of every rate limiter in use"""
+    return {name: limiter.get_stats() for name, limiter in _rate_limiters.items()}
@@ -0,0 +1,333 @@
+"""
+LLM Response Cache
+In-process cache of LLM turns with transcript normalization and near-duplicate matching
+"""
+import re
+import json
+import asyncio
+import time
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.text_similarity import NGramVectorizer
+
+logger = get_logger(__name__)
+
+# Spoken fillers that never change the meaning of a command
+_FILLERS = re.compile(
+    r"\b(?:um+|uh+|erm|hmm+|ah+|please|kindly|just|okay|ok|so|hey|aiden|aidan|hayden|"
+    r"can you|could you|would you|will you|for me)\b"
+)
+
+# Common STT splits / spellings collapsed to one form
+_STT_VARIANTS = {
+    "note pad": "notepad",
+    "power shell": "powershell",
+    "fire fox": "firefox",
+    "visual studio code": "vscode",
+    "vs code": "vscode",
+    "google chrome": "chrome",
+    "microsoft edge": "edge",
+    "shut down": "shutdown",
+    "computer": "pc",
+    "laptop": "pc",
+    "turn of": "turn off",
+}
+
+# Symbols that are part of a name, spelled the way STT writes them ("notepad++", "c#")
+_SYMBOL_WORDS = (
+    (re.compile(r"\+"), " plus "),
+    (re.compile(r"(?<=\w)#"), " sharp "),
+    (re.compile(r"#"), " number "),
+    (re.compile(r"&"), " and "),
+    (re.compile(r"%"), " percent "),
+    (re.compile(r"@"), " at "),
+)
+
+# Words left after normalization that never name an app, device or action.
+# Every other word is content and must match exactly for a near-duplicate
+# hit, so "open word" never replays "open wordpad"
+_NON_CONTENT_WORDS = frozenset({
+    "now", "right", "to", "i", "want", "wanna", "would", "like", "me", "need",
+    "go", "ahead", "then", "quickly",
+})
+
+# Commands whose outcome depends on current device state (speed cycling, toggles)
+_STATEFUL_COMMANDS = {
+    "fan_control": {"on", "turn_on", "increase", "speed_up", "faster", "high", "mode", "change_mode", "switch_mode"},
+    "wake_word_control": {"toggle"},
+}
+_CACHEABLE_COMMAND_TYPES = {"launch_app", "kill_process", "system_command", "fan_control", "wake_word_control"}
+_CACHEABLE_INTENTS = {"greeting", "command", "multi_command", "system_command"}
+
+
+def hash_context(context: Optional[Dict[str, Any]]) -> str:
+    """Create hash of the context fields that change how an utterance is interpreted"""
+    if not context:
+        return "no_context"
+
+    context_str = json.dumps({
+        "last_intent": context.get("last_intent"),
+        "last_entities": context.get("last_entities"),
+        "expecting_followup": context.get("expecting_followup")
+    }, sort_keys=True)
+
+    return hashlib.md5(context_str.encode()).hexdigest()
+
+
+def spell_symbols(text: str) -> str:
+    """Spell out symbols that are part of a name ("notepad++" -> "notepad plus plus")"""
+    for symbol, word in _SYMBOL_WORDS:
+        text = symbol.sub(word, text)
+    return text
+
+
+def normalize_transcript(text: str) -> str:
+    """Canonical form of an utterance: case, punctuation, symbols, fillers and STT variants"""
+    text = spell_symbols(text.lower().replace("’", "'"))
+    text = re.sub(r"[^\w\s']", " ", text)
+    text = " " + re.sub(r"\s+", " ", text).strip() + " "
+    for variant, canonical in _STT_VARIANTS.items():
+        text = text.replace(f" {variant} ", f" {canonical} ")
+    text = _FILLERS.sub(" ", text)
+    text = re.sub(r"\b(?:the|a|an|my)\b", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class _ContextIndex:
+    """Entries and their n-gram matrix for one context hash"""
+
+    def __init__(self, dim: int):
+        self.queries: List[str] = []
+        self.responses: List[Dict[str, Any]] = []
+        self.content_keys: List[Tuple[str, ...]] = []
+        self.exact: Dict[str, int] = {}
+        self.by_content: Dict[Tuple[str, ...], List[int]] = {}
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+
+
+class ResponseCache:
+    """
+    Near-duplicate LLM response cache held in-process
+
+    Exact hits on the normalized transcript are a dict lookup. A near-duplicate
+    must have exactly the same content words (everything but fillers) and is
+    then picked by hashed character n-gram similarity, so fuzzy matching only
+    absorbs filler words and never swaps one app for a similarly spelled one.
+    A lookup stays well under a millisecond and can run before every Pass 1.
+    Entries are written through to Redis and re-loaded at startup.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.threshold = self.settings.cache.response_cache_similarity
+        self.max_entries = self.settings.cache.response_cache_max_entries
+        self.vectorizer = NGramVectorizer()
+        self._indexes: Dict[str, _ContextIndex] = {}
+        self._size = 0
+
+        # Stats
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.refused = 0
+        self.lookup_time_ms = 0.0
+        self.max_lookup_ms = 0.0
+
+    def lookup(self, user_text: str, context_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached response for an utterance under the given context
+
+        Args:
+            user_text: Raw transcript
+            context_hash: Hash from hash_context()
+
+        Returns:
+            Copy of the cached response, or None
+        """
+        start = time.perf_counter()
+        result = self._lookup(normalize_transcript(user_text), context_hash)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.lookup_time_ms += elapsed
+        self.max_lookup_ms = max(self.max_lookup_ms, elapsed)
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        logger.info(f"💾 Response cache hit for '{user_text[:50]}' ({elapsed:.2f} ms)")
+        return {**result, "cached": True}
+
+    def _lookup(self, query: str, context_hash: str) -> Optional[Dict[str, Any]]:
+        index = self._indexes.get(context_hash)
+        if not query or index is None or not index.queries:
+            return None
+
+        position = index.exact.get(query)
+        if position is not None:
+            self.exact_hits += 1
+            return index.responses[position]
+
+        candidates = index.by_content.get(self._content_key(query))
+        if not candidates:
+            return None
+
+        scores = index.matrix[candidates] @ self.vectorizer.vectorize(query)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        self.near_hits += 1
+        return index.responses[candidates[best]]
+
+    def is_cacheable(self, response: Dict[str, Any]) -> bool:
+        """
+        Only cache turns whose outcome does not depend on live state
+
+        Refuses errors, questions, follow-ups, answers built from system
+        context, shell commands and commands that cycle or toggle a device.
+        """
+        if response.get("error") or response.get("intent") not in _CACHEABLE_INTENTS:
+            return False
+        if response.get("is_followup") or response.get("needs_context") or response.get("context_used"):
+            return False
+
+        for command in response.get("commands", []):
+            command_type = command.get("type")
+            if command_type not in _CACHEABLE_COMMAND_TYPES:
+                return False
+            params = command.get("params", {})
+            operation = str(params.get("operation") or params.get("action") or "").lower()
+            if operation in _STATEFUL_COMMANDS.get(command_type, set()):
+                return False
+
+        return True
+
+    def store(self, user_text: str, context_hash: str, response: Dict[str, Any], persist: bool = True) -> bool:
+        """
+        Cache an LLM response if it is safe to replay
+
+        Args:
+            user_text: Raw transcript
+            context_hash: Hash from hash_context()
+            response: Parsed LLM response
+            persist: Also write through to Redis (in background)
+
+        Returns:
+            True if the response was cached
+        """
+        if not self.is_cacheable(response):
+            self.refused += 1
+            return False
+
+        query = normalize_transcript(user_text)
+        if not query:
+            return False
+
+        clean = {k: v for k, v in response.items() if k not in ("cached", "fast_path", "usage")}
+        self._insert(query, context_hash, clean)
+
+        if persist:
+            asyncio.create_task(self._persist(query, context_hash, clean))
+        return True
+
+    def _insert(self, query: str, context_hash: str, response: Dict[str, Any]):
+        index = self._indexes.setdefault(context_hash, _ContextIndex(self.vectorizer.dim))
+
+        position = index.exact.get(query)
+        if position is not None:
+            index.responses[position] = response
+            return
+
+        if self._size >= self.max_entries:
+            self._evict_oldest()
+
+        content_key = self._content_key(query)
+        index.exact[query] = len(index.queries)
+        index.by_content.setdefault(content_key, []).append(len(index.queries))
+        index.queries.append(query)
+        index.responses.append(response)
+        index.content_keys.append(content_key)
+        index.matrix = np.vstack([index.matrix, self.vectorizer.vectorize(query)])
+        self._size += 1
+
+    def _evict_oldest(self):
+        """Drop the oldest entry of the largest context index"""
+        index = max(self._indexes.values(), key=lambda idx: len(idx.queries))
+        if not index.queries:
+            return
+        index.queries.pop(0)
+        index.responses.pop(0)
+        index.content_keys.pop(0)
+        index.matrix = index.matrix[1:]
+        index.exact = {query: i for i, query in enumerate(index.queries)}
+        index.by_content = {}
+        for i, content_key in enumerate(index.content_keys):
+            index.by_content.setdefault(content_key, []).append(i)
+        self._size -= 1
+
+    @staticmethod
+    def _content_key(query: str) -> Tuple[str, ...]:
+        """Content words, in order, that must match exactly for a near-duplicate hit"""
+        return tuple(word for word in query.split() if word not in _NON_CONTENT_WORDS)
+
+    async def _persist(self, query: str, context_hash: str, response: Dict[str, Any]):
+        """Write entry through to Redis (non-critical)"""
+        try:
+            from src.database.redis_client import get_redis_client
+            redis = await get_redis_client()
+            await redis.cache_llm_response(query, context_hash, {
+                "query": query,
+                "context_hash": context_hash,
+                "response": response
+            })
+        except Exception as e:
+            logger.debug(f"Response cache write-through failed (non-critical): {e}")
+
+    async def warm(self):
+        """Load entries persisted in Redis into the in-process index"""
+        try:
+            from src.database.redis_client import get_redis_client
+            redis = await get_redis_client()
+            entries = await redis.scan_llm_responses()
+            loaded = 0
+            for entry in entries:
+                if not isinstance(entry, dict) or "query" not in entry or "response" not in entry:
+                    continue
+                if self.is_cacheable(entry["response"]):
+                    self._insert(entry["query"], entry.get("context_hash", "no_context"), entry["response"])
+                    loaded += 1
+            logger.info(f"Response cache warmed with {loaded} entries")
+        except Exception as e:
+            logger.debug(f"Response cache warm-up skipped: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.exact_hits + self.near_hits + self.misses
+        return {
+            "entries": self._size,
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "refused": self.refused,
+            "hit_rate": ((self.exact_hits + self.near_hits) / max(lookups, 1)) * 100,
+            "avg_lookup_ms": self.lookup_time_ms / max(lookups, 1),
+            "max_lookup_ms": self.max_lookup_ms,
+        }
+
+
+# Global instance
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create global response cache"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,246 @@
+"""
+LLM Response Decoder
+Schema-typed decoding of the {intent, commands, response, ...} object with truncated-JSON repair
+"""
+import json
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.ai.compact_protocol import expand, is_compact
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# orjson is optional - several times faster than the stdlib for these small objects
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _loads = orjson.loads
+    _DecodeError = (orjson.JSONDecodeError, json.JSONDecodeError)
+except ImportError:
+    ORJSON_AVAILABLE = False
+    _loads = json.loads
+    _DecodeError = (json.JSONDecodeError,)
+
+# Field -> (type, default) of the assistant response object
+RESPONSE_SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "needs_context": (list, []),
+    "is_followup": (bool, False),
+    "intent": (str, "unknown"),
+    "commands": (list, []),
+    "response": (str, "Done"),
+    "update_context": (bool, True),
+    "expecting_followup": (bool, False),
+}
+
+_CLOSERS = {"{": "}", "[": "]"}
+# Cut points tried before giving up on a truncated completion
+_MAX_REPAIR_ATTEMPTS = 6
+
+
+class _SourceStats:
+    """Decode outcomes for one provider"""
+
+    def __init__(self):
+        self.ok = 0
+        self.repaired = 0
+        self.failed = 0
+        self.compact = 0
+
+
+class ResponseDecoder:
+    """
+    Decodes LLM completions into typed response dicts
+
+    The object is located past any code fence or preamble and parsed in one
+    pass. A completion cut off mid-object (e.g. at max_tokens) is repaired by
+    cutting back to the last structurally complete point and closing the
+    open objects and arrays. Only whole elements survive a repair, so a
+    half-written command is dropped rather than executed with truncated
+    parameters; a top-level string that was cut off (usually "response") is
+    closed so it can still be spoken. Replies in the compact protocol are
+    expanded to full field names, then fields are coerced to
+    RESPONSE_SCHEMA and malformed commands are discarded.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, _SourceStats] = {}
+
+    def decode(
+        self,
+        text: str,
+        source: str = "llm",
+        defaults: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Decode a completion
+
+        Args:
+            text: Raw completion text
+            source: Provider name for statistics
+            defaults: Per-field overrides of the schema defaults
+
+        Returns:
+            Typed response dict, or None if no JSON object could be recovered
+        """
+        stats = self._stats.setdefault(source, _SourceStats())
+        start = text.find("{")
+        if start < 0:
+            stats.failed += 1
+            return None
+
+        parsed, repaired = self._parse(text[start:])
+        compact = isinstance(parsed, dict) and is_compact(parsed)
+        if compact:
+            parsed = expand(parsed)
+        # A repair that recovered neither a reply nor a command is not worth acting on
+        if repaired and isinstance(parsed, dict) and "response" not in parsed and "commands" not in parsed:
+            parsed = None
+        if not isinstance(parsed, dict):
+            stats.failed += 1
+            logger.error(f"Failed to decode JSON from {source}: {text[:200]}")
+            return None
+
+        if repaired:
+            stats.repaired += 1
+            logger.warning(f"🩹 Repaired truncated JSON from {source} ({len(text)} chars)")
+        else:
+            stats.ok += 1
+        if compact:
+            stats.compact += 1
+        return self._coerce(parsed, defaults)
+
+    def _parse(self, text: str) -> Tuple[Any, bool]:
+        """Parse the object starting at text[0]; returns (value, repaired)"""
+        # Fast path: a complete object, possibly followed by a closing fence
+        end = text.rfind("}") + 1
+        if end:
+            try:
+                return _loads(text[:end]), False
+            except _DecodeError:
+                pass
+
+        end, stack, in_value_string, escape, cuts = self._scan(text)
+
+        if end is not None:
+            try:
+                return _loads(text[:end]), False
+            except _DecodeError:
+                # Balanced but invalid (e.g. a stray token) - try the cut points below
+                pass
+
+        candidates: List[str] = []
+        if end is None and in_value_string:
+            # Truncated inside a top-level string value: close it where it stopped
+            body = text[:-1] if escape else text
+            candidates.append(body + '"' + "}")
+        for index, open_stack in reversed(cuts[-_MAX_REPAIR_ATTEMPTS:]):
+            candidates.append(text[:index] + "".join(_CLOSERS[c] for c in reversed(open_stack)))
+
+        for candidate in candidates:
+            try:
+                return _loads(candidate), True
+            except _DecodeError:
+                continue
+        return None, False
+
+    @staticmethod
+    def _scan(text: str) -> Tuple[Optional[int], str, bool, bool, List[Tuple[int, str]]]:
+        """
+        Single pass over the object tracking nesting and safe cut points
+
+        Returns:
+            (end index if the object closed, open-bracket stack, whether the
+            text ends inside a top-level string value, pending escape,
+            [(cut index, open-bracket stack at that point)])
+        """
+        stack: List[str] = []
+        cuts: List[Tuple[int, str]] = []
+        in_string = False
+        escape = False
+        string_is_value = False
+        expect_value = False
+
+        for i, ch in enumerate(text):
+            if in_string:
+                if escape:
+                    escape = False
+                elif ch == "\\":
+                    escape = True
+                elif ch == '"':
+                    in_string = False
+                    # A finished array element or top-level value is a safe cut point
+                    if stack[-1] == "[" or (len(stack) == 1 and string_is_value):
+                        cuts.append((i + 1, "".join(stack)))
+                continue
+
+            if ch == '"':
+                in_string = True
+                string_is_value = expect_value
+                expect_value = False
+            elif ch in "{[":
+                stack.append(ch)
+                expect_value = ch == "["
+            elif ch in "}]":
+                stack.pop()
+                if not stack:
+                    return i + 1, "", False, False, cuts
+                if stack[-1] == "[" or len(stack) == 1:
+                    cuts.append((i + 1, "".join(stack)))
+                expect_value = False
+            elif ch == ":":
+                expect_value = True
+            elif ch == ",":
+                if stack[-1] == "[" or len(stack) == 1:
+                    cuts.append((i, "".join(stack)))
+                expect_value = stack[-1] == "["
+            elif not ch.isspace():
+                expect_value = False
+
+        return None, "".join(stack), in_string and string_is_value and len(stack) == 1, escape, cuts
+
+    @staticmethod
+    def _coerce(parsed: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Type every schema field, falling back to defaults"""
+        result = dict(parsed)
+        for key, (kind, default) in RESPONSE_SCHEMA.items():
+            if defaults and key in defaults:
+                default = defaults[key]
+            value = parsed.get(key)
+            if not isinstance(value, kind):
+                value = list(default) if kind is list else default
+            result[key] = value
+
+        result["commands"] = [
+            {**cmd, "params": cmd.get("params") if isinstance(cmd.get("params"), dict) else {}}
+            for cmd in result["commands"]
+            if isinstance(cmd, dict) and isinstance(cmd.get("type"), str)
+        ]
+        result["needs_context"] = [item for item in result["needs_context"] if isinstance(item, str)]
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get decode outcomes per provider"""
+        sources = {}
+        for source, stats in self._stats.items():
+            total = stats.ok + stats.repaired + stats.failed
+            sources[source] = {
+                "ok": stats.ok,
+                "repaired": stats.repaired,
+                "failed": stats.failed,
+                "repair_rate": (stats.repaired / max(total, 1)) * 100,
+                "compact": stats.compact,
+            }
+        return {"orjson": ORJSON_AVAILABLE, "sources": sources}
+
+
+# Global instance
+_response_decoder: Optional[ResponseDecoder] = None
+
+
+def get_response_decoder() -> ResponseDecoder:
+    """Get or create global response decoder"""
+    global _response_decoder
+    if _response_decoder is None:
+        _response_decoder = ResponseDecoder()
+    return _response_decoder
@@ -23,6 +23,7 @@ from src.database.neon_client import get_db_client, close_db_client
 from src.database.redis_client import get_redis_client, close_redis_client
 from src.ai.groq_client import get_groq_client, close_groq_client
 from src.smart_home.esp32_client import get_esp32_client, close_esp32_client
+from src.utils.http_transport import get_http_transport, close_http_transport
 
 logger = get_logger(__name__)
 
@@ -34,6 +35,30 @@ def set_voice_activation_callback(callback: Callable):
     global _voice_activation_callback
     _voice_activation_callback = callback
 
+def _prewarm_urls() -> List[str]:
+    """
+    Hosts the first turn will talk to: the configured LLM providers and the ESP32
+
+    Gemini is reached through its SDK, not the shared transport, so it has
+    no connection here to warm.
+    """
+    settings = get_settings()
+    provider = settings.app.llm_provider
+    if provider == "auto":
+        names = [name for name in settings.app.openai_provider_names() if settings.provider(name).keys()]
+    else:
+        names = [provider]
+        if settings.app.llm_hedging:
+            names.append("groq" if provider == "gemini" else "gemini")
+
+    urls = []
+    for name in names:
+        if name != "gemini":
+            urls.extend(settings.provider(name).endpoints())
+    if settings.esp32.enabled:
+        urls.append(f"http://{settings.esp32.ip_address}")
+    return urls
+
 # Pydantic models for requests/responses
 class MessageRequest(BaseModel):
     message: str
@@ -177,6 +202,11 @@ async def lifespan(app: FastAPI):
         executor.set_esp32_client(esp32_client)
         logger.info("ESP32 client connected to command executor")
         
+        # Pre-handshake LLM and ESP32 connections and keep them warm while idle
+        transport = get_http_transport()
+        asyncio.create_task(transport.prewarm(_prewarm_urls()))
+        transport.start_keep_warm()
+        
         # Start the WebSocket cleanup task
         manager.start_cleanup_task()
         
@@ -195,6 +225,7 @@ async def lifespan(app: FastAPI):
         await close_redis_client()
         await close_groq_client()
         await close_esp32_client()
+        await close_http_transport()
         logger.info("All services closed successfully")
     except Exception as e:
         logger.error(f"Error closing services: {e}")
@@ -663,6 +694,22 @@ async def get_dashboard_stats():
         logger.error(f"Error getting dashboard stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v1/stats/assistant")
+async def get_assistant_stats():
+    """Get assistant pipeline statistics (fast path, latency)"""
+    try:
+        from src.core.assistant import get_assistant
+        assistant = await get_assistant()
+        
+        return {
+            "success": True,
+            "stats": assistant.get_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error getting assistant stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/v1/esp32/devices")
 async def get_esp32_devices():
     """Get list of ESP32 devices"""
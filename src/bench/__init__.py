@@ -0,0 +1,5 @@
+"""Bench module - Offline LLM stand-in, cassette replay and pipeline benchmark"""
+from src.ai.cassette_recorder import CassetteRecorder, get_cassette_recorder
+from src.bench.cassette import Cassette
+
+__all__ = ["Cassette", "CassetteRecorder", "get_cassette_recorder"]
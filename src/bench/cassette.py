@@ -0,0 +1,80 @@
+"""
+LLM Cassettes
+Looks up exchanges recorded by src.ai.cassette_recorder for offline replay
+"""
+import json
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Marker build_messages appends to the system prompt when context was requested
+_CONTEXT_MARKER = "## AVAILABLE SYSTEM RESOURCES"
+
+
+def _request_key(messages: List[Dict[str, str]]) -> Tuple[str, bool]:
+    """(normalised last user message, whether system context was attached)"""
+    user_text = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    return " ".join(user_text.lower().split()), _CONTEXT_MARKER in system
+
+
+class Cassette:
+    """
+    Recorded exchanges indexed for replay
+
+    Requests are matched on the last user message and on whether system
+    context was attached (Pass 1 vs Pass 2). Several recordings of the same
+    request are served round-robin so their latency spread is preserved.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.entries = entries
+        self._by_key: Dict[Tuple[str, bool], List[Dict[str, Any]]] = {}
+        self._by_text: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[Any, int] = {}
+        for entry in entries:
+            text, with_context = _request_key(entry["messages"])
+            self._by_key.setdefault((text, with_context), []).append(entry)
+            self._by_text.setdefault(text, []).append(entry)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        """Load a JSONL cassette, skipping malformed lines"""
+        entries = []
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed cassette line {number} in {path}")
+        logger.info(f"📼 Loaded {len(entries)} exchanges from {path}")
+        return cls(entries)
+
+    def utterances(self) -> List[str]:
+        """Distinct user messages in recording order"""
+        seen = {}
+        for entry in self.entries:
+            user_text = next((m["content"] for m in reversed(entry["messages"]) if m.get("role") == "user"), "")
+            if user_text:
+                seen.setdefault(" ".join(user_text.lower().split()), user_text)
+        return list(seen.values())
+
+    def match(self, messages: List[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """Recorded exchange for a request, or None"""
+        key = _request_key(messages)
+        candidates = self._by_key.get(key) or self._by_text.get(key[0])
+        if not candidates:
+            self.misses += 1
+            return None
+        index = self._cursor.get(key, 0)
+        self._cursor[key] = index + 1
+        self.hits += 1
+        return candidates[index % len(candidates)]
@@ -0,0 +1,236 @@
+"""
+Mock LLM Server
+Local OpenAI-compatible chat completions endpoint that replays cassettes with injected latency and errors
+"""
+import asyncio
+import json
+import math
+import random
+import socket
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.bench.cassette import Cassette
+from src.utils.logger import get_logger
+from src.utils.tokens import estimate_tokens, estimate_message_tokens
+
+logger = get_logger(__name__)
+
+# Characters per streamed chunk (roughly one token)
+_CHUNK_CHARS = 4
+# Streamed chunks are flushed in groups at this interval to keep sleeps coarse
+_FLUSH_INTERVAL = 0.01
+
+_MISS_COMPLETION = json.dumps({
+    "needs_context": [],
+    "is_followup": False,
+    "intent": "question",
+    "commands": [],
+    "response": "I don't have a recording for that.",
+    "update_context": False,
+    "expecting_followup": False,
+})
+
+
+class LatencyProfile:
+    """
+    Latency and failure model of the mock provider
+
+    Modes:
+        replay     - reproduce each exchange's recorded latency
+        fixed      - time to first token is always ttft_ms
+        lognormal  - time to first token drawn around ttft_ms with spread sigma
+
+    Generation then proceeds at tokens_per_sec. A fraction of requests fail
+    with 429 (rate_limit_rate, with retry_after) or 500 (error_rate).
+    """
+
+    def __init__(
+        self,
+        mode: str = "replay",
+        ttft_ms: float = 300.0,
+        sigma: float = 0.5,
+        tokens_per_sec: float = 400.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None
+    ):
+        if mode not in ("replay", "fixed", "lognormal"):
+            raise ValueError(f"Unknown latency mode: {mode}")
+        self.mode = mode
+        self.ttft_ms = ttft_ms
+        self.sigma = sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+
+    def first_token_delay(self, entry: Optional[Dict[str, Any]], completion_tokens: int) -> float:
+        """Seconds before the first token is sent"""
+        if self.mode == "replay" and entry and entry.get("latency_ms"):
+            generation_ms = completion_tokens / self.tokens_per_sec * 1000
+            return max(entry["latency_ms"] - generation_ms, 0.0) / 1000
+        if self.mode == "lognormal":
+            return self.rng.lognormvariate(math.log(max(self.ttft_ms, 1.0)), self.sigma) / 1000
+        return self.ttft_ms / 1000
+
+    def draw_error(self) -> Optional[int]:
+        """HTTP status to fail this request with, if any"""
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+
+class MockLLMServer:
+    """
+    OpenAI-compatible /chat/completions backed by a cassette
+
+    Serves both plain and streamed (SSE) completions, including the final
+    usage chunk when stream_options.include_usage is set. Requests without
+    a recording get a short question-intent reply and are counted as misses.
+    Runs in-process on uvicorn so a benchmark can start and stop it around
+    a run.
+    """
+
+    def __init__(self, cassette: Cassette, profile: Optional[LatencyProfile] = None, host: str = "127.0.0.1", port: int = 0):
+        self.cassette = cassette
+        self.profile = profile or LatencyProfile()
+        self.host = host
+        self.port = port or self._free_port(host)
+        self.app = self._create_app()
+        self._server = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.requests = 0
+        self.streamed = 0
+        self.injected_errors: Dict[int, int] = {}
+
+    @property
+    def url(self) -> str:
+        """Chat completions endpoint (use as GROQ_BASE_URL)"""
+        return f"http://{self.host}:{self.port}/openai/v1/chat/completions"
+
+    @staticmethod
+    def _free_port(host: str) -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind((host, 0))
+            return sock.getsockname()[1]
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="Aiden mock LLM")
+
+        @app.post("/openai/v1/chat/completions")
+        @app.post("/v1/chat/completions")
+        @app.post("/chat/completions")
+        async def chat_completions(request: Request):
+            return await self._handle(await request.json())
+
+        return app
+
+    async def _handle(self, payload: Dict[str, Any]):
+        self.requests += 1
+        messages = payload.get("messages", [])
+        model = payload.get("model", "mock")
+
+        status = self.profile.draw_error()
+        if status:
+            self.injected_errors[status] = self.injected_errors.get(status, 0) + 1
+            await asyncio.sleep(self.profile.first_token_delay(None, 0) / 4)
+            headers = {"retry-after": str(self.profile.retry_after)} if status == 429 else {}
+            return JSONResponse(
+                {"error": {"message": f"Injected {status}", "type": "mock_error"}},
+                status_code=status,
+                headers=headers
+            )
+
+        entry = self.cassette.match(messages)
+        completion = entry["completion"] if entry else _MISS_COMPLETION
+        usage = {k: v for k, v in (entry.get("usage") or {}).items() if v is not None} if entry else {}
+        usage.setdefault("prompt_tokens", estimate_message_tokens(messages))
+        usage.setdefault("completion_tokens", estimate_tokens(completion))
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        delay = self.profile.first_token_delay(entry, usage["completion_tokens"])
+
+        if payload.get("stream"):
+            self.streamed += 1
+            include_usage = (payload.get("stream_options") or {}).get("include_usage", False)
+            return StreamingResponse(
+                self._stream(model, completion, usage, include_usage, delay),
+                media_type="text/event-stream"
+            )
+
+        await asyncio.sleep(delay + usage["completion_tokens"] / self.profile.tokens_per_sec)
+        return JSONResponse({
+            "id": f"mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": completion},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    async def _stream(self, model: str, completion: str, usage: Dict[str, Any], include_usage: bool, delay: float):
+        """SSE body: content deltas paced at tokens_per_sec, then usage and [DONE]"""
+        base = {"id": f"mock-{self.requests}", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        await asyncio.sleep(delay)
+
+        pieces = [completion[i:i + _CHUNK_CHARS] for i in range(0, len(completion), _CHUNK_CHARS)]
+        generation = usage["completion_tokens"] / self.profile.tokens_per_sec
+        flushes = max(1, min(len(pieces), int(generation / _FLUSH_INTERVAL)))
+        per_flush = math.ceil(len(pieces) / flushes) if pieces else 1
+        for start in range(0, len(pieces), per_flush):
+            for piece in pieces[start:start + per_flush]:
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(generation / flushes)
+
+        final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if include_usage:
+            final["usage"] = usage
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def start(self):
+        """Start serving in the background of the current event loop"""
+        import uvicorn
+
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()  # Surface startup errors
+            await asyncio.sleep(0.01)
+        logger.info(f"🧪 Mock LLM server listening on {self.url}")
+
+    async def stop(self):
+        """Stop serving"""
+        if self._server:
+            self._server.should_exit = True
+        if self._task:
+            await self._task
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, replay and error-injection statistics"""
+        return {
+            "requests": self.requests,
+            "streamed": self.streamed,
+            "cassette_hits": self.cassette.hits,
+            "cassette_misses": self.cassette.misses,
+            "injected_errors": dict(self.injected_errors),
+        }
@@ -0,0 +1,190 @@
+"""
+STT Backend Comparison
+Measures endpoint-to-transcript latency and word error rate of the google and vosk backends on recorded utterances
+
+Usage:
+    python -m src.bench.stt_compare --dataset recordings/
+    python -m src.bench.stt_compare --dataset recordings/ --backends vosk --output logs/stt_compare.json
+
+The dataset is a directory of WAV files, each with a reference transcript
+in a .txt file of the same name (hello.wav + hello.txt).
+"""
+import argparse
+import json
+import os
+import re
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import speech_recognition as sr
+
+from src.bench.runner import _OFFLINE_ENV, _summary
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def word_errors(reference: str, hypothesis: str) -> Tuple[int, int]:
+    """(substitutions + deletions + insertions, reference word count)"""
+    ref, hyp = _words(reference), _words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1], len(ref)
+
+
+def load_dataset(path: str) -> List[Tuple[str, str]]:
+    """(wav path, reference transcript) of every WAV with a transcript"""
+    samples = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(".wav"):
+            continue
+        wav = os.path.join(path, name)
+        transcript = os.path.splitext(wav)[0] + ".txt"
+        if not os.path.exists(transcript):
+            logger.warning(f"No transcript for {name} - skipped")
+            continue
+        with open(transcript, "r", encoding="utf-8") as f:
+            samples.append((wav, f.read().strip()))
+    return samples
+
+
+def _recognize_google(engine: Any, audio: "sr.AudioData") -> Tuple[str, float, float]:
+    """Whole utterance to the web API once it has ended, as the google backend does"""
+    start = time.perf_counter()
+    success, text, _ = engine._recognize(audio)
+    latency = (time.perf_counter() - start) * 1000
+    return (text or "") if success else "", latency, latency
+
+
+def _recognize_vosk(engine: Any, audio: "sr.AudioData") -> Tuple[str, float, float]:
+    """
+    Feed 100 ms blocks as the microphone would, then finalize
+
+    Live, the blocks are decoded while the user is speaking, so only the
+    final call is endpoint latency; the decode time of the blocks is
+    returned separately to check the recognizer keeps up with real time.
+    """
+    from src.speech.stt import _BLOCK, _RATE, vosk
+
+    raw = audio.get_raw_data(convert_rate=_RATE, convert_width=2)
+    recognizer = vosk.KaldiRecognizer(engine._vosk_model, _RATE)
+    segments: List[str] = []
+
+    start = time.perf_counter()
+    for offset in range(0, len(raw), _BLOCK * 2):
+        if recognizer.AcceptWaveform(raw[offset:offset + _BLOCK * 2]):
+            segments.append(json.loads(recognizer.Result()).get("text", ""))
+    streamed_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    success, text, _ = engine._recognize_vosk(recognizer, segments)
+    latency = (time.perf_counter() - start) * 1000
+    return (text or "") if success else "", latency, streamed_ms
+
+
+def run_comparison(samples: List[Tuple[str, str]], backends: List[str]) -> Dict[str, Any]:
+    """
+    Transcribe every sample with every backend
+
+    Args:
+        samples: (wav path, reference transcript) pairs
+        backends: Backends to compare ("google", "vosk")
+
+    Returns:
+        Latency summary and corpus WER per backend, plus per-sample results
+    """
+    for key, value in _OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+
+    from src.speech.stt import STTEngine
+    engine = STTEngine()
+    recognizers = {"google": _recognize_google, "vosk": _recognize_vosk}
+    if "vosk" in backends and not engine._load_vosk_model():
+        logger.warning("Vosk model unavailable - comparing google only")
+        backends = [b for b in backends if b != "vosk"]
+
+    results: Dict[str, List[Dict[str, Any]]] = {backend: [] for backend in backends}
+    for wav, reference in samples:
+        with sr.AudioFile(wav) as source:
+            audio = engine.recognizer.record(source)
+        duration_ms = len(audio.frame_data) / (audio.sample_rate * audio.sample_width) * 1000
+
+        for backend in backends:
+            try:
+                text, latency_ms, decode_ms = recognizers[backend](engine, audio)
+            except Exception as e:
+                logger.error(f"{backend} failed on {os.path.basename(wav)}: {e}")
+                text, latency_ms, decode_ms = "", None, None
+            errors, words = word_errors(reference, text)
+            results[backend].append({
+                "file": os.path.basename(wav),
+                "reference": reference,
+                "hypothesis": text,
+                "latency_ms": latency_ms,
+                "real_time_factor": decode_ms / duration_ms if decode_ms is not None and duration_ms else None,
+                "errors": errors,
+                "words": words,
+            })
+
+    report = {}
+    for backend, rows in results.items():
+        words = sum(r["words"] for r in rows)
+        report[backend] = {
+            "samples": len(rows),
+            "latency": _summary([r["latency_ms"] for r in rows if r["latency_ms"] is not None]),
+            "wer": sum(r["errors"] for r in rows) / max(words, 1),
+            "max_real_time_factor": max((r["real_time_factor"] for r in rows if r["real_time_factor"] is not None), default=None),
+            "per_sample": rows,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare STT backends on recorded utterances")
+    parser.add_argument("--dataset", required=True, help="Directory of WAV files with same-name .txt transcripts")
+    parser.add_argument("--backends", nargs="+", choices=["google", "vosk"], default=["google", "vosk"])
+    parser.add_argument("--output", help="Write the full JSON report here")
+    args = parser.parse_args()
+
+    samples = load_dataset(args.dataset)
+    if not samples:
+        parser.error("No WAV files with transcripts in the dataset")
+
+    report = run_comparison(samples, args.backends)
+
+    def fmt(value: Optional[float]) -> str:
+        return f"{value:8.1f}" if value is not None else "     n/a"
+
+    print(f"\nSamples: {len(samples)}")
+    print(f"{'':10}{'p50':>8}{'p95':>8}{'mean':>8}{'WER %':>8}{'RTF':>8}")
+    for backend, row in report.items():
+        latency = row["latency"]
+        rtf = row["max_real_time_factor"]
+        print(
+            f"{backend:10}{fmt(latency['p50_ms'])}{fmt(latency['p95_ms'])}{fmt(latency['mean_ms'])}"
+            f"{fmt(row['wer'] * 100)}{f'{rtf:8.2f}' if rtf is not None else '     n/a'}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nFull report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
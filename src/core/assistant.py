@@ -4,20 +4,116 @@ Coordinates all components for intelligent voice interaction
 """
 import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Optional, Dict, Any, List, Tuple
 
-from src.ai.groq_client import get_groq_client
+from src.ai.compact_protocol import PROTOCOL_JSON, get_protocol_metrics
 from src.ai.gemini_client import get_gemini_client
+from src.ai.hedging import HedgedLLMClient
+from src.ai.model_tiers import get_model_tier_router
+from src.ai.openai_compatible import get_key_pool_stats, get_openai_client
+from src.ai.provider_router import ProviderRouter
+from src.ai.rate_limiter import Priority, get_rate_limiter_stats
+from src.ai.response_decoder import get_response_decoder
+from src.ai.response_cache import get_response_cache, hash_context
 from src.core.context_manager import get_context_manager
+from src.core.context_predictor import get_context_predictor
+from src.core.intent_router import get_intent_router
+from src.core.intent_classifier import get_intent_classifier
+from src.core.memory_index import get_memory_index
+from src.core.partial_speculation import SpeculativePass1, context_key, get_partial_speculator
+from src.core.prompt_profiles import get_prompt_profile_stats
 from src.execution.command_executor import get_command_executor
+from src.execution.streaming_dispatch import StreamingDispatcher, get_streaming_dispatch_stats
+from src.smart_home.feedback_phrases import get_feedback_phraser
 from src.speech.stt import get_stt_engine
 from src.speech.tts import get_tts_engine
 from src.utils.config import get_settings
+from src.utils.http_transport import get_http_transport
+from src.utils.latency import get_latency_tracker
+from src.utils.prompt_registry import get_prompt_registry
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class EarlySpeech:
+    """
+    Starts TTS as soon as a streamed LLM response is known to be final
+    
+    The "response" field is spoken the moment it completes, while the rest of
+    the JSON (commands, flags) is still being generated. On Pass 1 the response
+    is only final once needs_context is known to be empty, otherwise Pass 2
+    will replace it. A speculative Pass 2 is held until Pass 1 confirms that
+    context was actually needed. Streamed command elements go to a
+    StreamingDispatcher, which is released under the same rules. A
+    response that changes after speech started (a hedged request won by
+    the other provider) is spoken once the first one has finished.
+    """
+    
+    def __init__(self, assistant: "AidenAssistant", final: bool, hold: bool = False):
+        self.assistant = assistant
+        self.final = final
+        self.hold = hold
+        self.task: Optional[asyncio.Task] = None
+        self.text: Optional[str] = None
+        self._response: Optional[str] = None
+        self.dispatcher: Optional[StreamingDispatcher] = None
+        if assistant.settings.app.enable_streaming_dispatch:
+            self.dispatcher = StreamingDispatcher(assistant.executor)
+    
+    @property
+    def acted(self) -> bool:
+        """Whether this pass has started speaking or executing commands"""
+        return self.task is not None or bool(self.dispatcher and self.dispatcher.dispatched)
+    
+    def on_field(self, key: str, value):
+        """Field callback passed to the LLM client"""
+        if key == "commands[]":
+            if self.dispatcher is not None:
+                self.dispatcher.add(value)
+            return
+        if key == "response" and isinstance(value, str):
+            self._response = value
+        elif key == "needs_context" and not value:
+            self.final = True
+        else:
+            return
+        self._maybe_start()
+    
+    def confirm(self):
+        """Release a held speculative pass - its response is the final one"""
+        self.final = True
+        self.release()
+    
+    def release(self):
+        """Release a held pass without changing whether it is final"""
+        self.hold = False
+        self._maybe_start()
+    
+    def _maybe_start(self):
+        if self.final and not self.hold and self.dispatcher is not None:
+            self.dispatcher.start()
+        if self.final and not self.hold and self._response and self.task is None:
+            logger.info("🔊 Response field complete - starting speech early")
+            self.text = self._response
+            self.task = asyncio.create_task(self.assistant._speak_async(self._response))
+        elif self.task is not None and self._response != self.text:
+            logger.info("🔊 Response changed while speaking - speaking the new one next")
+            self.text = self._response
+            self.task = asyncio.create_task(self._speak_after(self.task, self._response))
+    
+    async def _speak_after(self, previous: asyncio.Task, text: str):
+        await asyncio.wait({previous})
+        await self.assistant._speak_async(text)
+    
+    def task_for(self, text: str) -> Optional[asyncio.Task]:
+        """Return the speech task if it is already speaking this exact text"""
+        if self.task is not None and self.text == text:
+            return self.task
+        return None
+
+
 class AidenAssistant:
     """
     Main assistant orchestrator
@@ -30,6 +126,15 @@ class AidenAssistant:
         
         # Core components (non-async)
         self.context_manager = get_context_manager()
+        self.intent_router = get_intent_router()
+        self.intent_classifier = get_intent_classifier()
+        self.protocol_metrics = get_protocol_metrics()
+        self.prompt_profile_stats = get_prompt_profile_stats()
+        self.tier_router = get_model_tier_router()
+        self.context_predictor = get_context_predictor()
+        self.partial_speculator = get_partial_speculator()
+        self.response_cache = get_response_cache()
+        self.feedback_phraser = get_feedback_phraser()
         self.executor = get_command_executor()
         self.stt = get_stt_engine()
         self.tts = get_tts_engine()
@@ -45,14 +150,84 @@ class AidenAssistant:
     async def _ensure_llm_client(self):
         """Lazy initialize LLM client based on provider setting"""
         if self.llm_client is None:
-            if self.settings.app.llm_provider == "gemini":
-                logger.info("Initializing Google Gemini client...")
-                self.llm_client = await get_gemini_client()
-            else:  # groq
-                logger.info("Initializing Groq client...")
-                self.llm_client = await get_groq_client()
+            if self.settings.app.llm_provider == "auto":
+                clients = {}
+                for name in self.settings.app.openai_provider_names():
+                    if self.settings.provider(name).keys():
+                        clients[name] = await get_openai_client(name)
+                if self.settings.gemini.api_key:
+                    clients["gemini"] = await get_gemini_client()
+                logger.info(f"Initializing provider router over {list(clients)}...")
+                self.llm_client = ProviderRouter(clients)
+            elif self.settings.app.llm_hedging:
+                primary = self.settings.app.llm_provider
+                secondary = "groq" if primary == "gemini" else "gemini"
+                logger.info(f"Initializing hedged LLM client ({primary} -> {secondary})...")
+                self.llm_client = HedgedLLMClient(
+                    await self._provider_client(primary), await self._provider_client(secondary), primary, secondary
+                )
+            else:
+                logger.info(f"Initializing {self.settings.app.llm_provider.title()} client...")
+                self.llm_client = await self._provider_client(self.settings.app.llm_provider)
         return self.llm_client
     
+    @staticmethod
+    async def _provider_client(name: str):
+        """Client of one provider by name (gemini or an OpenAI-compatible backend)"""
+        if name == "gemini":
+            return await get_gemini_client()
+        return await get_openai_client(name)
+    
+    async def _listen(self) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Transcribe one utterance, speculating on its stable partials"""
+        if not self.settings.app.enable_partial_speculation:
+            return await self.stt.transcribe(play_activation_sound=True)
+        self.partial_speculator.begin_utterance()
+        result = await self.stt.transcribe(play_activation_sound=True, on_partial=self._on_stable_partial)
+        if not result[0]:
+            await self.partial_speculator.abandon()
+        return result
+    
+    def _on_stable_partial(self, text: str):
+        """STT callback (on the event loop) for a partial transcript that stopped changing"""
+        if self.partial_speculator.wants(text):
+            asyncio.create_task(self._speculate_pass1(text))
+    
+    async def _speculate_pass1(self, text: str):
+        """Start Pass 1 on a partial transcript with its speech held"""
+        try:
+            # Start the conversation while the user is still speaking
+            if not self.context_manager.current_conversation_id:
+                await self.context_manager.start_conversation(mode="voice")
+            context = await self.context_manager.get_context()
+            if self.settings.app.enable_fast_path and self.intent_router.can_route(text, context):
+                return  # Answered locally anyway
+            
+            llm = await self._ensure_llm_client()
+            protocol = self.protocol_metrics.choose()
+            tier = self.tier_router.estimate(text, context)[0] if self.settings.app.enable_model_tiers else None
+            messages = await self.context_manager.build_messages(
+                text, context, needs_context=None, protocol=protocol,
+                profile=self.settings.app.pass1_prompt_profile
+            )
+            budget = self.context_manager.last_budget
+            max_tokens = self.settings.app.pass1_max_tokens if budget.get("profile") == "slim" else None
+            speech = EarlySpeech(self, final=False, hold=True)
+            await self.partial_speculator.start(
+                {
+                    "text": text,
+                    "context": context_key(context),
+                    "protocol": protocol,
+                    "tier": tier,
+                    "budget": budget,
+                    "max_tokens": max_tokens,
+                    "speech": speech,
+                },
+                self._chat(llm, messages, speech, Priority.VOICE, tier, context, max_tokens)
+            )
+        except Exception as e:
+            logger.debug(f"Speculative Pass 1 not started (non-critical): {e}")
+    
     async def _auto_listen_for_followup(self):
         """
         Automatically listen for follow-up response without wake word
@@ -65,7 +240,7 @@ class AidenAssistant:
             await asyncio.sleep(0.3)
             
             # Listen for user response (activation sound plays automatically)
-            success, user_text, error = await self.stt.transcribe(play_activation_sound=True)
+            success, user_text, error = await self._listen()
             
             if not success:
                 if error == "timeout":
@@ -133,30 +308,19 @@ class AidenAssistant:
         try:
             llm = await self._ensure_llm_client()
             
-            # Load enhancement prompt from prompts.yaml
-            from pathlib import Path
-            import yaml
-            
             enhancement_prompt = "You are a voice assistant. Convert device responses to natural speech."
             try:
-                prompts_file = Path("config/prompts.yaml")
-                if prompts_file.exists():
-                    with open(prompts_file, 'r', encoding='utf-8') as f:
-                        prompts = yaml.safe_load(f)
-                        enhancement_template = prompts.get("enhancement_prompt", "")
-                        if enhancement_template:
-                            # Fill in the template
-                            enhancement_prompt = enhancement_template.format(
-                                user_request=user_text,
-                                device_response=esp32_feedback
-                            )
+                template = get_prompt_registry().get("enhancement_prompt")
+                if template:
+                    enhancement_prompt = template.render(
+                        user_request=user_text,
+                        device_response=esp32_feedback
+                    )
             except Exception as e:
-                logger.warning(f"Could not load enhancement_prompt from prompts.yaml: {e}")
+                logger.warning(f"Could not render enhancement_prompt: {e}")
             
-            # Build messages for AI - use direct API call instead of chat()
+            # Build messages for AI - use complete_text() instead of chat()
             # because chat() forces JSON response format which we don't need here
-            import httpx
-            
             enhancement_messages = [
                 {
                     "role": "system",
@@ -168,29 +332,17 @@ class AidenAssistant:
                 }
             ]
             
-            # Make direct API call without JSON format requirement
-            payload = {
-                "model": self.settings.groq.model,
-                "messages": enhancement_messages,
-                "temperature": 0.3,
-                "max_tokens": 50,
-                # NO response_format - we want plain text response
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {self.settings.groq.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                enhanced = result["choices"][0]["message"]["content"].strip()
+            # Plain-text completion on the configured provider(s): no JSON format needed.
+            # Deferrable work - give way to live turns, and give up rather than queue for long
+            enhanced = await llm.complete_text(
+                enhancement_messages,
+                max_tokens=50,
+                temperature=0.3,
+                priority=Priority.BACKGROUND,
+                wait=2.0
+            )
+            if not enhanced:
+                return None
             
             # Clean up any quotes or extra formatting
             enhanced = enhanced.strip('"\'')
@@ -226,7 +378,7 @@ class AidenAssistant:
             
             # Step 1: Listen IMMEDIATELY (activation sound plays inside transcribe)
             # Don't wait for anything - just start listening!
-            success, user_text, error = await self.stt.transcribe(play_activation_sound=True)
+            success, user_text, error = await self._listen()
             
             # Start conversation in background while user was speaking
             if not self.context_manager.current_conversation_id:
@@ -292,7 +444,7 @@ class AidenAssistant:
             logger.info(f"TEXT MESSAGE: {text}")
             
             # Process with AI
-            response = await self._process_user_message(text)
+            response = await self._process_user_message(text, priority=Priority.TEXT)
             
             return response
             
@@ -300,14 +452,265 @@ class AidenAssistant:
             logger.error(f"Error handling text message: {e}", exc_info=True)
             return "Sorry, something went wrong."
     
-    async def _process_user_message(self, user_text: str) -> str:
+    async def _query_llm(
+        self,
+        user_text: str,
+        context: Dict[str, Any],
+        priority: Priority = Priority.VOICE,
+        speculation: Optional[SpeculativePass1] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[EarlySpeech]]:
         """
-        Core message processing logic with 2-pass AI system:
+        Run the 2-pass AI system:
         Pass 1: AI decides what context it needs
         Pass 2: AI gets the context and responds
         
+        When the context predictor expects Pass 1 to ask for context, Pass 2
+        is issued speculatively alongside Pass 1 (or instead of it, when the
+        prediction is confident enough) and cancelled on a misprediction.
+        
+        The output protocol (full JSON or compact) is chosen per turn and
+        its token and latency outcome recorded for the A/B comparison. The
+        model tier is picked from the turn's estimated complexity.
+        
+        A Pass 1 already started on the partial transcript is used instead
+        of a new one when it was sent for the same tier.
+        
         Args:
             user_text: User's message
+            context: Conversation context
+            priority: Rate limiter priority class of the turn
+            speculation: Speculative Pass 1 matching this transcript, if any
+            
+        Returns:
+            Tuple of (AI response or None, early speech tracker of the final pass)
+        """
+        usage_log: List[Dict[str, Any]] = []
+        protocol = speculation.protocol if speculation else self.protocol_metrics.choose()
+        tier = None
+        if self.settings.app.enable_model_tiers:
+            tier, score = self.tier_router.estimate(user_text, context)
+            logger.info(f"🪜 Complexity {score} - starting on model tier {tier}")
+        if speculation is not None:
+            if speculation.tier == tier:
+                self.partial_speculator.commit(speculation)
+            else:
+                await self.partial_speculator.reject(speculation, "tier_changed")
+                speculation = None
+                protocol = self.protocol_metrics.choose()
+        start = time.perf_counter()
+        ai_response, early_speech = await self._run_passes(
+            user_text, context, usage_log, priority, protocol, tier, speculation
+        )
+        
+        # Per-pass token accounting, saved with the assistant message
+        if ai_response and usage_log:
+            ai_response["usage"] = {
+                "prompt_tokens": sum(entry.get("prompt_tokens", 0) for entry in usage_log),
+                "completion_tokens": sum(entry.get("completion_tokens", 0) for entry in usage_log),
+                "protocol": protocol,
+                "tier": tier,
+                "passes": usage_log,
+            }
+        if ai_response and tier is not None:
+            self.tier_router.record(context.get("conversation_id"), ai_response.get("intent"))
+        self.protocol_metrics.record(protocol, ai_response, (time.perf_counter() - start) * 1000)
+        return ai_response, early_speech
+    
+    async def _run_passes(
+        self,
+        user_text: str,
+        context: Dict[str, Any],
+        usage_log: List[Dict[str, Any]],
+        priority: Priority,
+        protocol: str = PROTOCOL_JSON,
+        tier: Optional[int] = None,
+        speculation: Optional[SpeculativePass1] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[EarlySpeech]]:
+        """Pass 1 / Pass 2 orchestration behind _query_llm"""
+        llm = await self._ensure_llm_client()
+        
+        def chat(messages, speech: EarlySpeech, max_tokens: Optional[int] = None):
+            return self._chat(llm, messages, speech, priority, tier, context, max_tokens)
+        
+        predicted, confidence = [], 0.0
+        if self.settings.app.enable_context_prediction:
+            predicted, confidence = self.context_predictor.predict(user_text, context)
+        
+        # Confident prediction: go straight to Pass 2 (a sample still runs Pass 1 alongside)
+        skip = predicted and confidence >= self.settings.app.context_skip_pass1_confidence
+        if skip and self.context_predictor.should_verify(self.settings.app.context_skip_verify_rate):
+            logger.info(f"🔮 Predicted {predicted} ({confidence:.0%}) - verifying with Pass 1")
+            skip = False
+        if skip:
+            logger.info(f"🔮 Predicted {predicted} ({confidence:.0%}) - skipping Pass 1")
+            messages = await self.context_manager.build_messages(user_text, context, needs_context=predicted, protocol=protocol)
+            budget = self.context_manager.last_budget
+            early_speech = EarlySpeech(self, final=True)
+            ai_response = await chat(messages, early_speech)
+            self._log_pass(usage_log, "pass2_direct", ai_response, budget)
+            if ai_response:
+                self.context_predictor.record_skip()
+                ai_response["context_used"] = predicted
+                return ai_response, early_speech
+            logger.warning("Speculative Pass 2 failed, falling back to 2-pass flow")
+        
+        # Less confident prediction: run Pass 2 concurrently with Pass 1
+        speculative = None
+        speculative_speech = None
+        if predicted:
+            logger.info(f"🔮 Predicted {predicted} ({confidence:.0%}) - starting Pass 2 speculatively")
+            messages_spec = await self.context_manager.build_messages(user_text, context, needs_context=predicted, protocol=protocol)
+            speculative_budget = self.context_manager.last_budget
+            speculative_speech = EarlySpeech(self, final=True, hold=True)
+            speculative = asyncio.create_task(chat(messages_spec, speculative_speech))
+        
+        # PASS 1: Ask AI what context it needs (lightweight, no system context,
+        # optionally with the slim prompt and a low completion limit)
+        if speculation is not None:
+            # Already sent while the user was finishing the utterance
+            logger.info("🧠 Pass 1: using the speculative request...")
+            budget = speculation.budget
+            max_tokens = speculation.max_tokens
+            early_speech = speculation.speech
+            early_speech.release()
+            ai_response_pass1 = await speculation.task
+        else:
+            logger.info("🧠 Pass 1: AI analyzing request...")
+            profile = self.settings.app.pass1_prompt_profile
+            messages_pass1 = await self.context_manager.build_messages(
+                user_text, context, needs_context=None, protocol=protocol, profile=profile
+            )
+            budget = self.context_manager.last_budget
+            max_tokens = self.settings.app.pass1_max_tokens if budget.get("profile") == "slim" else None
+            early_speech = EarlySpeech(self, final=False)
+            ai_response_pass1 = await chat(messages_pass1, early_speech, max_tokens)
+        slim = budget.get("profile") == "slim"
+        self._log_pass(usage_log, "pass1", ai_response_pass1, budget)
+        self.prompt_profile_stats.record_pass1(
+            budget.get("profile", "full"),
+            ai_response_pass1.get("usage") if ai_response_pass1 else None,
+            budget.get("prompt_tokens_saved", 0)
+        )
+        
+        # A slim Pass 1 that was cut off before anything was spoken or run, or gave no
+        # usable reply, is redone as a full-prompt Pass 2
+        escalate = slim and not early_speech.acted and (
+            not HedgedLLMClient.is_valid(ai_response_pass1)
+            or (ai_response_pass1.get("usage") or {}).get("completion_tokens", 0) >= max_tokens
+        )
+        if escalate:
+            logger.info("🧠 Slim Pass 1 insufficient - escalating to the full prompt")
+        
+        if not ai_response_pass1 and not escalate:
+            logger.error(f"Empty response from {self.settings.app.llm_provider.upper()} AI (Pass 1)")
+            await self._cancel_speculative(speculative)
+            return None, None
+        
+        # Check if AI needs additional context
+        needs_context = ai_response_pass1.get("needs_context", []) if ai_response_pass1 else []
+        if ai_response_pass1:
+            self.context_predictor.record(user_text, predicted, needs_context, speculated=speculative is not None)
+        
+        if not needs_context and not escalate:
+            # No additional context needed, use Pass 1 response
+            logger.info("✅ No additional context needed")
+            await self._cancel_speculative(speculative)
+            return ai_response_pass1, early_speech
+        
+        # Speculative Pass 2 already has everything Pass 1 asked for
+        if speculative is not None and set(needs_context) <= set(predicted):
+            ai_response = await speculative
+            self._log_pass(usage_log, "pass2_speculative", ai_response, speculative_budget)
+            if escalate:
+                self.prompt_profile_stats.record_escalation(ai_response.get("usage") if ai_response else None)
+            if ai_response:
+                logger.info("🔮 Speculative Pass 2 confirmed - round trip saved")
+                speculative_speech.confirm()
+                ai_response["context_used"] = predicted
+                return ai_response, speculative_speech
+        else:
+            await self._cancel_speculative(speculative)
+        
+        # PASS 2: Provide requested context and get final response
+        logger.info(f"🧠 Pass 2: Fetching {needs_context} and re-processing...")
+        messages_pass2 = await self.context_manager.build_messages(user_text, context, needs_context=needs_context, protocol=protocol)
+        budget = self.context_manager.last_budget
+        early_speech = EarlySpeech(self, final=True)
+        ai_response = await chat(messages_pass2, early_speech)
+        self._log_pass(usage_log, "pass2", ai_response, budget)
+        if escalate:
+            self.prompt_profile_stats.record_escalation(ai_response.get("usage") if ai_response else None)
+        
+        if not ai_response:
+            # Fallback to Pass 1 response
+            logger.warning("Pass 2 failed, using Pass 1 response")
+            return ai_response_pass1, None
+        
+        # Answers built from live system context must never be replayed from cache
+        ai_response["context_used"] = needs_context
+        return ai_response, early_speech
+    
+    async def _chat(
+        self,
+        llm: Any,
+        messages: List[Dict[str, str]],
+        speech: EarlySpeech,
+        priority: Priority,
+        tier: Optional[int],
+        context: Dict[str, Any],
+        max_tokens: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """One LLM pass, through the tier router when model tiers are on"""
+        if tier is None:
+            return await llm.chat(messages, on_field=speech.on_field, priority=priority, max_tokens=max_tokens)
+        return await self.tier_router.chat(
+            llm, messages, tier,
+            on_field=speech.on_field,
+            priority=priority,
+            max_tokens=max_tokens,
+            conversation_id=context.get("conversation_id"),
+            spoken=lambda: speech.acted
+        )
+    
+    def _log_pass(
+        self,
+        usage_log: List[Dict[str, Any]],
+        name: str,
+        response: Optional[Dict[str, Any]],
+        budget: Dict[str, Any]
+    ):
+        """Record token usage of one LLM call"""
+        if not response:
+            return
+        usage = response.get("usage") or {}
+        usage_log.append({
+            "pass": name,
+            "prompt_tokens": usage.get("prompt_tokens", budget.get("total", 0)),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "source": usage.get("source", "estimate"),
+            "budget": budget,
+        })
+    
+    async def _cancel_speculative(self, task: Optional[asyncio.Task]):
+        """Cancel a mispredicted speculative Pass 2"""
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"Speculative Pass 2 ended with error: {e}")
+    
+    async def _process_user_message(self, user_text: str, priority: Priority = Priority.VOICE) -> str:
+        """
+        Core message processing logic: local fast path first,
+        then the 2-pass AI system (see _query_llm)
+        
+        Args:
+            user_text: User's message
+            priority: Rate limiter priority class (voice turns go first)
             
         Returns:
             Assistant's response text
@@ -316,37 +719,44 @@ class AidenAssistant:
             # Get conversation context
             context = await self.context_manager.get_context()
             
-            # PASS 1: Ask AI what context it needs (lightweight, no system context)
-            logger.info("🧠 Pass 1: AI analyzing request...")
-            messages_pass1 = await self.context_manager.build_messages(user_text, context, needs_context=None)
-            
-            llm = await self._ensure_llm_client()
-            ai_response_pass1 = await llm.chat(messages_pass1)
-            
-            if not ai_response_pass1:
-                logger.error(f"Empty response from {self.settings.app.llm_provider.upper()} AI (Pass 1)")
+            # Pass 1 may already be running on the partial transcript
+            speculation = None
+            if priority == Priority.VOICE:
+                speculation = await self.partial_speculator.take(user_text, context)
+            
+            # Fast path: common commands never need the LLM
+            ai_response = None
+            early_speech = None
+            if self.settings.app.enable_fast_path:
+                ai_response = self.intent_router.route(user_text, context)
+            
+            # Response cache: repeated or near-duplicate utterances in the same context
+            context_hash = hash_context(context)
+            use_cache = self.settings.cache.enable_response_cache
+            if ai_response is None and use_cache:
+                ai_response = self.response_cache.lookup(user_text, context_hash)
+            
+            # Learned classifier: templates the LLM has answered the same way many times
+            if ai_response is None and self.settings.app.enable_intent_classifier:
+                ai_response = self.intent_classifier.predict(user_text, context)
+            
+            if ai_response is not None and speculation is not None:
+                await self.partial_speculator.reject(speculation, "answered_locally")
+            elif ai_response is None:
+                llm_start = time.perf_counter()
+                ai_response, early_speech = await self._query_llm(user_text, context, priority, speculation)
+                llm_ms = (time.perf_counter() - llm_start) * 1000
+                self.intent_router.record_llm_latency(llm_ms)
+                get_latency_tracker().record("llm.turn", llm_ms)
+                if ai_response and use_cache:
+                    self.response_cache.store(user_text, context_hash, ai_response)
+            
+            if not ai_response:
+                logger.error("No AI response for this turn")
                 response_text = "Sorry, I couldn't process that."
                 await self.tts.speak(response_text)
                 return response_text
             
-            # Check if AI needs additional context
-            needs_context = ai_response_pass1.get("needs_context", [])
-            
-            if needs_context:
-                # PASS 2: Provide requested context and get final response
-                logger.info(f"🧠 Pass 2: Fetching {needs_context} and re-processing...")
-                messages_pass2 = await self.context_manager.build_messages(user_text, context, needs_context=needs_context)
-                ai_response = await llm.chat(messages_pass2)
-                
-                if not ai_response:
-                    # Fallback to Pass 1 response
-                    logger.warning("Pass 2 failed, using Pass 1 response")
-                    ai_response = ai_response_pass1
-            else:
-                # No additional context needed, use Pass 1 response
-                logger.info("✅ No additional context needed")
-                ai_response = ai_response_pass1
-            
             # Parse AI response
             intent = ai_response.get("intent", "unknown")
             commands = ai_response.get("commands", [])
@@ -371,14 +781,27 @@ class AidenAssistant:
             # Trust the AI's decision on whether to expect follow-up
             expecting_followup = ai_response.get("expecting_followup", False)
             
+            # Speech may already be running from the streamed response field
+            tts_task = early_speech.task_for(response_text) if early_speech else None
+            
             # Execute commands concurrently if any
             if commands:
                 # Start TTS in background immediately (fire and forget)
                 # But store task if we need to wait for follow-up
-                tts_task = asyncio.create_task(self._speak_async(response_text))
+                if tts_task is None:
+                    tts_task = asyncio.create_task(self._speak_async(response_text))
                 
-                # Execute commands FIRST for instant action
-                execution_results = await self.executor.execute_multiple(commands)
+                # Execute commands FIRST for instant action (safe ones may already be running)
+                dispatcher = early_speech.dispatcher if early_speech else None
+                if dispatcher is not None:
+                    execution_results = await dispatcher.finish(commands)
+                else:
+                    execution_results = await self.executor.execute_multiple(commands)
+                
+                # Launch frequency / recency for ranking system context
+                for result in execution_results:
+                    if result.get("success"):
+                        self.context_manager.context_ranker.record(result.get("command"), result.get("params"))
                 
                 # Check for ESP32 responses and enhance AI response
                 esp32_responses = [r.get("response_data") for r in execution_results if r.get("response_data")]
@@ -386,12 +809,16 @@ class AidenAssistant:
                     esp32_feedback = esp32_responses[0]
                     logger.info(f"📡 ESP32 Response: {esp32_feedback}")
                     
-                    # Ask AI to generate a better response based on ESP32 feedback
-                    enhanced_response = await self._enhance_response_with_feedback(
-                        user_text, 
-                        response_text, 
-                        esp32_feedback
-                    )
+                    # Phrase known device output locally; only unrecognised output goes to the LLM
+                    enhanced_response = self.feedback_phraser.phrase(esp32_feedback)
+                    if enhanced_response:
+                        logger.info(f"✨ Phrased locally: {enhanced_response}")
+                    elif self.settings.app.enable_llm_feedback_fallback:
+                        enhanced_response = await self._enhance_response_with_feedback(
+                            user_text, 
+                            response_text, 
+                            esp32_feedback
+                        )
                     response_text = enhanced_response if enhanced_response else response_text
                 elif esp32_responses and not self.settings.app.enable_enhanced_responses:
                     # Log original ESP32 feedback but skip enhancement
@@ -413,10 +840,10 @@ class AidenAssistant:
             else:
                 # No commands, just respond
                 # Wait for TTS if we're expecting follow-up, otherwise background
+                if tts_task is None:
+                    tts_task = asyncio.create_task(self._speak_async(response_text))
                 if expecting_followup:
-                    await self._speak_async(response_text)  # Wait for TTS
-                else:
-                    asyncio.create_task(self._speak_async(response_text))  # Background
+                    await tts_task  # Wait for TTS
             
             # Update context if needed
             if update_context:
@@ -442,6 +869,31 @@ class AidenAssistant:
             await self.tts.speak(response_text)
             return response_text
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Get latency and routing statistics for the dashboard"""
+        return {
+            "fast_path": self.intent_router.get_stats(),
+            "intent_classifier": self.intent_classifier.get_stats(),
+            "response_cache": self.response_cache.get_stats(),
+            "context_prediction": self.context_predictor.get_stats(),
+            "hedging": self.llm_client.get_stats() if isinstance(self.llm_client, HedgedLLMClient) else None,
+            "provider_router": self.llm_client.get_stats() if isinstance(self.llm_client, ProviderRouter) else None,
+            "latency": get_latency_tracker().get_stats(),
+            "http": get_http_transport().get_stats(),
+            "device_feedback": self.feedback_phraser.get_stats(),
+            "rate_limits": get_rate_limiter_stats(),
+            "key_pools": get_key_pool_stats(),
+            "response_decoding": get_response_decoder().get_stats(),
+            "output_protocol": self.protocol_metrics.get_stats(),
+            "prompt_profiles": self.prompt_profile_stats.get_stats(),
+            "model_tiers": self.tier_router.get_stats(),
+            "summarization": self.context_manager.summarizer.get_stats(),
+            "memory": get_memory_index().get_stats(),
+            "context_ranking": self.context_manager.context_ranker.get_stats(),
+            "partial_speculation": self.partial_speculator.get_stats(),
+            "streaming_dispatch": get_streaming_dispatch_stats(),
+        }
+    
     async def greet_user(self):
         """Greet the user on startup"""
         try:
@@ -11,11 +11,22 @@ from datetime import datetime
 
 from src.database.redis_client import get_redis_client
 from src.database.neon_client import get_db_client
+from src.core.context_ranker import get_context_ranker
+from src.core.memory_index import get_memory_index
+from src.core.prompt_profiles import PROMPT_PROFILES
+from src.core.summarizer import get_summarizer
+from src.core.token_budget import TokenBudget
 from src.utils.config import get_settings
 from src.utils.logger import get_logger
+from src.utils.prompt_registry import get_prompt_registry, DEFAULT_SYSTEM_PROMPT
 
 logger = get_logger(__name__)
 
+# Verbatim history kept in Redis; with summarization on, older turns are
+# folded into the summary long before this cap is reached
+_MAX_HISTORY = 10
+_MAX_HISTORY_SUMMARIZED = 30
+
 
 class ContextManager:
     """
@@ -25,6 +36,13 @@ class ContextManager:
     def __init__(self):
         self.settings = get_settings()
         self.current_conversation_id: Optional[str] = None
+        self.token_budget = TokenBudget(self.settings.app.prompt_token_budget)
+        self.last_budget: Dict[str, Any] = {}
+        self.summarizer = get_summarizer()
+        self.context_ranker = get_context_ranker()
+        # Serializes read-modify-write of Redis contexts (turn updates vs. summary folds)
+        self._context_lock = asyncio.Lock()
+        self._summarizing: set = set()
         
     async def start_conversation(self, user_id: str = "default", mode: str = "voice") -> str:
         """
@@ -93,7 +111,16 @@ class ContextManager:
                 conversation_id=conversation_id,
                 role="assistant",
                 content=ai_response.get("response", ""),
-                metadata={"commands": ai_response.get("commands", [])}
+                metadata={
+                    "commands": ai_response.get("commands", []),
+                    "tokens": ai_response.get("usage"),
+                    # Lets the intent classifier learn only from LLM-decided, context-free turns
+                    "local": bool(ai_response.get("fast_path") or ai_response.get("cached")),
+                    "context_used": ai_response.get("context_used") or [],
+                    # Follow-up answers and the questions that asked for them are not standalone templates
+                    "is_followup": bool(ai_response.get("is_followup")),
+                    "expecting_followup": bool(ai_response.get("expecting_followup"))
+                }
             )
         except Exception as e:
             logger.debug(f"Background message save failed (non-critical): {e}")
@@ -156,39 +183,49 @@ class ContextManager:
             return
         
         try:
-            # Get current context
-            context = await self.get_context(conversation_id)
-            
-            # Update history (keep last 10 messages)
-            context["history"].append({"role": "user", "content": user_message})
-            context["history"].append({"role": "assistant", "content": ai_response.get("response", "")})
-            context["history"] = context["history"][-10:]  # Keep last 10 messages
-            
-            logger.info(f"[CONTEXT] Updated history: now has {len(context['history'])} messages")
-            
-            # Update context fields from AI response
-            context["last_intent"] = ai_response.get("intent")
-            context["expecting_followup"] = ai_response.get("expecting_followup", False)
-            
-            # Extract entities from commands
-            entities = []
-            for cmd in ai_response.get("commands", []):
-                params = cmd.get("params", {})
-                if "name" in params:
-                    entities.append(params["name"])
-                if "target" in params:
-                    entities.append(params["target"])
-            
-            if entities:
-                context["last_entities"] = entities
-            
-            # Update last action
-            if ai_response.get("commands"):
-                context["last_action"] = ai_response["commands"][0].get("type")
+            async with self._context_lock:
+                context = await self.get_context(conversation_id)
+                
+                # Update history (older turns are folded into the summary in the background)
+                max_history = _MAX_HISTORY_SUMMARIZED if self.settings.app.enable_summarization else _MAX_HISTORY
+                context["history"].append({"role": "user", "content": user_message})
+                context["history"].append({"role": "assistant", "content": ai_response.get("response", "")})
+                context["history"] = context["history"][-max_history:]
+                
+                logger.info(f"[CONTEXT] Updated history: now has {len(context['history'])} messages")
+                
+                # Update context fields from AI response
+                context["last_intent"] = ai_response.get("intent")
+                context["expecting_followup"] = ai_response.get("expecting_followup", False)
+                
+                # Extract entities from commands
+                entities = []
+                for cmd in ai_response.get("commands", []):
+                    params = cmd.get("params", {})
+                    if "name" in params:
+                        entities.append(params["name"])
+                    if "target" in params:
+                        entities.append(params["target"])
+                
+                if entities:
+                    context["last_entities"] = entities
+                
+                # Update last action
+                if ai_response.get("commands"):
+                    context["last_action"] = ai_response["commands"][0].get("type")
+                
+                # Save updated context to Redis (fast, blocking)
+                redis = await get_redis_client()
+                await redis.save_context(conversation_id, context)
             
-            # Save updated context to Redis (fast, blocking)
-            redis = await get_redis_client()
-            await redis.save_context(conversation_id, context)
+            # Runs after the reply is already being spoken, so it never delays a turn
+            if (
+                self.settings.app.enable_summarization
+                and conversation_id not in self._summarizing
+                and self.summarizer.split(context)
+            ):
+                self._summarizing.add(conversation_id)
+                asyncio.create_task(self._summarize_in_background(conversation_id, context))
             
             # Save to database in background (non-blocking)
             asyncio.create_task(self._save_messages_to_db(
@@ -202,6 +239,29 @@ class ContextManager:
         except Exception as e:
             logger.error(f"Error updating context: {e}")
     
+    async def _summarize_in_background(self, conversation_id: str, context: Dict[str, Any]):
+        """Fold the oldest history into the conversation summary (background, non-blocking)"""
+        try:
+            folded = self.summarizer.split(context)
+            summary = await self.summarizer.summarize(context.get("summary", ""), folded)
+            if summary is None:
+                return
+            
+            async with self._context_lock:
+                latest = await self.get_context(conversation_id)
+                # Turns may have been added (or the history trimmed) meanwhile
+                if latest.get("history", [])[:len(folded)] != folded:
+                    logger.debug("History changed under the summarizer - discarding summary")
+                    return
+                latest["summary"] = summary
+                latest["history"] = latest["history"][len(folded):]
+                redis = await get_redis_client()
+                await redis.save_context(conversation_id, latest)
+        except Exception as e:
+            logger.debug(f"Background summarization failed (non-critical): {e}")
+        finally:
+            self._summarizing.discard(conversation_id)
+    
     async def end_conversation(self, conversation_id: Optional[str] = None):
         """
         End conversation and cleanup
@@ -327,7 +387,14 @@ class ContextManager:
         
         return False
     
-    async def build_messages(self, user_text: str, context: Dict[str, Any], needs_context: List[str] = None) -> List[Dict[str, str]]:
+    async def build_messages(
+        self,
+        user_text: str,
+        context: Dict[str, Any],
+        needs_context: List[str] = None,
+        protocol: str = "json",
+        profile: str = "full"
+    ) -> List[Dict[str, str]]:
         """
         Build messages list for AI including context
         
@@ -335,50 +402,61 @@ class ContextManager:
             user_text: User's message
             context: Conversation context
             needs_context: List of context types needed (e.g., ["installed_apps", "running_processes"])
+            protocol: Output protocol the reply should use ("json" or "compact")
+            profile: System prompt profile ("full", or "slim" for Pass 1)
             
         Returns:
             List of message dictionaries for AI
         """
         messages = []
         
-        # Load system prompt from prompts.yaml
-        from pathlib import Path
-        import yaml
-        
-        try:
-            prompts_file = Path("config/prompts.yaml")
-            if prompts_file.exists():
-                with open(prompts_file, 'r', encoding='utf-8') as f:
-                    prompts = yaml.safe_load(f)
-                    system_prompt = prompts.get("system_prompt", "")
-            else:
-                system_prompt = "You are Aiden, an intelligent Windows assistant."
-        except Exception as e:
-            logger.error(f"Error loading prompts.yaml: {e}")
-            system_prompt = "You are Aiden, an intelligent Windows assistant."
+        # System prompt comes from the prompt registry (no disk I/O per turn)
+        registry = get_prompt_registry()
+        system_prompt = registry.get("system_prompt", DEFAULT_SYSTEM_PROMPT)
+        prompt_tokens_saved = 0
+        if profile != "full":
+            slim_prompt = registry.get(PROMPT_PROFILES.get(profile, ""))
+            if slim_prompt is not None:
+                prompt_tokens_saved = system_prompt.tokens - slim_prompt.tokens
+                system_prompt = slim_prompt
+        system_text, system_tokens = system_prompt.text, system_prompt.tokens
+        if protocol == "compact":
+            compact = registry.get("compact_protocol")
+            if compact is not None:
+                system_text += compact.text
+                system_tokens += compact.tokens
         
         # Get system context ONLY if AI requested it via needs_context
-        system_context_str = ""
+        context_lists: Dict[str, List[str]] = {}
+        context_labels: Dict[str, str] = {}
         
         if needs_context:
             logger.info(f"[CONTEXT] AI requested context: {needs_context}")
             try:
                 from src.utils.system_context import get_system_context
                 sys_ctx = get_system_context()
-                ai_context = await sys_ctx.get_ai_context()
-                
-                system_context_str = "\n\n## AVAILABLE SYSTEM RESOURCES\n"
+                ranking = self.settings.app.enable_context_ranking
+                if ranking:
+                    # Every candidate, so the ranker can find the one the user named
+                    ai_context = await sys_ctx.get_ai_context(max_apps=None, max_processes=None)
+                else:
+                    ai_context = await sys_ctx.get_ai_context()
                 
                 if "installed_apps" in needs_context and ai_context.get("installed_apps"):
                     apps_list = ai_context["installed_apps"]
-                    system_context_str += f"Installed Apps ({ai_context['total_apps']} total): "
-                    system_context_str += ", ".join([app.split(" (")[0] for app in apps_list[:20]])
-                    system_context_str += "\n"
+                    if ranking:
+                        context_lists["installed_apps"] = await self.context_ranker.rank(user_text, apps_list)
+                    else:
+                        context_lists["installed_apps"] = [app.split(" (")[0] for app in apps_list[:20]]
+                    context_labels["installed_apps"] = f"Installed Apps ({ai_context['total_apps']} total): "
                 
                 if "running_processes" in needs_context and ai_context.get("running_processes"):
                     procs_list = ai_context["running_processes"]
-                    system_context_str += f"Running Processes ({ai_context['total_processes']} total): "
-                    system_context_str += ", ".join(procs_list[:40])
+                    if ranking:
+                        context_lists["running_processes"] = await self.context_ranker.rank(user_text, procs_list)
+                    else:
+                        context_lists["running_processes"] = procs_list[:40]
+                    context_labels["running_processes"] = f"Running Processes ({ai_context['total_processes']} total): "
                 
                 logger.debug(f"System context provided: {needs_context}")
             
@@ -387,28 +465,62 @@ class ContextManager:
         else:
             logger.debug(f"No system context requested for: {user_text[:50]}...")
         
+        # Add last 10 messages for context (5 exchanges), then fit everything to the token budget
+        # Turns older than the verbatim history live on in the running summary
+        history = context.get("history", [])[-10:]
+        summary = context.get("summary")
+        summary_str = f"\n\n## CONVERSATION SO FAR\n{summary}" if summary else ""
+        memory_str = self._recall(user_text, context)
+        header = "\n\n## AVAILABLE SYSTEM RESOURCES\n" if context_lists else ""
+        history, context_lists, self.last_budget = self.token_budget.fit(
+            system_tokens=system_tokens,
+            user_text=user_text,
+            history=history,
+            context_lists=context_lists,
+            fixed_text=summary_str + memory_str + header + "".join(context_labels.values())
+        )
+        self.last_budget["profile"] = profile if prompt_tokens_saved else "full"
+        self.last_budget["prompt_tokens_saved"] = prompt_tokens_saved
+        
+        system_context_str = header
+        for name, items in context_lists.items():
+            system_context_str += context_labels[name] + ", ".join(items) + "\n"
+        
         # Add system message from prompts.yaml + optional system context
         system_message = {
             "role": "system",
-            "content": system_prompt + system_context_str
+            "content": system_text + summary_str + memory_str + system_context_str.rstrip("\n")
         }
         messages.append(system_message)
         
         # Add conversation history if available
-        history = context.get("history", [])
-        logger.info(f"[CONTEXT] History has {len(history)} messages")
+        logger.info(f"[CONTEXT] History has {len(context.get('history', []))} messages")
         if history:
-            # Add last 10 messages for context (5 exchanges)
-            messages.extend(history[-10:])
-            logger.info(f"[CONTEXT] Added {len(history[-10:])} history messages to AI context")
+            messages.extend(history)
+            logger.info(f"[CONTEXT] Added {len(history)} history messages to AI context")
+        elif context.get("history"):
+            logger.info("[CONTEXT] History dropped to fit the token budget")
         else:
             logger.warning(f"[CONTEXT] No conversation history found for conversation {context.get('conversation_id')}")
         
         # Add current user message
         messages.append({"role": "user", "content": user_text})
         
-        logger.info(f"[CONTEXT] Total messages being sent to AI: {len(messages)}")
+        logger.info(f"[CONTEXT] Total messages being sent to AI: {len(messages)} (~{self.last_budget['total']} tokens)")
         return messages
+    
+    def _recall(self, user_text: str, context: Dict[str, Any]) -> str:
+        """Relevant past exchanges from long-term memory, or "" if none score above the threshold"""
+        if not self.settings.app.enable_memory:
+            return ""
+        try:
+            in_history = tuple(m["content"] for m in context.get("history", []) if m.get("role") == "user")
+            memory = get_memory_index()
+            results = memory.search(user_text, exclude=in_history)
+            return f"\n\n## RELEVANT PAST CONVERSATIONS\n{memory.format(results)}" if results else ""
+        except Exception as e:
+            logger.debug(f"Memory lookup failed (non-critical): {e}")
+            return ""
 
 
 # Global context manager instance
@@ -0,0 +1,206 @@
+"""
+Context Predictor
+Predicts Pass 1's needs_context decision so Pass 2 can be issued speculatively
+"""
+import random
+import re
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_LAUNCH_VERBS = {"open", "launch", "start", "run"}
+_CLOSE_VERBS = {"close", "kill", "quit", "exit", "end", "terminate", "stop"}
+# Verbs just as often about non-apps ("stop the fan", "start a timer", "end the call")
+_AMBIGUOUS_VERBS = {"start", "run", "stop", "end"}
+_APP_NOUNS = {"app", "application", "program", "exe"}
+_ARTICLES = {"the", "a", "an", "my", "some", "this", "that", "up", "down"}
+_CLAUSE_STARTS = {"turn", "switch", "lock", "shutdown", "shut", "restart", "sleep", "tell", "what", "then"}
+_VAGUE_TARGETS = {"app", "application", "program", "something", "anything", "one", "it", "some app", "an app"}
+_MAX_HISTORY_KEYS = 1000
+# Weight of older Pass 1 decisions per new one, so a target whose answer changed is relearned
+_HISTORY_DECAY = 0.9
+
+
+class ContextPredictor:
+    """
+    Predicts whether Pass 1 will ask for installed_apps / running_processes
+
+    Uses utterance features (launch/close verb, whether the target is a
+    common app, vague targets) and a per-(verb, target) history of the
+    decisions Pass 1 actually made. History overrides the rules once a
+    target has been seen a couple of times, and older decisions decay so
+    recent ones dominate. Confident predictions skip Pass 1, so a sample
+    of them is still verified by Pass 1 to keep the history honest.
+    """
+
+    def __init__(self, min_history: int = 2):
+        self.min_history = min_history
+        # (verb, target) -> {"seen": n, "total": decayed n, "needed": decayed n, "context": [...]}
+        self._history: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        # Stats
+        self.true_positives = 0
+        self.false_positives = 0
+        self.true_negatives = 0
+        self.false_negatives = 0
+        self.pass1_skipped = 0
+        self.pass1_verified = 0
+        self.overlapped = 0
+        self.wasted_requests = 0
+
+    def _known_apps(self) -> set:
+        """Apps the prompt treats as common (no context needed)"""
+        try:
+            from src.core.intent_router import get_intent_router
+            return get_intent_router().known_apps
+        except Exception:
+            return set()
+
+    def _features(self, user_text: str) -> Tuple[Optional[str], str, str]:
+        """Extract (verb class, target, verb) from an utterance"""
+        words = re.sub(r"[^\w\s]", " ", user_text.lower()).split()
+        for i, word in enumerate(words):
+            if word in _LAUNCH_VERBS or word in _CLOSE_VERBS:
+                verb = "launch" if word in _LAUNCH_VERBS else "close"
+                target_words = []
+                for w in words[i + 1:]:
+                    # Another clause ("... and turn off the fan") is not part of the target
+                    if w in _CLAUSE_STARTS:
+                        break
+                    if w not in _ARTICLES:
+                        target_words.append(w)
+                target = " ".join(target_words).removesuffix(" and")
+                return verb, target, word
+        return None, "", ""
+
+    def predict(self, user_text: str, context: Optional[Dict[str, Any]] = None) -> Tuple[List[str], float]:
+        """
+        Predict the context Pass 1 will request
+
+        Args:
+            user_text: User's message
+            context: Conversation context
+
+        Returns:
+            Tuple of (predicted needs_context list, confidence 0-1)
+        """
+        verb, target, word = self._features(user_text)
+        if verb is None:
+            return [], 0.6
+
+        default_context = ["installed_apps"] if verb == "launch" else ["running_processes"]
+
+        history = self._history.get((verb, target))
+        if history and history["seen"] >= self.min_history:
+            p_needed = history["needed"] / history["total"]
+            if p_needed >= 0.5:
+                return history["context"] or default_context, p_needed
+            return [], 1 - p_needed
+
+        known = self._known_apps()
+        names = [name.removesuffix(" app").removesuffix(" exe") for name in target.split(" and ")]
+        app_like = any(w in _APP_NOUNS for w in target.split()) or (target and all(name in known for name in names))
+        if word in _AMBIGUOUS_VERBS and not app_like:
+            # Pass 1 decides; history takes over if it keeps asking for context
+            return [], 0.6
+
+        if not target or target in _VAGUE_TARGETS:
+            return default_context, 0.8
+
+        if all(name in known for name in names):
+            return [], 0.8
+
+        return default_context, 0.7
+
+    def record(self, user_text: str, predicted: List[str], actual: List[str], speculated: bool = False):
+        """
+        Record what Pass 1 actually decided
+
+        Args:
+            user_text: User's message
+            predicted: Context list that was predicted
+            actual: needs_context returned by Pass 1
+            speculated: Whether a speculative Pass 2 was issued
+        """
+        if predicted and actual:
+            self.true_positives += 1
+            # The speculative Pass 2 is only reused when it carried all the context Pass 1 asked for
+            if speculated and set(actual) <= set(predicted):
+                self.overlapped += 1
+            elif speculated:
+                self.wasted_requests += 1
+        elif predicted:
+            self.false_positives += 1
+            if speculated:
+                self.wasted_requests += 1
+        elif actual:
+            self.false_negatives += 1
+        else:
+            self.true_negatives += 1
+
+        verb, target, _ = self._features(user_text)
+        if verb is None:
+            return
+
+        key = (verb, target)
+        if key not in self._history and len(self._history) >= _MAX_HISTORY_KEYS:
+            self._history.pop(next(iter(self._history)))
+
+        history = self._history.setdefault(key, {"seen": 0, "total": 0.0, "needed": 0.0, "context": []})
+        history["seen"] += 1
+        history["total"] = history["total"] * _HISTORY_DECAY + 1
+        history["needed"] = history["needed"] * _HISTORY_DECAY + (1 if actual else 0)
+        if actual:
+            history["context"] = list(actual)
+
+    def record_skip(self):
+        """Record a turn where Pass 1 was skipped entirely"""
+        self.pass1_skipped += 1
+
+    def should_verify(self, rate: float) -> bool:
+        """
+        Whether a prediction confident enough to skip Pass 1 runs it anyway
+
+        A skipped Pass 1 records nothing, so without sampling a wrong skip
+        would never be unlearned.
+
+        Args:
+            rate: Fraction of confident predictions to verify (0-1)
+        """
+        if random.random() < rate:
+            self.pass1_verified += 1
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prediction statistics"""
+        decided = self.true_positives + self.false_positives + self.true_negatives + self.false_negatives
+        mispredicted = self.false_positives + self.false_negatives
+        return {
+            "predictions": decided,
+            "true_positives": self.true_positives,
+            "false_positives": self.false_positives,
+            "true_negatives": self.true_negatives,
+            "false_negatives": self.false_negatives,
+            "misprediction_rate": (mispredicted / max(decided, 1)) * 100,
+            "pass1_skipped": self.pass1_skipped,
+            "pass1_verified": self.pass1_verified,
+            "pass2_overlapped": self.overlapped,
+            "round_trips_saved": self.pass1_skipped + self.overlapped,
+            "wasted_requests": self.wasted_requests,
+        }
+
+
+# Global instance
+_context_predictor: Optional[ContextPredictor] = None
+
+
+def get_context_predictor() -> ContextPredictor:
+    """Get or create global context predictor"""
+    global _context_predictor
+    if _context_predictor is None:
+        _context_predictor = ContextPredictor()
+    return _context_predictor
@@ -0,0 +1,238 @@
+"""
+System Context Ranker
+Orders installed apps and running processes by relevance to the utterance and fills a token budget
+"""
+import math
+import re
+import time
+import logging
+from datetime import timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.database.neon_client import get_db_client
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.text_similarity import NGramVectorizer
+from src.utils.tokens import estimate_tokens
+
+logger = get_logger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that name the action rather than the target (they would match e.g. "OpenVPN" on "open")
+_STOPWORDS = {
+    "a", "an", "and", "app", "application", "can", "close", "could", "end", "exit", "for", "i", "is",
+    "it", "kill", "launch", "me", "my", "of", "off", "on", "open", "please", "program", "quit", "run",
+    "start", "stop", "the", "to", "up", "you", "would",
+}
+
+# Longest utterance phrase an item name is compared against
+_MAX_WINDOW_WORDS = 3
+
+# Score weights: fuzzy name match dominates, usage breaks ties between near matches
+_MATCH_WEIGHT = 1.0
+_FREQUENCY_WEIGHT = 0.3
+_RECENCY_WEIGHT = 0.2
+_RECENCY_HALF_LIFE_DAYS = 7.0
+
+# Separator cost of each list item (", ")
+_ITEM_OVERHEAD_TOKENS = 1
+
+# Commands whose "name" parameter names an app or process
+_NAME_COMMANDS = {"launch_app", "kill_process"}
+
+
+def _key(name: str) -> str:
+    """'C:\\Program Files\\Spotify\\Spotify.exe' / 'Spotify.exe' / 'spotify' -> 'spotify'"""
+    base = re.split(r"[\\/]", name.strip().strip('"'))[-1].lower()
+    if base.endswith(".exe"):
+        base = base[:-4]
+    return "".join(_WORD.findall(base))
+
+
+def _split(item: str) -> Tuple[str, Optional[str]]:
+    """'Spotify (C:\\...\\Spotify.exe)' -> ('Spotify', 'C:\\...\\Spotify.exe')"""
+    if item.endswith(")") and " (" in item:
+        label, path = item.split(" (", 1)
+        return label, path[:-1]
+    return item, None
+
+
+class ContextRanker:
+    """
+    Picks the system context entries most likely to matter for a turn
+
+    Every candidate gets a score from three signals: the best fuzzy
+    (character n-gram cosine) match between its name or executable and any
+    one to three word phrase of the utterance, how often it was launched or
+    killed according to the command history, and how recently. Candidates
+    are then taken best first until `context_rank_token_budget` is spent,
+    so the model sees "Spotify" when it is asked to open Spotify instead of
+    the first twenty apps of the alphabet, in a shorter prompt.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.vectorizer = NGramVectorizer()
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._usage: Dict[str, List[float]] = {}  # key -> [count, last used (epoch seconds)]
+        self._loaded = False
+
+        # Stats
+        self.ranks = 0
+        self.candidates = 0
+        self.kept = 0
+        self.kept_tokens = 0
+        self.rank_time_ms = 0.0
+
+    async def load(self):
+        """Read launch counts and recency from the command history"""
+        self._loaded = True
+        try:
+            db = await get_db_client()
+            history = await db.get_command_history(limit=self.settings.app.context_rank_history)
+        except Exception as e:
+            logger.debug(f"Command history unavailable for context ranking (non-critical): {e}")
+            return
+        for entry in history:
+            executed = entry.executed_at.replace(tzinfo=timezone.utc).timestamp() if entry.executed_at else None
+            if entry.success:
+                self._observe(entry.command_type, entry.command_data, executed)
+        logger.info(f"📋 Context ranker loaded usage of {len(self._usage)} apps/processes")
+
+    def record(self, command_type: str, params: Dict[str, Any]):
+        """Count a command that just executed successfully"""
+        self._observe(command_type, params, time.time())
+
+    def _observe(self, command_type: str, params: Any, when: Optional[float]):
+        if command_type not in _NAME_COMMANDS or not isinstance(params, dict):
+            return
+        name = params.get("name") or params.get("app_name") or params.get("app") or params.get("application")
+        key = _key(name) if isinstance(name, str) else ""
+        if not key:
+            return
+        usage = self._usage.setdefault(key, [0, 0.0])
+        usage[0] += 1
+        usage[1] = max(usage[1], when or 0.0)
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = self._vectors.get(text)
+        if vec is None:
+            vec = self._vectors[text] = self.vectorizer.vectorize(text)
+        return vec
+
+    def _phrases(self, user_text: str) -> List[str]:
+        words = [w for w in _WORD.findall(user_text.lower()) if w not in _STOPWORDS]
+        return [
+            " ".join(words[i:i + n])
+            for n in range(1, _MAX_WINDOW_WORDS + 1)
+            for i in range(len(words) - n + 1)
+        ]
+
+    def _usage_of(self, keys: List[str]) -> Tuple[float, float]:
+        count, last = 0.0, 0.0
+        for key in keys:
+            usage = self._usage.get(key)
+            if usage:
+                count += usage[0]
+                last = max(last, usage[1])
+        return count, last
+
+    def score(self, user_text: str, items: List[str]) -> List[Tuple[float, str]]:
+        """(score, label) of every item, in input order"""
+        labels, exes, keys = [], [], []
+        for item in items:
+            label, path = _split(item)
+            exe = _key(path) if path else _key(label)
+            labels.append(label)
+            exes.append(exe or label.lower())
+            keys.append([k for k in {_key(label), exe} if k])
+
+        phrases = self._phrases(user_text)
+        if phrases:
+            phrase_matrix = self.vectorizer.vectorize_many(phrases)
+            sims = np.vstack([self._vector(label.lower()) for label in labels]) @ phrase_matrix.T
+            exe_sims = np.vstack([self._vector(t) for t in exes]) @ phrase_matrix.T
+            match = np.maximum(sims.max(axis=1), exe_sims.max(axis=1))
+        else:
+            match = np.zeros(len(items), dtype=np.float32)
+
+        usage = [self._usage_of(key_list) for key_list in keys]
+        max_count = max((count for count, _ in usage), default=0.0)
+        now = time.time()
+        scored = []
+        for label, m, (count, last) in zip(labels, match, usage):
+            frequency = math.log1p(count) / math.log1p(max_count) if max_count else 0.0
+            recency = 0.5 ** ((now - last) / 86400 / _RECENCY_HALF_LIFE_DAYS) if last else 0.0
+            scored.append((
+                _MATCH_WEIGHT * float(m) + _FREQUENCY_WEIGHT * frequency + _RECENCY_WEIGHT * recency,
+                label
+            ))
+        return scored
+
+    async def rank(self, user_text: str, items: List[str], budget_tokens: Optional[int] = None) -> List[str]:
+        """
+        Most relevant item labels, best first, within a token budget
+
+        Args:
+            user_text: Current utterance
+            items: Candidate entries ("Name" or "Name (path)")
+            budget_tokens: Token budget of the list (default: context_rank_token_budget)
+
+        Returns:
+            Labels (paths stripped) in descending relevance
+        """
+        if not self._loaded:
+            await self.load()
+        if not items:
+            return []
+
+        start = time.perf_counter()
+        budget = budget_tokens if budget_tokens is not None else self.settings.app.context_rank_token_budget
+        # Stable sort keeps the provider's order among equal scores
+        scored = sorted(self.score(user_text, items), key=lambda s: -s[0])
+
+        kept, spent, seen = [], 0, set()
+        for _, label in scored:
+            if label in seen:
+                continue
+            cost = estimate_tokens(label) + _ITEM_OVERHEAD_TOKENS
+            if spent + cost > budget:
+                break
+            seen.add(label)
+            kept.append(label)
+            spent += cost
+
+        self.ranks += 1
+        self.candidates += len(items)
+        self.kept += len(kept)
+        self.kept_tokens += spent
+        self.rank_time_ms += (time.perf_counter() - start) * 1000
+        logger.debug(f"[CONTEXT] Ranked {len(items)} entries, kept {len(kept)} (~{spent} tokens): {kept[:5]}")
+        return kept
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ranking statistics"""
+        ranks = max(self.ranks, 1)
+        return {
+            "ranks": self.ranks,
+            "avg_candidates": self.candidates / ranks,
+            "avg_kept": self.kept / ranks,
+            "avg_tokens": self.kept_tokens / ranks,
+            "avg_rank_ms": self.rank_time_ms / ranks,
+            "known_usage": len(self._usage),
+        }
+
+
+# Global instance
+_context_ranker: Optional[ContextRanker] = None
+
+
+def get_context_ranker() -> ContextRanker:
+    """Get or create global context ranker"""
+    global _context_ranker
+    if _context_ranker is None:
+        _context_ranker = ContextRanker()
+    return _context_ranker
@@ -0,0 +1,383 @@
+"""
+Self-Training Intent Classifier
+Naive Bayes over hashed word n-grams, learned from past LLM turns, that answers repeat commands locally
+"""
+import asyncio
+import json
+import time
+import zlib
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from src.ai.response_cache import get_response_cache, normalize_transcript
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Hashed feature space (word unigrams + bigrams)
+_DIM = 1 << 13
+# Laplace smoothing
+_ALPHA = 0.1
+# Messages fetched per training query
+_BATCH = 1000
+# A command template must have succeeded at least this often to be learned
+_MIN_SUCCESS_RATE = 0.5
+
+
+def _features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(all feature buckets, unigram buckets) of a normalized utterance"""
+    words = text.split()
+    unigrams = [zlib.crc32(word.encode("utf-8")) % _DIM for word in words]
+    bigrams = [zlib.crc32(f"{a} {b}".encode("utf-8")) % _DIM for a, b in zip(words, words[1:])]
+    return np.array(unigrams + bigrams, dtype=np.int64), np.array(unigrams, dtype=np.int64)
+
+
+def _label_key(intent: str, commands: List[Dict[str, Any]]) -> str:
+    """Canonical identity of an (intent, command template) class"""
+    return json.dumps({"intent": intent, "commands": commands}, sort_keys=True)
+
+
+class IntentModel:
+    """
+    Multinomial naive Bayes with one class per (intent, commands) template
+
+    Counts are a (classes, _DIM) float32 array, so training on a new pair is
+    a scatter-add and scoring is a column gather plus a row sum. The model
+    is copied before an update and swapped in whole, so scoring never sees a
+    half-updated state.
+    """
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self.responses: List[Counter] = []
+        self.counts = np.zeros((0, _DIM), dtype=np.float32)
+        self.class_counts = np.zeros(0, dtype=np.float32)
+        self.last_message_id = 0
+        self._index: Dict[str, int] = {}
+        self._log_prob = np.zeros((0, _DIM), dtype=np.float32)
+        self._log_prior = np.zeros(0, dtype=np.float32)
+
+    @property
+    def size(self) -> int:
+        return len(self.labels)
+
+    def copy(self) -> "IntentModel":
+        model = IntentModel()
+        model.labels = list(self.labels)
+        model.responses = [Counter(c) for c in self.responses]
+        model.counts = self.counts.copy()
+        model.class_counts = self.class_counts.copy()
+        model.last_message_id = self.last_message_id
+        model._index = dict(self._index)
+        model._log_prob = self._log_prob
+        model._log_prior = self._log_prior
+        return model
+
+    def add(self, text: str, label: str, response: str):
+        """Count one training utterance"""
+        index = self._index.get(label)
+        if index is None:
+            index = len(self.labels)
+            self._index[label] = index
+            self.labels.append(label)
+            self.responses.append(Counter())
+            self.counts = np.vstack([self.counts, np.zeros((1, _DIM), dtype=np.float32)])
+            self.class_counts = np.append(self.class_counts, np.float32(0))
+
+        buckets, _ = _features(text)
+        np.add.at(self.counts[index], buckets, 1.0)
+        self.class_counts[index] += 1
+        if response:
+            self.responses[index][response] += 1
+
+    def finalize(self):
+        """Recompute log probabilities after adding examples"""
+        if not self.labels:
+            return
+        totals = self.counts.sum(axis=1, keepdims=True)
+        self._log_prob = np.log((self.counts + _ALPHA) / (totals + _ALPHA * _DIM)).astype(np.float32)
+        self._log_prior = np.log(self.class_counts / self.class_counts.sum()).astype(np.float32)
+
+    def predict(self, text: str) -> Optional[Tuple[int, float, bool]]:
+        """
+        Score an utterance
+
+        Returns:
+            (class index, posterior, whether every word was seen in that class),
+            or None if the model is empty
+        """
+        if not self.labels or not text:
+            return None
+        buckets, unigrams = _features(text)
+        joint = self._log_prior + self._log_prob[:, buckets].sum(axis=1)
+        best = int(np.argmax(joint))
+        posterior = float(1.0 / np.exp(joint - joint[best]).sum())
+        known = bool((self.counts[best, unigrams] > 0).all())
+        return best, posterior, known
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "labels": self.labels,
+            "responses": [dict(c) for c in self.responses],
+            "last_message_id": self.last_message_id,
+            "dim": _DIM,
+        }
+        with open(path, "wb") as f:
+            np.savez_compressed(f, counts=self.counts, class_counts=self.class_counts, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: Path) -> "IntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("dim") != _DIM:
+                raise ValueError(f"Feature dimension changed ({meta.get('dim')} != {_DIM})")
+            model = cls()
+            model.counts = data["counts"].astype(np.float32)
+            model.class_counts = data["class_counts"].astype(np.float32)
+        model.labels = meta["labels"]
+        model.responses = [Counter(r) for r in meta["responses"]]
+        model.last_message_id = meta["last_message_id"]
+        model._index = {label: i for i, label in enumerate(model.labels)}
+        model.finalize()
+        return model
+
+
+class IntentClassifier:
+    """
+    Answers utterances the LLM has already resolved the same way many times
+
+    Training pairs are user messages followed by the LLM's reply in the same
+    conversation. Only replies the response cache would consider safe to
+    replay are learned (no questions, follow-ups or context-derived answers),
+    and command templates that mostly failed in CommandHistory are skipped.
+    Turns answered locally are never fed back in. A prediction is used only
+    above the confidence threshold, when its class has enough examples and
+    every word of the utterance was seen in that class, so an unseen app
+    name still goes to the LLM.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.model_path = Path(self.settings.app.intent_model_path)
+        self.model = IntentModel()
+        self._train_task: Optional[asyncio.Task] = None
+        self._training = asyncio.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.rejected_unknown_words = 0
+        self.predict_time_ms = 0.0
+        self.max_predict_ms = 0.0
+        self.trained_pairs = 0
+        self.last_trained: Optional[float] = None
+
+        if self.model_path.exists():
+            try:
+                self.model = IntentModel.load(self.model_path)
+                logger.info(f"Intent classifier loaded: {self.model.size} classes from {self.model_path}")
+            except Exception as e:
+                logger.warning(f"Could not load intent model, starting fresh: {e}")
+
+    def predict(self, user_text: str, context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer an utterance locally if the model is confident
+
+        Args:
+            user_text: User's message
+            context: Conversation context (follow-ups always go to the LLM)
+
+        Returns:
+            LLM-shaped response dict, or None to fall through
+        """
+        if context and context.get("expecting_followup"):
+            return None
+
+        start = time.perf_counter()
+        model = self.model
+        scored = model.predict(normalize_transcript(user_text))
+        elapsed = (time.perf_counter() - start) * 1000
+        self.predict_time_ms += elapsed
+        self.max_predict_ms = max(self.max_predict_ms, elapsed)
+
+        if scored is None:
+            self.misses += 1
+            return None
+
+        index, posterior, known = scored
+        app = self.settings.app
+        if posterior < app.intent_classifier_confidence or model.class_counts[index] < app.intent_classifier_min_support:
+            self.misses += 1
+            return None
+        if not known:
+            self.rejected_unknown_words += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        template = json.loads(model.labels[index])
+        response_text = model.responses[index].most_common(1)[0][0] if model.responses[index] else "Done"
+        logger.info(
+            f"🎯 Intent classifier: intent={template['intent']}, commands={len(template['commands'])} "
+            f"(p={posterior:.3f}, {elapsed:.2f} ms)"
+        )
+        return {
+            "needs_context": [],
+            "is_followup": False,
+            "intent": template["intent"],
+            "commands": template["commands"],
+            "response": response_text,
+            "update_context": template["intent"] != "system_command",
+            "expecting_followup": False,
+            "fast_path": True,
+            "classifier_confidence": posterior,
+        }
+
+    async def train(self) -> int:
+        """
+        Learn from messages saved since the last run
+
+        Returns:
+            Number of new training pairs
+        """
+        async with self._training:
+            try:
+                from src.database.neon_client import get_db_client
+                db = await get_db_client()
+                success_rates = await self._command_success_rates(db)
+
+                model = self.model.copy()
+                added = 0
+                while True:
+                    messages = await db.get_messages_since(model.last_message_id, limit=_BATCH)
+                    if not messages:
+                        break
+                    pairs, consumed_id = self._pairs(messages, success_rates)
+                    if consumed_id == model.last_message_id:
+                        break
+                    await asyncio.to_thread(self._fit, model, pairs)
+                    model.last_message_id = consumed_id
+                    added += len(pairs)
+                    if len(messages) < _BATCH:
+                        break
+
+                if added or model.last_message_id != self.model.last_message_id:
+                    await asyncio.to_thread(model.finalize)
+                    self.model = model
+                    await asyncio.to_thread(model.save, self.model_path)
+                    self.trained_pairs += added
+                    logger.info(f"🎯 Intent classifier trained on {added} new pairs ({model.size} classes)")
+                self.last_trained = time.time()
+                return added
+            except Exception as e:
+                logger.debug(f"Intent classifier training skipped (non-critical): {e}")
+                return 0
+
+    @staticmethod
+    def _fit(model: IntentModel, pairs: List[Tuple[str, str, str]]):
+        for text, label, response in pairs:
+            model.add(text, label, response)
+
+    def _pairs(
+        self,
+        messages: List[Any],
+        success_rates: Dict[Tuple[str, str], float]
+    ) -> Tuple[List[Tuple[str, str, str]], int]:
+        """
+        Extract (normalized utterance, label, response) pairs from ordered messages
+
+        Returns:
+            Pairs and the id of the last message consumed. A trailing user
+            message is left for the next run, since its reply may not have
+            been written yet.
+        """
+        from src.database.neon_client import pair_exchanges
+        pairs = []
+        cache = get_response_cache()
+        exchanges, consumed = pair_exchanges(messages)
+        asked: Optional[Any] = None  # Conversation whose last reply asked a question
+        for message, reply in exchanges:
+            meta = reply.extra_data or {}
+            answers_question = asked == message.conversation_id
+            asked = message.conversation_id if meta.get("expecting_followup") else None
+            if meta.get("local") or meta.get("context_used") or meta.get("expecting_followup") or answers_question:
+                continue
+            response = {
+                "intent": (message.extra_data or {}).get("intent"),
+                "commands": meta.get("commands") or [],
+                "response": reply.content,
+                "is_followup": meta.get("is_followup"),
+            }
+            if not cache.is_cacheable(response):
+                continue
+            if any(
+                success_rates.get(self._command_key(c), 1.0) < _MIN_SUCCESS_RATE
+                for c in response["commands"]
+            ):
+                continue
+
+            text = normalize_transcript(message.content)
+            if text:
+                pairs.append((text, _label_key(response["intent"], response["commands"]), reply.content))
+
+        return pairs, consumed
+
+    @staticmethod
+    def _command_key(command: Dict[str, Any]) -> Tuple[str, str]:
+        return command.get("type", ""), json.dumps(command.get("params") or {}, sort_keys=True)
+
+    async def _command_success_rates(self, db: Any) -> Dict[Tuple[str, str], float]:
+        """Success rate per distinct command from CommandHistory"""
+        rates = {}
+        for command_type, data, successes, total in await db.get_command_success_counts():
+            if total:
+                rates[self._command_key({"type": command_type, "params": data})] = successes / total
+        return rates
+
+    def start_background_training(self):
+        """Train now and then every intent_retrain_interval seconds"""
+        interval = self.settings.app.intent_retrain_interval
+        if self._train_task and not self._train_task.done():
+            return
+        self._train_task = asyncio.create_task(self._train_loop(interval))
+
+    async def _train_loop(self, interval: float):
+        while True:
+            await self.train()
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get classifier statistics"""
+        total = self.hits + self.misses
+        return {
+            "classes": self.model.size,
+            "examples": int(self.model.class_counts.sum()) if self.model.size else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / max(total, 1)) * 100,
+            "rejected_unknown_words": self.rejected_unknown_words,
+            "avg_predict_ms": self.predict_time_ms / max(total, 1),
+            "max_predict_ms": self.max_predict_ms,
+            "trained_pairs": self.trained_pairs,
+            "last_trained": self.last_trained,
+        }
+
+
+# Global instance
+_intent_classifier: Optional[IntentClassifier] = None
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Get or create global intent classifier"""
+    global _intent_classifier
+    if _intent_classifier is None:
+        _intent_classifier = IntentClassifier()
+    return _intent_classifier
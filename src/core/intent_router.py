@@ -0,0 +1,329 @@
+"""
+Local Fast-Path Intent Router
+Answers common commands ("open notepad", "turn off the fan") without an LLM round trip
+"""
+import re
+import json
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.ai.response_cache import spell_symbols
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.prompt_registry import get_prompt_registry
+
+logger = get_logger(__name__)
+
+# Words stripped from the edges of an utterance before matching
+_LEADING_FILLERS = re.compile(
+    r"^(?:(?:hey |ok |okay )?aiden,? |please |can you |could you |would you |will you |i want to |i'd like to )+"
+)
+_TRAILING_FILLERS = re.compile(r"(?: please| for me| now| right now)+$")
+_SEGMENT_SPLIT = re.compile(r" (?:and then|and|then) |, ")
+
+_LAUNCH_VERBS = r"(?:open|launch|start|run|fire up|bring up)"
+_KILL_VERBS = r"(?:close|kill|quit|exit|end|terminate|shut)"
+_DEVICE = r"(?:(?:my|the|this) )?(?:pc|computer|laptop|screen|system|machine)"
+
+_FAN_PATTERNS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"^(?:turn|switch|put) (on|off) (?:the )?fan$"), "{0}"),
+    (re.compile(r"^(?:turn|switch|put) (?:the )?fan (on|off)$"), "{0}"),
+    (re.compile(r"^fan (on|off)$"), "{0}"),
+    (re.compile(r"^(?:stop) (?:the )?fan$"), "off"),
+    (re.compile(r"^(?:change|switch|cycle) (?:the )?fan mode$"), "mode"),
+    (re.compile(r"^(?:speed up|increase) (?:the )?fan(?: speed)?$"), "on"),
+]
+
+_SYSTEM_PATTERNS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(rf"^lock(?: {_DEVICE})?$"), "lock"),
+    (re.compile(rf"^(?:shut ?down|power off)(?: {_DEVICE})?$"), "shutdown"),
+    (re.compile(rf"^shut {_DEVICE} down$"), "shutdown"),
+    (re.compile(rf"^(?:restart|reboot)(?: {_DEVICE})?$"), "restart"),
+    (re.compile(rf"^(?:put )?{_DEVICE} to sleep$"), "sleep"),
+    (re.compile(rf"^sleep(?: {_DEVICE})?$"), "sleep"),
+]
+
+_SYSTEM_PHRASES = {
+    "lock": "Locking your PC",
+    "shutdown": "Shutting down your PC",
+    "restart": "Restarting your PC",
+    "sleep": "Putting your PC to sleep",
+}
+
+_FAN_PHRASES = {
+    "on": "Turning on the fan",
+    "off": "Turning off the fan",
+    "mode": "Changing the fan mode",
+}
+
+
+class IntentRouter:
+    """
+    Compiled regex router for high-traffic commands
+
+    Seeded from the EXAMPLES and COMMON APPS sections of prompts.yaml plus the
+    AppLauncher aliases. Produces the same dict the LLM would and returns None
+    whenever any part of the utterance is not understood, so the LLM stays the
+    authority for everything else.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.min_confidence = self.settings.app.fast_path_min_confidence
+
+        self._examples: Dict[str, Dict[str, Any]] = {}
+        self._apps: Dict[str, Tuple[str, str]] = {}  # spoken name -> (exe, display name)
+        self._launch_re: Optional[re.Pattern] = None
+        self._kill_re: Optional[re.Pattern] = None
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.route_time_ms = 0.0
+        self.llm_latency_ewma_ms: Optional[float] = None
+        self.latency_saved_ms = 0.0
+
+        registry = get_prompt_registry()
+        self._compile()
+        registry.on_reload(self._compile)
+
+    def _compile(self):
+        """Build lookup tables and regexes from prompts.yaml and app aliases"""
+        prompt = get_prompt_registry().get("system_prompt")
+        system_prompt = prompt.text if prompt else ""
+
+        self._examples = self._parse_examples(system_prompt)
+        self._apps = self._build_app_table(self._parse_common_apps(system_prompt))
+
+        if self._apps:
+            names = "|".join(re.escape(name) for name in sorted(self._apps, key=len, reverse=True))
+            app_group = rf"(?:the )?(?P<app>{names})(?: app| application| browser)?"
+            self._launch_re = re.compile(rf"^{_LAUNCH_VERBS}(?: up)? {app_group}$")
+            self._kill_re = re.compile(rf"^{_KILL_VERBS}(?: down)? {app_group}$")
+        else:
+            self._launch_re = self._kill_re = None
+
+        logger.info(f"Intent router compiled: {len(self._apps)} apps, {len(self._examples)} examples")
+
+    def _parse_examples(self, system_prompt: str) -> Dict[str, Dict[str, Any]]:
+        """Extract context-free `User: "..."` -> JSON pairs from the EXAMPLES section"""
+        examples = {}
+        section = system_prompt.split("EXAMPLES:", 1)[-1].split("RULES:", 1)[0]
+        for match in re.finditer(r'^\s*User: "(.+?)"\s*\n\s*(\{.*\})\s*$', section, re.M):
+            try:
+                response = json.loads(match.group(2))
+            except json.JSONDecodeError:
+                continue
+            # Examples that need system context or history are left to the LLM
+            if response.get("needs_context") or response.get("is_followup"):
+                continue
+            examples[self.normalize(match.group(1))] = response
+        return examples
+
+    def _parse_common_apps(self, system_prompt: str) -> List[str]:
+        """Extract the comma-separated list under COMMON APPS"""
+        match = re.search(r"COMMON APPS[^\n]*\n\s*([^\n]+)", system_prompt)
+        if not match:
+            return []
+        return [name.strip().lower() for name in match.group(1).split(",") if name.strip()]
+
+    def _build_app_table(self, common_apps: List[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        Map spoken app names to executables
+
+        Only apps the prompt treats as "no context needed" are routed locally;
+        aliases extend them with spoken variants ("vs code", "calc").
+        """
+        try:
+            from src.execution.app_launcher import get_app_launcher
+            aliases = get_app_launcher().app_aliases
+        except Exception as e:
+            logger.debug(f"App aliases unavailable for intent router: {e}")
+            aliases = {}
+
+        def exe_for(candidates: List[str]) -> Optional[str]:
+            for candidate in candidates:
+                if candidate.lower().endswith(".exe") and "\\" not in candidate:
+                    return candidate
+            return None
+
+        table: Dict[str, Tuple[str, str]] = {}
+        common_exes = set()
+        for name in common_apps:
+            exe = exe_for(aliases.get(name, [])) or f"{name}.exe"
+            table[name] = (exe, name)
+            common_exes.add(exe.lower())
+
+        for alias, candidates in aliases.items():
+            if alias.endswith(".exe") or alias in table:
+                continue
+            exe = exe_for(candidates)
+            if exe and exe.lower() in common_exes:
+                table[alias] = (exe, alias)
+
+        return table
+
+    @property
+    def known_apps(self) -> set:
+        """Spoken app names that can be launched without system context"""
+        return set(self._apps)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, spell out name symbols, drop punctuation and collapse whitespace"""
+        # "notepad++" must not become "notepad" - spelled out it matches no known app
+        text = spell_symbols(text.lower())
+        text = re.sub(r"[^\w\s',]", " ", text)
+        text = re.sub(r"\s*,\s*", ", ", text)
+        return re.sub(r"\s+", " ", text).strip(" ,")
+
+    def route(self, user_text: str, context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Try to answer an utterance locally
+
+        Args:
+            user_text: User's message
+            context: Conversation context (follow-ups always go to the LLM)
+
+        Returns:
+            LLM-shaped response dict, or None to fall through to the LLM
+        """
+        start = time.perf_counter()
+        result = None
+
+        if not (context and context.get("expecting_followup")):
+            result = self._route(self.normalize(user_text))
+
+        self.route_time_ms += (time.perf_counter() - start) * 1000
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if self.llm_latency_ewma_ms is not None:
+            self.latency_saved_ms += self.llm_latency_ewma_ms
+        logger.info(
+            f"⚡ Fast path: intent={result['intent']}, commands={len(result['commands'])} "
+            f"(saved ~{self.llm_latency_ewma_ms or 0:.0f} ms)"
+        )
+        return result
+
+    def _route(self, text: str) -> Optional[Dict[str, Any]]:
+        """Match normalized text against examples, then the command grammar"""
+        if not text:
+            return None
+
+        if text in self._examples:
+            return {**self._examples[text], "fast_path": True}
+
+        text = _TRAILING_FILLERS.sub("", _LEADING_FILLERS.sub("", text)).strip(" ,")
+        if text in self._examples:
+            return {**self._examples[text], "fast_path": True}
+
+        segments = [s.strip() for s in _SEGMENT_SPLIT.split(text) if s.strip()]
+        matched = [self._match_segment(segment) for segment in segments]
+        found = [m for m in matched if m is not None]
+
+        confidence = len(found) / len(segments) if segments else 0.0
+        if not found or confidence < self.min_confidence:
+            return None
+
+        commands = [command for command, _ in found]
+        phrases = [phrase for _, phrase in found]
+
+        # System commands always run last (see MULTI-COMMAND EXECUTION ORDER)
+        order = sorted(range(len(commands)), key=lambda i: commands[i]["type"] == "system_command")
+        commands = [commands[i] for i in order]
+        phrases = [phrases[i] for i in order]
+
+        if len(commands) > 1:
+            intent = "multi_command"
+        elif commands[0]["type"] == "system_command":
+            intent = "system_command"
+        else:
+            intent = "command"
+
+        response = phrases[0] + "".join(
+            f" and {phrase[0].lower()}{phrase[1:]}" for phrase in phrases[1:]
+        )
+
+        return {
+            "needs_context": [],
+            "is_followup": False,
+            "intent": intent,
+            "commands": commands,
+            "response": response,
+            "update_context": intent != "system_command",
+            "expecting_followup": False,
+            "fast_path": True,
+        }
+
+    def _match_segment(self, segment: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Match a single command clause, returning (command, spoken phrase)"""
+        if self._launch_re:
+            match = self._launch_re.match(segment)
+            if match:
+                exe, name = self._apps[match.group("app")]
+                return {"type": "launch_app", "params": {"name": exe}}, f"Opening {self._display(name)}"
+
+            match = self._kill_re.match(segment)
+            if match:
+                exe, name = self._apps[match.group("app")]
+                return {"type": "kill_process", "params": {"name": exe}}, f"Closing {self._display(name)}"
+
+        for pattern, operation in _FAN_PATTERNS:
+            match = pattern.match(segment)
+            if match:
+                operation = operation.format(*match.groups())
+                return {"type": "fan_control", "params": {"operation": operation}}, _FAN_PHRASES[operation]
+
+        for pattern, action in _SYSTEM_PATTERNS:
+            if pattern.match(segment):
+                return {"type": "system_command", "params": {"action": action}}, _SYSTEM_PHRASES[action]
+
+        return None
+
+    @staticmethod
+    def _display(name: str) -> str:
+        """Spoken display name for an app"""
+        special = {"vscode": "VS Code", "vs code": "VS Code", "cmd": "Command Prompt", "powershell": "PowerShell"}
+        return special.get(name, name.title())
+
+    def can_route(self, user_text: str, context: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether route() would answer locally (without touching the stats)"""
+        if context and context.get("expecting_followup"):
+            return False
+        return self._route(self.normalize(user_text)) is not None
+
+    def record_llm_latency(self, latency_ms: float):
+        """Track how long the LLM path takes so saved latency can be estimated"""
+        if self.llm_latency_ewma_ms is None:
+            self.llm_latency_ewma_ms = latency_ms
+        else:
+            self.llm_latency_ewma_ms = 0.8 * self.llm_latency_ewma_ms + 0.2 * latency_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fast-path statistics"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / max(total, 1)) * 100,
+            "avg_route_ms": self.route_time_ms / max(total, 1),
+            "llm_latency_ewma_ms": self.llm_latency_ewma_ms,
+            "latency_saved_ms": self.latency_saved_ms,
+        }
+
+
+# Global instance
+_intent_router: Optional[IntentRouter] = None
+
+
+def get_intent_router() -> IntentRouter:
+    """Get or create global intent router"""
+    global _intent_router
+    if _intent_router is None:
+        _intent_router = IntentRouter()
+    return _intent_router
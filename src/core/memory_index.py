@@ -0,0 +1,327 @@
+"""
+Long-Term Memory Index
+Incremental BM25 index over past exchanges in the messages table, queried per turn within a latency budget
+"""
+import asyncio
+import heapq
+import json
+import math
+import re
+import time
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "can", "could", "did", "do", "does", "for",
+    "from", "had", "has", "have", "he", "her", "him", "his", "how", "i", "if", "in", "is", "it", "its",
+    "me", "my", "no", "not", "of", "on", "or", "our", "please", "she", "so", "that", "the", "their",
+    "them", "then", "there", "they", "this", "to", "up", "was", "we", "were", "what", "when", "where",
+    "which", "who", "why", "will", "with", "would", "you", "your", "aiden", "hey", "ok", "okay",
+}
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+# Postings scored between deadline checks
+_CHUNK = 512
+# Messages fetched per refresh query
+_BATCH = 1000
+# Characters of each side of an exchange shown to the LLM
+_SNIPPET_CHARS = 200
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase content words, with a plural 's' stripped"""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class MemoryIndex:
+    """
+    BM25 over past user/assistant exchanges
+
+    Each document is one user message plus the assistant reply that followed
+    it in the same conversation. New exchanges are pulled from the messages
+    table by id (like the intent classifier's training) and appended to a
+    JSONL file, so a restart only re-tokenizes, it never re-queries history.
+
+    A search processes query terms rarest first and stops at the latency
+    budget, so a huge posting list can only cost recall, not time. Scores are
+    normalized by what the query would score against an exchange holding
+    each of its terms exactly once in the whole history, so matches on
+    common words stay low, and only exchanges above `memory_min_score` are
+    returned. Exchanges that can no longer reach it are never scored, so
+    the final ranking only sees real candidates.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.path = Path(self.settings.app.memory_index_path)
+        self.last_message_id = 0
+
+        self._docs: List[Dict[str, Any]] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._total_length = 0
+        self._refreshing = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_query: Optional[Tuple[str, Tuple[str, ...]]] = None
+        self._last_results: List[Dict[str, Any]] = []
+
+        # Stats
+        self.searches = 0
+        self.hits = 0
+        self.budget_exceeded = 0
+        self.search_time_ms = 0.0
+        self.max_search_ms = 0.0
+        self.last_refreshed: Optional[float] = None
+
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return len(self._docs)
+
+    def _load(self):
+        """Rebuild the in-memory index from the JSONL file"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if "checkpoint" in record:
+                        self.last_message_id = max(self.last_message_id, record["checkpoint"])
+                    else:
+                        self._add(record)
+            logger.info(f"Memory index loaded: {self.size} exchanges from {self.path}")
+        except Exception as e:
+            logger.warning(f"Could not load memory index, starting fresh: {e}")
+            self._docs, self._lengths, self._total_length = [], [], 0
+            self._postings = defaultdict(list)
+            self.last_message_id = 0
+
+    def _add(self, doc: Dict[str, Any]):
+        """Index one exchange"""
+        index = len(self._docs)
+        counts: Dict[str, int] = defaultdict(int)
+        for token in _tokenize(f"{doc['user']} {doc['assistant']}"):
+            counts[token] += 1
+        for token, tf in counts.items():
+            self._postings[token].append((index, tf))
+        length = sum(counts.values())
+        self._docs.append(doc)
+        self._lengths.append(length)
+        self._total_length += length
+
+    def _idf(self, df: int) -> float:
+        n = len(self._docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, text: str, exclude: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+        """
+        Past exchanges relevant to an utterance
+
+        Args:
+            text: User's message
+            exclude: User messages already in the prompt (the verbatim history)
+
+        Returns:
+            Up to memory_top_k exchanges, best first, each with its normalized score
+        """
+        key = (text, exclude)
+        if key == self._last_query:
+            return self._last_results  # Same turn, later pass
+
+        start = time.perf_counter()
+        deadline = start + self.settings.app.memory_budget_ms / 1000
+        terms = set(_tokenize(text))
+        results: List[Dict[str, Any]] = []
+
+        if terms and self._docs:
+            avg_length = self._total_length / len(self._docs)
+            # Best case: every query term is unique to one exchange
+            ceiling = len(terms) * self._idf(0) * (_K1 + 1)
+            weighted = [
+                (self._idf(len(self._postings[term])), self._postings[term])
+                for term in terms if term in self._postings
+            ]
+            weighted.sort(key=lambda item: -item[0])
+
+            excluded = set(exclude)
+            min_score = self.settings.app.memory_min_score
+            top_k = self.settings.app.memory_top_k
+            threshold = min_score * ceiling
+            # Most the terms not scored yet can add; once it is below the threshold,
+            # exchanges that matched none of the rarer terms can no longer qualify
+            remaining = sum(idf for idf, _ in weighted) * (_K1 + 1)
+
+            scores: Dict[int, float] = defaultdict(float)
+            timed_out = False
+            for idf, postings in weighted:
+                admit = remaining >= threshold
+                if not admit and not scores:
+                    break
+                remaining -= idf * (_K1 + 1)
+                for offset in range(0, len(postings), _CHUNK):
+                    if time.perf_counter() > deadline:
+                        timed_out = True
+                        break
+                    for index, tf in postings[offset:offset + _CHUNK]:
+                        if admit or index in scores:
+                            norm = _K1 * (1 - _B + _B * self._lengths[index] / avg_length)
+                            scores[index] += idf * tf * (_K1 + 1) / (tf + norm)
+                if timed_out:
+                    self.budget_exceeded += 1
+                    break
+
+            candidates = [item for item in scores.items() if item[1] >= threshold]
+            ranked = heapq.nlargest(top_k + len(excluded), candidates, key=lambda item: item[1])
+            for index, score in ranked:
+                normalized = score / ceiling
+                if normalized < min_score or len(results) >= top_k:
+                    break
+                doc = self._docs[index]
+                if doc["user"] in excluded:
+                    continue
+                results.append({**doc, "score": normalized})
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.searches += 1
+        self.hits += bool(results)
+        self.search_time_ms += elapsed
+        self.max_search_ms = max(self.max_search_ms, elapsed)
+        self._last_query, self._last_results = key, results
+        if results:
+            logger.info(f"🧠 Memory: {len(results)} past exchanges (best {results[0]['score']:.2f}, {elapsed:.2f} ms)")
+        return results
+
+    @staticmethod
+    def format(results: List[Dict[str, Any]]) -> str:
+        """Prompt section for retrieved exchanges"""
+        lines = []
+        for doc in results:
+            when = f"({doc['date']}) " if doc.get("date") else ""
+            lines.append(
+                f"- {when}User: {doc['user'][:_SNIPPET_CHARS]} | Aiden: {doc['assistant'][:_SNIPPET_CHARS]}"
+            )
+        return "\n".join(lines)
+
+    async def refresh(self) -> int:
+        """
+        Index exchanges saved since the last run
+
+        Returns:
+            Number of new exchanges
+        """
+        async with self._refreshing:
+            try:
+                from src.database.neon_client import get_db_client
+                db = await get_db_client()
+                added: List[Dict[str, Any]] = []
+                last_id = self.last_message_id
+                while True:
+                    messages = await db.get_messages_since(last_id, limit=_BATCH)
+                    if not messages:
+                        break
+                    docs, consumed_id = self._exchanges(messages)
+                    if consumed_id == last_id:
+                        break
+                    for doc in docs:
+                        self._add(doc)
+                    added.extend(docs)
+                    last_id = consumed_id
+                    if len(messages) < _BATCH:
+                        break
+
+                if last_id != self.last_message_id:
+                    self.last_message_id = last_id
+                    self._last_query = None
+                    await asyncio.to_thread(self._append, added, last_id)
+                    if added:
+                        logger.info(f"🧠 Memory index added {len(added)} exchanges ({self.size} total)")
+                self.last_refreshed = time.time()
+                return len(added)
+            except Exception as e:
+                logger.debug(f"Memory index refresh skipped (non-critical): {e}")
+                return 0
+
+    @staticmethod
+    def _exchanges(messages: List[Any]) -> Tuple[List[Dict[str, Any]], int]:
+        """Index documents of the exchanges in ordered messages, and the id of the last message consumed"""
+        from src.database.neon_client import pair_exchanges
+        docs = []
+        pairs, consumed = pair_exchanges(messages)
+        for message, reply in pairs:
+            if not message.content.strip() or not reply.content.strip():
+                continue
+            docs.append({
+                "id": message.id,
+                "conversation_id": str(message.conversation_id),
+                "date": message.timestamp.date().isoformat() if getattr(message, "timestamp", None) else None,
+                "user": message.content.strip(),
+                "assistant": reply.content.strip(),
+            })
+        return docs, consumed
+
+    def _append(self, docs: List[Dict[str, Any]], checkpoint: int):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for doc in docs:
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+            f.write(json.dumps({"checkpoint": checkpoint}) + "\n")
+
+    def start_background_refresh(self):
+        """Index now and then every memory_refresh_interval seconds"""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_loop(self.settings.app.memory_refresh_interval))
+
+    async def _refresh_loop(self, interval: float):
+        while True:
+            await self.refresh()
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index and retrieval statistics"""
+        return {
+            "exchanges": self.size,
+            "terms": len(self._postings),
+            "searches": self.searches,
+            "hits": self.hits,
+            "hit_rate": (self.hits / max(self.searches, 1)) * 100,
+            "avg_search_ms": self.search_time_ms / max(self.searches, 1),
+            "max_search_ms": self.max_search_ms,
+            "budget_exceeded": self.budget_exceeded,
+            "last_refreshed": self.last_refreshed,
+        }
+
+
+# Global instance
+_memory_index: Optional[MemoryIndex] = None
+
+
+def get_memory_index() -> MemoryIndex:
+    """Get or create global memory index"""
+    global _memory_index
+    if _memory_index is None:
+        _memory_index = MemoryIndex()
+    return _memory_index
@@ -0,0 +1,189 @@
+"""
+Partial Transcript Speculation
+Issues Pass 1 on a stable partial transcript and commits it if the final transcript agrees
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, Any, Optional, Coroutine
+
+from src.ai.response_cache import normalize_transcript
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Speculative Pass 1 calls per utterance (each revision of the partial replaces the last)
+_MAX_PER_UTTERANCE = 2
+
+
+def context_key(context: Dict[str, Any]) -> tuple:
+    """What a Pass 1 prompt depends on besides the utterance"""
+    return (
+        context.get("conversation_id"),
+        len(context.get("history", [])),
+        context.get("summary"),
+        context.get("expecting_followup"),
+    )
+
+
+class SpeculativePass1:
+    """A Pass 1 request started on a partial transcript"""
+
+    def __init__(
+        self,
+        text: str,
+        context: tuple,
+        protocol: str,
+        tier: Optional[int],
+        budget: Dict[str, Any],
+        max_tokens: Optional[int],
+        speech: Any,
+        task: asyncio.Task
+    ):
+        self.text = text
+        self.normalized = normalize_transcript(text)
+        self.context = context
+        self.protocol = protocol
+        self.tier = tier
+        self.budget = budget
+        self.max_tokens = max_tokens
+        self.speech = speech
+        self.task = task
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        task.add_done_callback(lambda _: setattr(self, "finished", time.perf_counter()))
+
+    async def cancel(self):
+        if self.task.done():
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"Speculative Pass 1 ended with error: {e}")
+
+
+class PartialSpeculator:
+    """
+    Tracks the speculative Pass 1 of the utterance being spoken
+
+    The STT engine reports a partial transcript once it has been stable for a
+    few frames; the assistant builds the Pass 1 prompt for it and starts the
+    request with speech held. When the final transcript arrives it is
+    committed if it normalizes to the same text (case, punctuation, fillers)
+    and the turn would start on the same model tier with the same context,
+    otherwise the request is cancelled. A committed speculation saves the
+    time its request had already been running when the final text arrived.
+    """
+
+    def __init__(self):
+        self.current: Optional[SpeculativePass1] = None
+        self._accepting = False
+        self._count = 0
+
+        # Stats
+        self.issued = 0
+        self.committed = 0
+        self.discarded: Dict[str, int] = {}
+        self.saved_ms = 0.0
+
+    def begin_utterance(self):
+        """A new utterance is being listened to"""
+        self._accepting = True
+        self._count = 0
+
+    def wants(self, text: str) -> bool:
+        """Whether a stable partial is worth a speculative request"""
+        if not self._accepting or self._count >= _MAX_PER_UTTERANCE:
+            return False
+        normalized = normalize_transcript(text)
+        if not normalized:
+            return False
+        return self.current is None or self.current.normalized != normalized
+
+    async def start(self, speculation_args: Dict[str, Any], request: Coroutine) -> bool:
+        """
+        Start a speculative Pass 1, replacing any earlier one
+
+        Returns:
+            False if the final transcript arrived meanwhile (the request is not sent)
+        """
+        if not self._accepting:
+            request.close()
+            return False
+        await self._discard("revised")
+        self._count += 1
+        self.issued += 1
+        self.current = SpeculativePass1(task=asyncio.create_task(request), **speculation_args)
+        logger.info(f"🗣️ Stable partial '{self.current.text}' - starting Pass 1 speculatively")
+        return True
+
+    async def take(self, user_text: str, context: Dict[str, Any]) -> Optional[SpeculativePass1]:
+        """
+        Final transcript arrived: the speculation if it can be committed
+
+        A speculation on different text or context is cancelled here. The
+        model tier is checked by the caller, which then either commits or
+        calls `reject`.
+        """
+        self._accepting = False
+        speculation, self.current = self.current, None
+        if speculation is None:
+            return None
+        if speculation.normalized != normalize_transcript(user_text):
+            logger.info(f"🗣️ Final transcript differs from '{speculation.text}' - discarding speculative Pass 1")
+            await self._discard("text_changed", speculation)
+            return None
+        if speculation.context != context_key(context):
+            await self._discard("context_changed", speculation)
+            return None
+        return speculation
+
+    async def abandon(self):
+        """The utterance produced no transcript"""
+        self._accepting = False
+        await self._discard("no_transcript")
+
+    async def reject(self, speculation: SpeculativePass1, reason: str):
+        """Cancel a speculation the turn cannot use"""
+        await self._discard(reason, speculation)
+
+    def commit(self, speculation: SpeculativePass1):
+        """Record a speculation whose Pass 1 the turn uses"""
+        self.committed += 1
+        end = speculation.finished or time.perf_counter()
+        saved = (end - speculation.started) * 1000
+        self.saved_ms += saved
+        logger.info(f"🗣️ Speculative Pass 1 committed - {saved:.0f} ms overlapped with speech")
+
+    async def _discard(self, reason: str, speculation: Optional[SpeculativePass1] = None):
+        if speculation is None:
+            speculation, self.current = self.current, None
+        if speculation is None:
+            return
+        self.discarded[reason] = self.discarded.get(reason, 0) + 1
+        await speculation.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get speculation outcome statistics"""
+        return {
+            "issued": self.issued,
+            "committed": self.committed,
+            "discarded": dict(self.discarded),
+            "commit_rate": (self.committed / max(self.issued, 1)) * 100,
+            "avg_saved_ms": self.saved_ms / max(self.committed, 1),
+        }
+
+
+# Global instance
+_partial_speculator: Optional[PartialSpeculator] = None
+
+
+def get_partial_speculator() -> PartialSpeculator:
+    """Get or create global partial speculator"""
+    global _partial_speculator
+    if _partial_speculator is None:
+        _partial_speculator = PartialSpeculator()
+    return _partial_speculator
@@ -0,0 +1,93 @@
+"""
+Prompt Profiles
+Per-pass system prompt selection and the token savings of the slim Pass 1 prompt
+"""
+import logging
+from typing import Dict, Any, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Profile -> prompts.yaml key of its system prompt
+PROMPT_PROFILES: Dict[str, str] = {
+    "full": "system_prompt",
+    "slim": "pass1_prompt",
+}
+
+
+class _ProfileStats:
+    """Pass 1 outcomes under one profile"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class PromptProfileStats:
+    """
+    Measures what the slim Pass 1 prompt saves
+
+    Every Pass 1 records its prompt and completion tokens under the profile
+    it used, plus how many system prompt tokens the slim profile left out
+    compared with the full prompt. A slim Pass 1 that had to be redone with
+    the full prompt (truncated at its max_tokens, or no usable reply) is an
+    escalation, and the escalation's prompt tokens are charged against the
+    savings.
+    """
+
+    def __init__(self):
+        self._profiles: Dict[str, _ProfileStats] = {name: _ProfileStats() for name in PROMPT_PROFILES}
+        self.turns = 0
+        self.prompt_tokens_saved = 0
+        self.escalations = 0
+        self.escalation_prompt_tokens = 0
+
+    def record_pass1(self, profile: str, usage: Optional[Dict[str, Any]], prompt_tokens_saved: int):
+        """Record one Pass 1 call"""
+        stats = self._profiles.setdefault(profile, _ProfileStats())
+        stats.calls += 1
+        self.turns += 1
+        self.prompt_tokens_saved += prompt_tokens_saved
+        if usage:
+            stats.prompt_tokens += usage.get("prompt_tokens", 0)
+            stats.completion_tokens += usage.get("completion_tokens", 0)
+
+    def record_escalation(self, usage: Optional[Dict[str, Any]]):
+        """Record a slim Pass 1 redone with the full prompt"""
+        self.escalations += 1
+        if usage:
+            self.escalation_prompt_tokens += usage.get("prompt_tokens", 0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-profile Pass 1 token usage and net savings"""
+        profiles = {
+            name: {
+                "calls": stats.calls,
+                "avg_prompt_tokens": stats.prompt_tokens / max(stats.calls, 1),
+                "avg_completion_tokens": stats.completion_tokens / max(stats.calls, 1),
+            }
+            for name, stats in self._profiles.items()
+        }
+        net_saved = self.prompt_tokens_saved - self.escalation_prompt_tokens
+        return {
+            "pass1": profiles,
+            "prompt_tokens_saved": self.prompt_tokens_saved,
+            "net_prompt_tokens_saved": net_saved,
+            "net_prompt_tokens_saved_per_turn": net_saved / max(self.turns, 1),
+            "escalations": self.escalations,
+            "escalation_rate": (self.escalations / max(self._profiles["slim"].calls, 1)) * 100,
+        }
+
+
+# Global instance
+_prompt_profile_stats: Optional[PromptProfileStats] = None
+
+
+def get_prompt_profile_stats() -> PromptProfileStats:
+    """Get or create global prompt profile statistics"""
+    global _prompt_profile_stats
+    if _prompt_profile_stats is None:
+        _prompt_profile_stats = PromptProfileStats()
+    return _prompt_profile_stats
@@ -0,0 +1,139 @@
+"""
+Conversation Summarizer
+Folds older turns of a conversation into a short running summary in the background
+"""
+import time
+import logging
+from typing import Dict, Any, List, Optional
+
+from src.ai.rate_limiter import Priority
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+from src.utils.prompt_registry import get_prompt_registry
+from src.utils.tokens import estimate_tokens
+
+logger = get_logger(__name__)
+
+DEFAULT_SUMMARY_PROMPT = (
+    "Update the running summary of a voice assistant conversation. Keep names, places, "
+    "numbers, apps and open questions later turns may refer to. At most 60 words. "
+    'Reply with JSON only: {"summary": "..."}'
+)
+
+
+class ConversationSummarizer:
+    """
+    Maintains a running summary so the verbatim history can stay short
+
+    Once the history in a conversation's context grows past
+    `summary_trigger_tokens`, everything but the last `summary_keep_messages`
+    messages is folded into the summary by a low-priority LLM call. The
+    ContextManager schedules this after the turn's reply is already being
+    spoken and applies the result only if the folded messages are still at
+    the head of the history.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+
+        # Stats
+        self.runs = 0
+        self.failures = 0
+        self.messages_folded = 0
+        self.summary_tokens = 0
+        self.last_latency_ms: Optional[float] = None
+
+    def split(self, context: Dict[str, Any]) -> Optional[List[Dict[str, str]]]:
+        """
+        Messages to fold into the summary, or None if the history is within budget
+
+        Whole user/assistant exchanges are folded so the kept history still
+        starts with a user message.
+        """
+        history = context.get("history", [])
+        keep = max(self.settings.app.summary_keep_messages, 0)
+        if len(history) <= keep:
+            return None
+        if sum(estimate_tokens(m.get("content", "")) for m in history) <= self.settings.app.summary_trigger_tokens:
+            return None
+
+        cut = len(history) - keep
+        if cut % 2:
+            cut -= 1
+        return history[:cut] if cut > 0 else None
+
+    async def summarize(self, summary: str, turns: List[Dict[str, str]]) -> Optional[str]:
+        """
+        Fold turns into the running summary
+
+        Args:
+            summary: Current summary ("" if none)
+            turns: Oldest history messages to fold in
+
+        Returns:
+            New summary, or None if the LLM call failed
+        """
+        prompt = get_prompt_registry().get("summary_prompt", DEFAULT_SUMMARY_PROMPT)
+        transcript = "\n".join(
+            f"{'User' if m.get('role') == 'user' else 'Aiden'}: {m.get('content', '')}" for m in turns
+        )
+        messages = [
+            {"role": "system", "content": prompt.text},
+            {"role": "user", "content": f"Current summary: {summary or 'none'}\n\nNew turns:\n{transcript}"},
+        ]
+
+        self.runs += 1
+        start = time.perf_counter()
+        try:
+            llm = await self._client()
+            result = await llm.chat(
+                messages,
+                priority=Priority.BACKGROUND,
+                max_tokens=self.settings.app.summary_max_tokens
+            )
+        except Exception as e:
+            logger.debug(f"Summary request failed (non-critical): {e}")
+            result = None
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+
+        new_summary = result.get("summary") if isinstance(result, dict) else None
+        if not isinstance(new_summary, str) or not new_summary.strip():
+            self.failures += 1
+            logger.debug("Summarizer returned no summary - keeping history as is")
+            return None
+
+        new_summary = new_summary.strip()
+        self.messages_folded += len(turns)
+        self.summary_tokens = estimate_tokens(new_summary)
+        logger.info(f"📝 Folded {len(turns)} messages into the conversation summary ({self.last_latency_ms:.0f} ms)")
+        return new_summary
+
+    async def _client(self):
+        """Single-provider client for background work (Groq when configured, it is the cheaper one)"""
+        if self.settings.groq.api_key:
+            from src.ai.groq_client import get_groq_client
+            return await get_groq_client()
+        from src.ai.gemini_client import get_gemini_client
+        return await get_gemini_client()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get summarization statistics"""
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "messages_folded": self.messages_folded,
+            "last_summary_tokens": self.summary_tokens,
+            "last_latency_ms": self.last_latency_ms,
+        }
+
+
+# Global instance
+_summarizer: Optional[ConversationSummarizer] = None
+
+
+def get_summarizer() -> ConversationSummarizer:
+    """Get or create global conversation summarizer"""
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = ConversationSummarizer()
+    return _summarizer
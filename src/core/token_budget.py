@@ -0,0 +1,107 @@
+"""
+Token Budget Engine
+Fits the system prompt, system context and history of a turn into a prompt token budget
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+from src.utils.tokens import estimate_tokens, MESSAGE_OVERHEAD_TOKENS
+
+logger = get_logger(__name__)
+
+# Separator cost of each list item (", ")
+_ITEM_OVERHEAD_TOKENS = 1
+
+
+class TokenBudget:
+    """
+    Measures each prompt segment and trims until the prompt fits
+
+    The system prompt and the user message are never cut. History is
+    trimmed oldest-first (whole user/assistant exchanges where possible);
+    if the prompt still does not fit, the longest system context list loses
+    items from its tail, which is its least relevant end.
+    """
+
+    def __init__(self, max_prompt_tokens: int):
+        self.max_prompt_tokens = max_prompt_tokens
+
+    def fit(
+        self,
+        system_tokens: int,
+        user_text: str,
+        history: List[Dict[str, str]],
+        context_lists: Optional[Dict[str, List[str]]] = None,
+        fixed_text: str = ""
+    ) -> Tuple[List[Dict[str, str]], Dict[str, List[str]], Dict[str, Any]]:
+        """
+        Trim history and context lists to the budget
+
+        Args:
+            system_tokens: Token count of the system prompt
+            user_text: Current user message
+            history: Conversation history messages, oldest first
+            context_lists: Named lists rendered into the system context
+            fixed_text: Headers/labels rendered around the context lists
+
+        Returns:
+            Tuple of (kept history, kept context lists, budget report)
+        """
+        context_lists = {name: list(items) for name, items in (context_lists or {}).items()}
+        history = list(history)
+
+        user_tokens = estimate_tokens(user_text) + MESSAGE_OVERHEAD_TOKENS
+        fixed_tokens = system_tokens + MESSAGE_OVERHEAD_TOKENS + estimate_tokens(fixed_text)
+        history_costs = [estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in history]
+        item_costs = {
+            name: [estimate_tokens(item) + _ITEM_OVERHEAD_TOKENS for item in items]
+            for name, items in context_lists.items()
+        }
+
+        def total() -> int:
+            return (
+                fixed_tokens + user_tokens + sum(history_costs)
+                + sum(sum(costs) for costs in item_costs.values())
+            )
+
+        trimmed_history = 0
+        while history and total() > self.max_prompt_tokens:
+            history.pop(0)
+            history_costs.pop(0)
+            trimmed_history += 1
+            # Don't leave an assistant reply without the user turn it answered
+            if history and history[0].get("role") == "assistant":
+                history.pop(0)
+                history_costs.pop(0)
+                trimmed_history += 1
+
+        truncated_items = 0
+        while total() > self.max_prompt_tokens:
+            name = max(item_costs, key=lambda n: sum(item_costs[n]), default=None)
+            if name is None or not item_costs[name]:
+                break
+            context_lists[name].pop()
+            item_costs[name].pop()
+            truncated_items += 1
+
+        report = {
+            "budget": self.max_prompt_tokens,
+            "system": system_tokens,
+            "context": estimate_tokens(fixed_text) + sum(sum(costs) for costs in item_costs.values()),
+            "history": sum(history_costs),
+            "user": user_tokens,
+            "total": total(),
+            "trimmed_history": trimmed_history,
+            "truncated_items": truncated_items,
+        }
+
+        if trimmed_history or truncated_items:
+            logger.info(
+                f"[BUDGET] Trimmed {trimmed_history} history messages and {truncated_items} context items "
+                f"to fit {self.max_prompt_tokens} tokens"
+            )
+        if report["total"] > self.max_prompt_tokens:
+            logger.warning(f"[BUDGET] Prompt is {report['total']} tokens, over budget of {self.max_prompt_tokens}")
+
+        return history, context_lists, report
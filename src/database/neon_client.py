@@ -4,11 +4,11 @@ Async PostgreSQL database client using SQLAlchemy
 """
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.future import select
-from sqlalchemy import text
+from sqlalchemy import text, func, case
 
 # CRITICAL: Import event loop policy FIRST
 from src.utils.event_loop import ensure_selector_event_loop
@@ -19,6 +19,38 @@ from src.utils.logger import get_logger
 logger = get_logger(__name__)
 
 
+def pair_exchanges(messages: List[Message]) -> Tuple[List[Tuple[Message, Message]], int]:
+    """
+    Pair user messages with the assistant reply that followed them
+
+    Args:
+        messages: Messages oldest first, as returned by get_messages_since
+
+    Returns:
+        (user, assistant) pairs of the same conversation, in order, and the
+        id of the last message consumed. A trailing user message is left for
+        the next run, since its reply may not have been written yet.
+    """
+    pairs = []
+    consumed = messages[0].id - 1 if messages else 0
+    i = 0
+    while i < len(messages):
+        message = messages[i]
+        if message.role != "user":
+            consumed = message.id
+            i += 1
+            continue
+        if i + 1 >= len(messages):
+            break
+
+        reply = messages[i + 1]
+        consumed = reply.id if reply.role == "assistant" else message.id
+        i += 2 if reply.role == "assistant" else 1
+        if reply.role == "assistant" and reply.conversation_id == message.conversation_id:
+            pairs.append((message, reply))
+    return pairs, consumed
+
+
 class NeonDBClient:
     """Async Neon DB client for PostgreSQL operations"""
     
@@ -227,6 +259,19 @@ class NeonDBClient:
             )
             return result.scalars().all()
     
+    async def get_messages_since(self, after_id: int = 0, limit: int = 1000) -> List[Message]:
+        """Get messages with id greater than after_id, oldest first (for incremental training)"""
+        async with self.session() as session:
+            if not session:
+                return []
+            result = await session.execute(
+                select(Message)
+                .where(Message.id > after_id)
+                .order_by(Message.id.asc())
+                .limit(limit)
+            )
+            return result.scalars().all()
+    
     # Command history operations
     async def log_command(
         self,
@@ -267,6 +312,22 @@ class NeonDBClient:
             result = await session.execute(query)
             return result.scalars().all()
     
+    async def get_command_success_counts(self) -> List[Tuple[str, Dict[str, Any], int, int]]:
+        """Get (command_type, command_data, successes, total) per distinct command"""
+        async with self.session() as session:
+            if not session:
+                return []
+            result = await session.execute(
+                select(
+                    CommandHistory.command_type,
+                    CommandHistory.command_data,
+                    func.sum(case((CommandHistory.success == True, 1), else_=0)),
+                    func.count()
+                )
+                .group_by(CommandHistory.command_type, CommandHistory.command_data)
+            )
+            return [(row[0], row[1], int(row[2] or 0), int(row[3])) for row in result.all()]
+    
     # User preferences operations
     async def get_user_preferences(self, user_id: str = "default") -> Optional[UserPreferences]:
         """Get user preferences"""
@@ -244,6 +244,36 @@ class RedisClient:
             logger.error(f"Error getting LLM response: {e}")
             return None
     
+    async def scan_llm_responses(self, limit: int = 5000) -> List[Dict[str, Any]]:
+        """
+        Load all cached LLM responses (used to warm the in-process response cache)
+        
+        Args:
+            limit: Maximum number of entries to load
+            
+        Returns:
+            List of cached response payloads
+        """
+        if not self.settings.cache.enable_caching:
+            return []
+        
+        try:
+            keys = []
+            async for key in self.client.scan_iter(match="llm_response:*"):
+                keys.append(key)
+                if len(keys) >= limit:
+                    break
+            
+            if not keys:
+                return []
+            
+            values = await self.client.mget(keys)
+            return [json.loads(value) for value in values if value]
+            
+        except Exception as e:
+            logger.error(f"Error scanning LLM responses: {e}")
+            return []
+    
     # ===== TTS Audio Cache =====
     
     async def cache_tts_audio(self, text: str, audio_data: bytes):
@@ -0,0 +1,137 @@
+"""
+Streaming Command Dispatch
+Starts safe commands as soon as their element of the streamed "commands" array closes
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Commands that are harmless to run before the rest of the reply is known
+SAFE_COMMAND_TYPES = {"launch_app", "fan_control"}
+
+
+def _normalize(command: Any) -> Optional[Dict[str, Any]]:
+    """Same shape the response decoder gives the final reply's commands"""
+    if not isinstance(command, dict) or not isinstance(command.get("type"), str):
+        return None
+    params = command.get("params")
+    return {**command, "params": params if isinstance(params, dict) else {}}
+
+
+def _same(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a.get("type") == b.get("type") and a.get("params") == b.get("params")
+
+
+class _DispatchStats:
+    """Outcomes of streaming dispatch across turns"""
+
+    def __init__(self):
+        self.turns = 0
+        self.dispatched = 0
+        self.deferred = 0
+        self.orphaned = 0
+        self.lead_ms = 0.0
+
+
+_stats = _DispatchStats()
+
+
+class StreamingDispatcher:
+    """
+    Runs the safe commands of one streamed reply while it is still generating
+
+    Command elements arrive in array order. Safe commands are chained so they
+    still execute one after another, in order, and everything else waits for
+    the complete reply. Once an element that is not safe has been seen, later
+    safe commands wait too, so e.g. a kill_process + launch_app restart is
+    never reordered. System commands (lock, shutdown, ...) always run last,
+    after the early commands have finished. Nothing starts until the pass
+    is known to be final, under the same rules as early speech.
+    """
+
+    def __init__(self, executor: Any):
+        self.executor = executor
+        self.dispatched: List[Tuple[Dict[str, Any], asyncio.Task, float]] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._blocked = False
+        self._released = False
+
+    def add(self, element: Any):
+        """A command element of the streamed reply closed"""
+        command = _normalize(element)
+        if command is None or self._blocked:
+            return
+        kind = command["type"]
+        if kind == "system_command":
+            return  # Runs last regardless of its position
+        if kind not in SAFE_COMMAND_TYPES:
+            self._blocked = True
+            return
+        # A retried stream repeats its elements
+        if any(_same(command, seen) for seen in self._pending) or any(_same(command, seen) for seen, _, _ in self.dispatched):
+            return
+        self._pending.append(command)
+        if self._released:
+            self.start()
+
+    def start(self):
+        """The pass is final: start buffered commands, and later ones as they arrive"""
+        self._released = True
+        for command in self._pending:
+            previous = self.dispatched[-1][1] if self.dispatched else None
+            task = asyncio.create_task(self._run(command, previous))
+            self.dispatched.append((command, task, time.perf_counter()))
+        self._pending.clear()
+
+    async def _run(self, command: Dict[str, Any], previous: Optional[asyncio.Task]) -> Dict[str, Any]:
+        if previous is not None:
+            await asyncio.wait({previous})
+        logger.info(f"⚡ Dispatching {command['type']} while the reply is still streaming")
+        return await self.executor.execute(command)
+
+    async def finish(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Execute the complete reply's commands, reusing the ones already started
+
+        Args:
+            commands: Commands of the final reply
+
+        Returns:
+            Result of every executed command, early ones first
+        """
+        now = time.perf_counter()
+        remaining = list(commands)
+        results = []
+        for command, task, started in self.dispatched:
+            _stats.lead_ms += (now - started) * 1000
+            match = next((i for i, cmd in enumerate(remaining) if _same(cmd, command)), None)
+            if match is None:
+                _stats.orphaned += 1
+                logger.warning(f"Dispatched {command['type']} is missing from the final reply")
+            else:
+                remaining.pop(match)
+            results.append(await task)
+
+        # System commands always run last (see MULTI-COMMAND EXECUTION ORDER)
+        remaining.sort(key=lambda cmd: cmd.get("type") == "system_command")
+        _stats.turns += 1
+        _stats.dispatched += len(self.dispatched)
+        _stats.deferred += len(remaining)
+        results.extend(await self.executor.execute_multiple(remaining))
+        return results
+
+
+def get_streaming_dispatch_stats() -> Dict[str, Any]:
+    """Get streaming dispatch statistics"""
+    return {
+        "turns": _stats.turns,
+        "dispatched": _stats.dispatched,
+        "deferred": _stats.deferred,
+        "orphaned": _stats.orphaned,
+        "avg_lead_ms": _stats.lead_ms / max(_stats.dispatched, 1),
+    }
@@ -144,6 +144,21 @@ async def initialize_services():
         except Exception as e:
             logger.warning(f"Could not start system context cache: {e}")
         
+        # 1.5. Warm the LLM response cache from Redis in background
+        if settings.cache.enable_response_cache:
+            from src.ai.response_cache import get_response_cache
+            asyncio.create_task(get_response_cache().warm())
+        
+        # 1.6. Train the local intent classifier on new history in background
+        if settings.app.enable_intent_classifier:
+            from src.core.intent_classifier import get_intent_classifier
+            get_intent_classifier().start_background_training()
+        
+        # 1.7. Index new exchanges into long-term memory in background
+        if settings.app.enable_memory:
+            from src.core.memory_index import get_memory_index
+            get_memory_index().start_background_refresh()
+        
         # 2. Initialize assistant
         logger.info("Initializing assistant...")
         assistant = await get_assistant()
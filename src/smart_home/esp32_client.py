@@ -2,6 +2,7 @@
 ESP32 Smart Home Client
 Controls ESP32-based smart home devices (fan control) with retry logic
 """
+import re
 import asyncio
 import logging
 from typing import Optional, Dict, Any
@@ -9,9 +10,63 @@ import httpx
 
 from src.utils.config import get_settings
 from src.utils.logger import get_logger
+from src.utils.http_transport import get_http_transport
 
 logger = get_logger(__name__)
 
+_SPEED_NUMBER = re.compile(r"\bspeed\s*[:=]?\s*([1-3])\b")
+
+# Modes the fan firmware cycles through; anything else after "mode" is not a mode name
+_FAN_MODES = ("normal", "natural", "breeze", "sleep", "auto", "turbo")
+_MODE_NAME = re.compile(r"\b(" + "|".join(_FAN_MODES) + r")\b")
+
+# Output reporting a failure must never be read as a state
+_FAILURE = re.compile(r"\b(?:error|fail(?:ed|s|ure)?|could\s*not|couldn't|cannot|can't|unable|invalid)\b")
+
+_OFF = re.compile(r"\bfan\b.*\boff\b|\boff\b.*\bfan\b|^\s*off\b|\bstopped\b")
+_ON = re.compile(r"\bfan\b.*\b(?:on|running)\b|^\s*on\b")
+
+
+def parse_fan_response(response_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse ESP32 fan output ("Fan speed 2", "Fan OFF", "Mode: breeze")
+    
+    Only output that unambiguously reports a state is parsed; errors and
+    anything else return None, so callers can fall back to the raw text.
+    
+    Args:
+        response_text: Raw text returned by the ESP32
+        
+    Returns:
+        Dict with state ("on" or "off"), speed (1-3, 0 when off, or None)
+        and mode (a known mode name or None), or None if not recognised
+    """
+    text = (response_text or "").lower()
+    if not text.strip() or _FAILURE.search(text):
+        return None
+    
+    speed_match = _SPEED_NUMBER.search(text)
+    mode_match = _MODE_NAME.search(text) if "mode" in text else None
+    mode = mode_match.group(1) if mode_match else None
+    
+    # Determine fan state from response
+    if _OFF.search(text):
+        state, speed = "off", 0
+    elif speed_match:
+        state, speed = "on", int(speed_match.group(1))
+    elif re.search(r"\bhigh\b", text):
+        state, speed = "on", 3
+    elif re.search(r"\bmedium\b", text):
+        state, speed = "on", 2
+    elif re.search(r"\blow\b", text):
+        state, speed = "on", 1
+    elif mode or _ON.search(text):
+        state, speed = "on", None  # Unknown speed
+    else:
+        return None
+    
+    return {"state": state, "speed": speed, "mode": mode}
+
 
 class ESP32Client:
     """
@@ -24,7 +79,7 @@ class ESP32Client:
         self.ip_address = self.settings.esp32.ip_address
         self.timeout = self.settings.esp32.timeout
         self.retry_attempts = self.settings.esp32.retry_attempts
-        self.client = httpx.AsyncClient(timeout=self.timeout)
+        self.client = get_http_transport().client_for(f"http://{self.ip_address}", timeout=self.timeout)
         
     async def _request(self, endpoint: str, retries: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -132,32 +187,11 @@ class ESP32Client:
         if not result.get("success"):
             return {"state": "unknown"}
         
-        # Parse the status response
-        response_text = result.get("data", "").lower()
-        
-        # Determine fan state from response
-        if "off" in response_text or "stopped" in response_text:
-            state = "off"
-            speed = 0
-        elif "speed 3" in response_text or "high" in response_text:
-            state = "on"
-            speed = 3
-        elif "speed 2" in response_text or "medium" in response_text:
-            state = "on"
-            speed = 2
-        elif "speed 1" in response_text or "low" in response_text:
-            state = "on"
-            speed = 1
-        elif "on" in response_text:
-            state = "on"
-            speed = None  # Unknown speed
-        else:
-            state = "unknown"
-            speed = None
+        parsed = parse_fan_response(result.get("data", "")) or {"state": "unknown", "speed": None}
         
         return {
-            "state": state,
-            "speed": speed,
+            "state": parsed["state"],
+            "speed": parsed["speed"],
             "raw_response": result.get("data", "")
         }
     
@@ -170,8 +204,8 @@ class ESP32Client:
         return result.get("success", False)
     
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Release HTTP client (the shared transport owns the connection pool)"""
+        self.client = None
 
 
 # Global instance
@@ -0,0 +1,117 @@
+"""
+ESP32 Feedback Phrasing
+Turns parsed device output into short spoken sentences without an LLM call
+"""
+import random
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.smart_home.esp32_client import parse_fan_response
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SPEED_NAMES = {1: "low", 2: "medium", 3: "high"}
+
+# Phrase tables keyed by (state, speed) - {speed} and {speed_name} are filled in
+_FAN_PHRASES: Dict[Tuple[str, Any], List[str]] = {
+    ("off", 0): [
+        "Fan's off.",
+        "The fan is off now.",
+        "Fan turned off.",
+        "Done, the fan is off.",
+    ],
+    ("on", "speed"): [
+        "Fan's on speed {speed}.",
+        "Fan running at speed {speed}.",
+        "Fan set to {speed_name}, speed {speed}.",
+        "Done, fan's at speed {speed}.",
+    ],
+    ("on", None): [
+        "Fan's on.",
+        "The fan is running.",
+        "Fan turned on.",
+    ],
+}
+
+_MODE_PHRASES = [
+    "Fan switched to {mode} mode.",
+    "Fan's in {mode} mode now.",
+    "Done, {mode} mode is on.",
+]
+
+
+class FeedbackPhraser:
+    """
+    Phrase-table engine for ESP32 fan feedback
+
+    Device output is parsed with the same parser as ESP32Client.get_status;
+    recognised states map to a rotating set of templates so repeated
+    commands don't sound robotic. Errors and unrecognised output return
+    None and the caller decides whether to ask the LLM.
+    """
+
+    def __init__(self):
+        self._last: Dict[Tuple[str, Any], str] = {}
+
+        # Stats
+        self.phrased = 0
+        self.unrecognized = 0
+
+    def phrase(self, device_response: str) -> Optional[str]:
+        """
+        Phrase a device response for speech
+
+        Args:
+            device_response: Raw ESP32 response text
+
+        Returns:
+            Spoken sentence, or None if the output was not recognised
+        """
+        parsed = parse_fan_response(device_response)
+
+        if parsed is None:
+            self.unrecognized += 1
+            return None
+        if parsed["mode"]:
+            key = ("mode", parsed["mode"])
+            templates = _MODE_PHRASES
+        elif parsed["state"] == "off":
+            key = ("off", 0)
+            templates = _FAN_PHRASES[key]
+        else:
+            key = ("on", "speed" if parsed["speed"] else None)
+            templates = _FAN_PHRASES[key]
+
+        # Vary the wording, but never repeat the previous sentence for a state
+        choices = [t for t in templates if t != self._last.get(key)] or templates
+        template = random.choice(choices)
+        self._last[key] = template
+        self.phrased += 1
+
+        return template.format(
+            speed=parsed["speed"],
+            speed_name=_SPEED_NAMES.get(parsed["speed"], ""),
+            mode=parsed["mode"],
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get phrasing statistics"""
+        total = self.phrased + self.unrecognized
+        return {
+            "phrased_locally": self.phrased,
+            "llm_fallbacks": self.unrecognized,
+            "local_rate": (self.phrased / max(total, 1)) * 100,
+        }
+
+
+# Global instance
+_feedback_phraser: Optional[FeedbackPhraser] = None
+
+
+def get_feedback_phraser() -> FeedbackPhraser:
+    """Get or create global feedback phraser"""
+    global _feedback_phraser
+    if _feedback_phraser is None:
+        _feedback_phraser = FeedbackPhraser()
+    return _feedback_phraser
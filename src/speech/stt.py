@@ -3,20 +3,52 @@ Speech-to-Text (STT) System with Caching
 Migrated and enhanced from original speech_recognition_system.py
 """
 import asyncio
+import json
 import logging
-from typing import Optional, Tuple
+import os
+import time
+from collections import deque
+from typing import List, Optional, Tuple, Callable
 import speech_recognition as sr
 
+try:
+    import numpy as np
+    import pyaudio
+    import vosk
+    STREAMING_AVAILABLE = True
+except ImportError:
+    STREAMING_AVAILABLE = False
+
 from src.database.redis_client import get_redis_client
 from src.utils.config import get_settings
+from src.utils.latency import get_latency_tracker
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Streaming capture: 16 kHz mono int16 in 100 ms blocks (what Vosk expects)
+_RATE = 16000
+_BLOCK = 1600
+_BLOCK_SECONDS = _BLOCK / _RATE
+_PHRASE_TIME_LIMIT = 5.0
+
+STT_BACKENDS = ("google", "vosk")
+
 
 class STTEngine:
     """
     Speech-to-Text engine with Redis caching and concurrent processing
+    
+    With stt_streaming_partials on, audio is captured in 100 ms blocks and
+    fed to a Vosk recognizer while the user is still speaking. A partial
+    hypothesis that stays the same for stt_partial_stable_frames blocks is
+    handed to the on_partial callback (on the event loop) so NLU can start
+    early.
+    
+    The final transcript comes from the stt_backend: "google" uploads the
+    whole utterance once it has ended, "vosk" keeps the streaming recognizer
+    and takes its final hypothesis the moment endpointing fires, offline.
+    Time from endpoint to transcript is recorded as stt.<backend>.
     """
     
     def __init__(self):
@@ -36,14 +68,33 @@ class STTEngine:
         self.recognizer.dynamic_energy_threshold = False
         self.recognizer.non_speaking_duration = 0.3  # FASTER: Detect end of speech quickly
         
-        logger.info(f"STT Engine initialized: energy={self.energy_threshold}, pause={self.pause_threshold}")
+        # Final transcript backend
+        self.backend = self.settings.speech.stt_backend
+        if self.backend not in STT_BACKENDS:
+            logger.warning(f"STT: Unknown backend '{self.backend}' - using google")
+            self.backend = "google"
+        if self.backend == "vosk" and not STREAMING_AVAILABLE:
+            logger.warning("STT: vosk backend needs numpy, pyaudio and vosk - using google")
+            self.backend = "google"
+        
+        # Streaming recognition (Vosk model loaded on first use)
+        self.streaming = (self.backend == "vosk" or self.settings.speech.stt_streaming_partials) and STREAMING_AVAILABLE
+        self.stable_frames = max(self.settings.speech.stt_partial_stable_frames, 1)
+        self._vosk_model = None
+        
+        logger.info(f"STT Engine initialized: backend={self.backend}, energy={self.energy_threshold}, pause={self.pause_threshold}")
     
-    async def transcribe(self, play_activation_sound: bool = True) -> Tuple[bool, Optional[str], Optional[str]]:
+    async def transcribe(
+        self,
+        play_activation_sound: bool = True,
+        on_partial: Optional[Callable[[str], None]] = None
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
         """
         Listen and transcribe speech to text
         
         Args:
             play_activation_sound: Whether to play activation sound when mic starts
+            on_partial: Called with each stable partial transcript while the user speaks
         
         Returns:
             Tuple of (success, text, error_message)
@@ -64,7 +115,12 @@ class STTEngine:
             
             # Run blocking listen operation in thread pool
             loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, self._listen_sync)
+            wants_stream = self.backend == "vosk" or on_partial is not None
+            if self.streaming and wants_stream and await loop.run_in_executor(None, self._load_vosk_model):
+                emit = (lambda text: loop.call_soon_threadsafe(on_partial, text)) if on_partial else None
+                result = await loop.run_in_executor(None, self._listen_streaming_sync, emit)
+            else:
+                result = await loop.run_in_executor(None, self._listen_sync)
             
             # Broadcast idle status after listening completes
             try:
@@ -100,29 +156,148 @@ class STTEngine:
                     logger.info("STT: Timeout - no speech detected")
                     return False, None, "timeout"
                 
-                # Recognize speech
-                try:
-                    text = self.recognizer.recognize_google(audio, language=self.language)
-                    
-                    if text:
-                        logger.info(f"STT: Recognized: '{text}'")
-                        return True, text, None
-                    else:
-                        logger.warning("STT: Empty recognition result")
-                        return False, None, "No speech detected"
-                        
-                except sr.UnknownValueError:
-                    logger.warning("STT: Could not understand audio")
-                    return False, None, "Could not understand speech"
-                    
-                except sr.RequestError as e:
-                    logger.error(f"STT: API error: {e}")
-                    return False, None, f"Speech service error: {str(e)}"
+                return self._recognize(audio)
                     
         except Exception as e:
             logger.error(f"STT: Exception: {e}")
             return False, None, str(e)
     
+    def _listen_streaming_sync(self, on_partial: Optional[Callable[[str], None]]) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Listen with a streaming Vosk recognizer (runs in thread pool)
+        
+        Endpointing mirrors the recognizer settings: speech starts above the
+        energy threshold, and ends after pause_threshold seconds of silence
+        or the 5 second phrase limit. Segments Vosk finalizes on its own
+        (short pauses mid-utterance) are kept, so partials and the vosk
+        transcript cover the whole utterance.
+        """
+        audio = None
+        stream = None
+        try:
+            audio = pyaudio.PyAudio()
+            stream = audio.open(format=pyaudio.paInt16, channels=1, rate=_RATE, input=True, frames_per_buffer=_BLOCK)
+            recognizer = vosk.KaldiRecognizer(self._vosk_model, _RATE)
+            logger.debug("STT: Microphone ready (streaming)")
+            
+            preroll: deque = deque(maxlen=max(int(self.recognizer.non_speaking_duration / _BLOCK_SECONDS), 1))
+            frames = []
+            waited = 0.0
+            silence = 0.0
+            segments: List[str] = []
+            partial, stable, emitted = "", 0, ""
+            
+            while True:
+                data = stream.read(_BLOCK, exception_on_overflow=False)
+                samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+                speaking = np.sqrt(np.mean(samples * samples)) > self.recognizer.energy_threshold
+                
+                if not frames:
+                    # Waiting for speech to start
+                    preroll.append(data)
+                    waited += _BLOCK_SECONDS
+                    if not speaking:
+                        if waited >= self.timeout:
+                            logger.info("STT: Timeout - no speech detected")
+                            return False, None, "timeout"
+                        continue
+                    frames.extend(preroll)
+                    for block in preroll:
+                        recognizer.AcceptWaveform(block)
+                    continue
+                
+                frames.append(data)
+                silence = 0.0 if speaking else silence + _BLOCK_SECONDS
+                if silence >= self.recognizer.pause_threshold or len(frames) * _BLOCK_SECONDS >= _PHRASE_TIME_LIMIT:
+                    break
+                
+                # A hypothesis that holds for stable_frames blocks is worth acting on
+                if recognizer.AcceptWaveform(data):
+                    segments.append(json.loads(recognizer.Result()).get("text", ""))
+                    text = ""
+                else:
+                    text = json.loads(recognizer.PartialResult()).get("partial", "")
+                hypothesis = " ".join(part for part in (*segments, text) if part)
+                stable = stable + 1 if hypothesis == partial else 1
+                partial = hypothesis
+                if on_partial and partial and stable >= self.stable_frames and partial != emitted:
+                    emitted = partial
+                    logger.debug(f"STT: Stable partial: '{partial}'")
+                    on_partial(partial)
+            
+            logger.debug("STT: Audio captured")
+            if self.backend == "vosk":
+                return self._recognize_vosk(recognizer, segments)
+            return self._recognize(sr.AudioData(b"".join(frames), _RATE, 2))
+        
+        except Exception as e:
+            logger.error(f"STT: Exception: {e}")
+            return False, None, str(e)
+        finally:
+            if stream is not None:
+                try:
+                    stream.stop_stream()
+                    stream.close()
+                except Exception:
+                    pass
+            if audio is not None:
+                audio.terminate()
+    
+    def _recognize(self, audio: "sr.AudioData") -> Tuple[bool, Optional[str], Optional[str]]:
+        """Final transcript of a captured utterance (Google web API)"""
+        try:
+            start = time.perf_counter()
+            text = self.recognizer.recognize_google(audio, language=self.language)
+            get_latency_tracker().record("stt.google", (time.perf_counter() - start) * 1000)
+            
+            if text:
+                logger.info(f"STT: Recognized: '{text}'")
+                return True, text, None
+            else:
+                logger.warning("STT: Empty recognition result")
+                return False, None, "No speech detected"
+                
+        except sr.UnknownValueError:
+            logger.warning("STT: Could not understand audio")
+            return False, None, "Could not understand speech"
+            
+        except sr.RequestError as e:
+            logger.error(f"STT: API error: {e}")
+            return False, None, f"Speech service error: {str(e)}"
+    
+    def _recognize_vosk(self, recognizer: "vosk.KaldiRecognizer", segments: List[str]) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Final transcript from the streaming recognizer (only the last few blocks are still undecoded)"""
+        start = time.perf_counter()
+        tail = json.loads(recognizer.FinalResult()).get("text", "")
+        text = " ".join(part for part in (*segments, tail) if part)
+        get_latency_tracker().record("stt.vosk", (time.perf_counter() - start) * 1000)
+        
+        if text:
+            logger.info(f"STT: Recognized (vosk): '{text}'")
+            return True, text, None
+        logger.warning("STT: Could not understand audio")
+        return False, None, "Could not understand speech"
+    
+    def _load_vosk_model(self) -> bool:
+        """Load the Vosk model; on failure streaming is turned off and google is used"""
+        if self._vosk_model is not None:
+            return True
+        try:
+            model_path = self.settings.speech.vosk_model_path
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"Vosk model not found at: {model_path}")
+            start = time.perf_counter()
+            self._vosk_model = vosk.Model(model_path)
+            logger.info(f"STT: Vosk model loaded for streaming recognition ({(time.perf_counter() - start) * 1000:.0f} ms)")
+            return True
+        except Exception as e:
+            logger.warning(f"STT: Streaming recognition disabled: {e}")
+            self.streaming = False
+            if self.backend == "vosk":
+                logger.warning("STT: Falling back to the google backend")
+                self.backend = "google"
+            return False
+    
     def adjust_for_ambient_noise(self, duration: float = 1.0):
         """Adjust for ambient noise (run once at startup)"""
         try:
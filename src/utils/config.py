@@ -2,7 +2,7 @@
 Configuration Management with Pydantic
 Handles all application settings with type validation and environment variable support
 """
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -18,11 +18,72 @@ class GeminiConfig(BaseSettings):
     
     api_key: str = Field(default="", description="Google Gemini API Key")
     model: str = Field(default="gemini-2.0-flash-exp", description="Gemini model to use")
+    escalation_models: str = Field(default="", description="Comma-separated larger Gemini models, smallest first, for complex or failed turns")
     max_tokens: int = Field(default=500, description="Maximum tokens in response")
     temperature: float = Field(default=0.3, description="Response creativity (0-1)")
+    stream: bool = Field(default=True, description="Stream completions so speech can start before the JSON is complete")
+    request_timeout: float = Field(default=30.0, description="Gemini request timeout in seconds")
+    rpm: int = Field(default=15, description="Requests per minute allowed by the Gemini quota")
+    burst: int = Field(default=3, description="Requests that may be sent back-to-back before pacing")
+
+    def model_tiers(self) -> List[str]:
+        """Models from smallest to largest: the configured model, then escalation_models"""
+        return [self.model] + [m.strip() for m in self.escalation_models.split(",") if m.strip()]
+    
+    def model_for_tier(self, tier: Optional[int]) -> str:
+        """Model of a tier (clamped to the largest configured)"""
+        tiers = self.model_tiers()
+        return tiers[min(tier or 0, len(tiers) - 1)]
+
+
+class OpenAICompatibleConfig(BaseSettings):
+    """
+    OpenAI-compatible chat completions backend
+    
+    Every API key is used on every endpoint; each key has its own rpm/burst
+    quota and max_concurrency, whichever endpoint it is sent to, so
+    throughput scales with keys.
+    """
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"
+    )
+    
+    api_key: str = Field(default="", description="API key")
+    api_keys: str = Field(default="", description="Comma-separated additional API keys, each with its own quota")
+    base_url: str = Field(default="", description="Chat completions endpoint")
+    base_urls: str = Field(default="", description="Comma-separated additional endpoints serving the same models")
+    model: str = Field(default="", description="Model to use")
+    escalation_models: str = Field(default="", description="Comma-separated larger models, smallest first, for complex or failed turns")
+    max_tokens: int = Field(default=500, description="Maximum tokens in response")
+    temperature: float = Field(default=0.3, description="Response creativity (0-1)")
+    stream: bool = Field(default=True, description="Stream completions so speech can start before the JSON is complete")
+    rpm: int = Field(default=30, description="Requests per minute allowed per API key")
+    burst: int = Field(default=5, description="Requests that may be sent back-to-back per API key before pacing")
+    max_concurrency: int = Field(default=4, description="Requests in flight per API key")
+    
+    def keys(self) -> List[str]:
+        """All configured API keys, primary first"""
+        keys = [self.api_key] + [k.strip() for k in self.api_keys.split(",")]
+        return list(dict.fromkeys(k for k in keys if k))
+    
+    def endpoints(self) -> List[str]:
+        """All configured endpoints, primary first"""
+        urls = [self.base_url] + [u.strip() for u in self.base_urls.split(",")]
+        return list(dict.fromkeys(u for u in urls if u))
+    
+    def model_tiers(self) -> List[str]:
+        """Models from smallest to largest: the configured model, then escalation_models"""
+        return [self.model] + [m.strip() for m in self.escalation_models.split(",") if m.strip()]
+    
+    def model_for_tier(self, tier: Optional[int]) -> str:
+        """Model of a tier (clamped to the largest configured)"""
+        tiers = self.model_tiers()
+        return tiers[min(tier or 0, len(tiers) - 1)]
 
 
-class GroqConfig(BaseSettings):
+class GroqConfig(OpenAICompatibleConfig):
     """Groq AI API Configuration - Fallback option"""
     model_config = SettingsConfigDict(
         env_prefix="GROQ_",
@@ -34,8 +95,26 @@ class GroqConfig(BaseSettings):
     api_key: str = Field(default="", description="Groq Cloud API Key")
     base_url: str = Field(default="https://api.groq.com/openai/v1/chat/completions", description="Groq API endpoint")
     model: str = Field(default="llama-3.1-8b-instant", description="Groq model to use")
-    max_tokens: int = Field(default=500, description="Maximum tokens in response")
-    temperature: float = Field(default=0.3, description="Response creativity (0-1)")
+    escalation_models: str = Field(default="llama-3.3-70b-versatile", description="Comma-separated larger Groq models, smallest first, for complex or failed turns")
+    rpm: int = Field(default=30, description="Requests per minute allowed by the Groq quota (per key)")
+    burst: int = Field(default=5, description="Requests that may be sent back-to-back before pacing")
+
+
+class QwenConfig(OpenAICompatibleConfig):
+    """Alibaba Cloud Qwen Configuration (DashScope OpenAI-compatible mode)"""
+    model_config = SettingsConfigDict(
+        env_prefix="QWEN_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"
+    )
+    
+    api_key: str = Field(default="", description="DashScope API Key")
+    base_url: str = Field(default="https://dashscope-intl.aliyuncs.com/compatible-mode/v1/chat/completions", description="Qwen API endpoint")
+    model: str = Field(default="qwen-turbo", description="Qwen model to use")
+    escalation_models: str = Field(default="qwen-plus", description="Comma-separated larger Qwen models, smallest first, for complex or failed turns")
+    rpm: int = Field(default=60, description="Requests per minute allowed by the Qwen quota (per key)")
+    burst: int = Field(default=5, description="Requests that may be sent back-to-back before pacing")
 
 
 class DatabaseConfig(BaseSettings):
@@ -83,7 +162,55 @@ class AppConfig(BaseSettings):
     toggle_hotkey: str = Field(default="ctrl+shift+w", description="Hotkey to toggle wake word listening on/off")
     debug: bool = Field(default=False, description="Enable debug mode")
     enable_enhanced_responses: bool = Field(default=True, description="Enable ESP32-based response enhancement")
-    llm_provider: str = Field(default="gemini", description="LLM provider to use (gemini or groq)")
+    enable_llm_feedback_fallback: bool = Field(default=True, description="Ask the LLM to phrase ESP32 output the local phraser does not recognise")
+    llm_provider: str = Field(default="gemini", description="LLM provider to use (gemini, auto, or one of openai_providers)")
+    openai_providers: str = Field(default="groq,qwen", description="Comma-separated OpenAI-compatible backends, each configured by <NAME>_API_KEY, <NAME>_BASE_URL, <NAME>_MODEL, ...")
+    enable_fast_path: bool = Field(default=True, description="Answer common commands locally without the LLM")
+    fast_path_min_confidence: float = Field(default=1.0, description="Fraction of the utterance the fast path must understand")
+    enable_intent_classifier: bool = Field(default=True, description="Answer repeat commands with the self-trained local classifier")
+    intent_classifier_confidence: float = Field(default=0.97, description="Posterior needed to answer without the LLM")
+    intent_classifier_min_support: int = Field(default=3, description="Training examples a command template needs before it is answered locally")
+    intent_retrain_interval: float = Field(default=600.0, description="Seconds between incremental classifier training runs (0 trains once at startup)")
+    intent_model_path: str = Field(default="data/intent_model.npz", description="Where the trained classifier is stored")
+    output_protocol: str = Field(default="json", description="LLM reply format: json, compact (short keys and templates) or ab (split turns between both)")
+    compact_protocol_share: float = Field(default=0.5, description="Fraction of LLM turns using the compact protocol in ab mode")
+    pass1_prompt_profile: str = Field(default="slim", description="System prompt for Pass 1: slim (pass1_prompt) or full (system_prompt)")
+    pass1_max_tokens: int = Field(default=160, description="Completion token limit of a slim Pass 1 (a cut-off reply escalates to the full prompt)")
+    enable_model_tiers: bool = Field(default=True, description="Start complex turns on a larger model (see escalation_models)")
+    model_tier_threshold: int = Field(default=2, description="Complexity points per tier a turn starts above the base model")
+    model_tier_escalation: bool = Field(default=True, description="Retry on the next larger model when a reply fails validation")
+    enable_summarization: bool = Field(default=True, description="Fold older turns into a running conversation summary in the background")
+    summary_trigger_tokens: int = Field(default=400, description="Verbatim history size (estimated tokens) that triggers summarization")
+    summary_keep_messages: int = Field(default=4, description="Most recent messages always kept verbatim")
+    summary_max_tokens: int = Field(default=120, description="Completion token limit of a summarization call")
+    enable_memory: bool = Field(default=True, description="Inject relevant past exchanges from the long-term memory index")
+    memory_index_path: str = Field(default="data/memory_index.jsonl", description="On-disk long-term memory index")
+    memory_top_k: int = Field(default=3, description="Most past exchanges injected per turn")
+    memory_min_score: float = Field(default=0.4, description="Normalized BM25 score (0-1) a past exchange needs to be injected")
+    memory_budget_ms: float = Field(default=5.0, description="Latency budget of a memory lookup")
+    memory_refresh_interval: float = Field(default=120.0, description="Seconds between incremental memory index updates (0 = startup only)")
+    enable_partial_speculation: bool = Field(default=False, description="Issue Pass 1 speculatively on stable partial transcripts")
+    enable_streaming_dispatch: bool = Field(default=True, description="Start safe commands (launch_app, fan_control) as their element of the streamed reply closes")
+    enable_context_prediction: bool = Field(default=True, description="Predict needs_context and issue Pass 2 speculatively")
+    enable_context_ranking: bool = Field(default=True, description="Rank installed apps / running processes against the utterance instead of sending the first N")
+    context_rank_token_budget: int = Field(default=60, description="Estimated tokens each ranked system context list may use")
+    context_rank_history: int = Field(default=1000, description="Most recent commands read for launch frequency and recency")
+    context_skip_pass1_confidence: float = Field(default=0.9, description="Prediction confidence at which Pass 1 is skipped entirely")
+    context_skip_verify_rate: float = Field(default=0.1, description="Fraction of skips that still run Pass 1 to check the prediction")
+    prompt_token_budget: int = Field(default=6000, description="Maximum estimated prompt tokens per LLM pass")
+    llm_hedging: bool = Field(default=False, description="Hedge slow LLM requests to the other provider")
+    hedge_delay_ms: float = Field(default=800.0, description="Hedge delay used until enough latency samples exist")
+    hedge_percentile: float = Field(default=95.0, description="Primary latency percentile after which a request is hedged")
+    circuit_failure_threshold: int = Field(default=3, description="Consecutive failures that open a provider's circuit (auto provider)")
+    circuit_cooldown: float = Field(default=30.0, description="Seconds an open circuit waits before a trial request")
+    llm_timeout_multiplier: float = Field(default=2.0, description="Request timeout as a multiple of the provider's p99 latency")
+    llm_min_timeout: float = Field(default=4.0, description="Lower bound of the adaptive LLM request timeout (seconds)")
+    llm_max_timeout: float = Field(default=30.0, description="Upper bound of the adaptive LLM request timeout (seconds)")
+    llm_record_path: str = Field(default="", description="Append every LLM exchange to this JSONL cassette for offline benchmarks (empty disables)")
+    
+    def openai_provider_names(self) -> List[str]:
+        """Names of the configured OpenAI-compatible backends"""
+        return [name.strip().lower() for name in self.openai_providers.split(",") if name.strip()]
 
 
 class APIConfig(BaseSettings):
@@ -122,6 +249,9 @@ class SpeechConfig(BaseSettings):
     stt_energy_threshold: int = Field(default=600, description="Audio energy threshold")
     stt_pause_threshold: float = Field(default=0.8, description="Pause detection threshold")
     vosk_model_path: str = Field(default="vosk_models/vosk-model-small-en-us-0.15", description="Vosk model path")
+    stt_backend: str = Field(default="google", description="Final transcript from google (web API on the whole utterance) or vosk (offline, streamed while speaking)")
+    stt_streaming_partials: bool = Field(default=False, description="Stream Vosk partial transcripts while listening (with the google backend)")
+    stt_partial_stable_frames: int = Field(default=4, description="100 ms blocks a partial transcript must hold before it is acted on")
     
     # Porcupine Wake Word Settings
     porcupine_access_key: str = Field(default="", description="Picovoice AccessKey for Porcupine")
@@ -137,6 +267,26 @@ class CacheConfig(BaseSettings):
     ttl_app_paths: int = Field(default=86400, description="App paths cache TTL")
     ttl_llm_response: int = Field(default=3600, description="LLM response cache TTL")
     ttl_tts_audio: int = Field(default=604800, description="TTS audio cache TTL (7 days)")
+    enable_response_cache: bool = Field(default=True, description="Reuse LLM responses for repeated/near-duplicate utterances")
+    response_cache_similarity: float = Field(default=0.9, description="Minimum n-gram cosine similarity for a near-duplicate hit")
+    response_cache_max_entries: int = Field(default=2000, description="Maximum in-process response cache entries")
+
+
+class HTTPConfig(BaseSettings):
+    """Shared HTTP Transport Configuration"""
+    model_config = SettingsConfigDict(
+        env_prefix="HTTP_",
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"
+    )
+    
+    http2: bool = Field(default=True, description="Use HTTP/2 for HTTPS hosts (requires the h2 package)")
+    max_connections_per_host: int = Field(default=10, description="Maximum connections per host")
+    max_keepalive_per_host: int = Field(default=5, description="Idle keep-alive connections kept per host")
+    keepalive_expiry: float = Field(default=120.0, description="Seconds an idle connection is kept open")
+    prewarm: bool = Field(default=True, description="Open LLM connections (TLS handshake) at startup")
+    keep_warm_interval: float = Field(default=45.0, description="Ping idle LLM hosts after this many seconds (0 disables)")
 
 
 class Settings(BaseSettings):
@@ -151,6 +301,7 @@ class Settings(BaseSettings):
     # Sub-configurations - all loaded from .env file
     gemini: GeminiConfig = Field(default_factory=GeminiConfig)
     groq: GroqConfig = Field(default_factory=GroqConfig)
+    qwen: QwenConfig = Field(default_factory=QwenConfig)
     database: DatabaseConfig = Field(default_factory=DatabaseConfig)
     redis: RedisConfig = Field(default_factory=RedisConfig)
     app: AppConfig = Field(default_factory=AppConfig)
@@ -158,18 +309,25 @@ class Settings(BaseSettings):
     esp32: ESP32Config = Field(default_factory=ESP32Config)
     speech: SpeechConfig = Field(default_factory=SpeechConfig)
     cache: CacheConfig = Field(default_factory=CacheConfig)
+    http: HTTPConfig = Field(default_factory=HTTPConfig)
     
     def model_post_init(self, __context) -> None:
         """Validate that required env vars are set"""
         # Check LLM provider
+        openai_providers = self.app.openai_provider_names()
         if self.app.llm_provider == "gemini":
             if not self.gemini.api_key:
                 raise ValueError("❌ GEMINI_API_KEY must be set in .env file (or switch to groq)")
-        elif self.app.llm_provider == "groq":
-            if not self.groq.api_key:
-                raise ValueError("❌ GROQ_API_KEY must be set in .env file (or switch to gemini)")
+        elif self.app.llm_provider in openai_providers:
+            if not self.provider(self.app.llm_provider).keys():
+                name = self.app.llm_provider.upper()
+                raise ValueError(f"❌ {name}_API_KEY must be set in .env file (or switch to gemini)")
+        elif self.app.llm_provider == "auto":
+            if not (self.gemini.api_key or any(self.provider(name).keys() for name in openai_providers)):
+                raise ValueError("❌ Set GEMINI_API_KEY and/or GROQ_API_KEY in .env file to use the auto provider")
         else:
-            raise ValueError(f"❌ Invalid LLM provider: {self.app.llm_provider} (use 'gemini' or 'groq')")
+            choices = ", ".join(f"'{name}'" for name in ["gemini", *openai_providers, "auto"])
+            raise ValueError(f"❌ Invalid LLM provider: {self.app.llm_provider} (use {choices})")
         
         if not self.database.database_url:
             raise ValueError("❌ NEON_DATABASE_URL must be set in .env file")  
@@ -179,14 +337,37 @@ class Settings(BaseSettings):
         # Log loaded configuration (hide sensitive data)
         import logging
         logger = logging.getLogger(__name__)
-        if self.app.llm_provider == "gemini":
+        if self.app.llm_provider == "auto":
+            logger.info(f"✅ Config loaded: auto provider routing, API={self.api.host}:{self.api.port}")
+        elif self.app.llm_provider == "gemini":
             logger.info(f"✅ Config loaded: Gemini model={self.gemini.model}, API={self.api.host}:{self.api.port}")
         else:
-            logger.info(f"✅ Config loaded: Groq model={self.groq.model}, API={self.api.host}:{self.api.port}")
+            provider = self.provider(self.app.llm_provider)
+            logger.info(
+                f"✅ Config loaded: {self.app.llm_provider.title()} model={provider.model}, "
+                f"keys={len(provider.keys())}, API={self.api.host}:{self.api.port}"
+            )
+    
+    def provider(self, name: str) -> BaseSettings:
+        """
+        Config of an LLM provider by name
+        
+        Providers without a section here (any OpenAI-compatible backend listed
+        in openai_providers) are read from the environment by their prefix.
+        """
+        config = getattr(self, name, None)
+        if isinstance(config, (GeminiConfig, OpenAICompatibleConfig)):
+            return config
+        config = _extra_providers.get(name)
+        if config is None:
+            config = _extra_providers[name] = OpenAICompatibleConfig(_env_prefix=f"{name.upper()}_")
+        return config
 
 
 # Global settings instance
 settings: Optional[Settings] = None
+# Configs of OpenAI-compatible providers without a section in Settings
+_extra_providers: Dict[str, OpenAICompatibleConfig] = {}
 
 
 def get_settings() -> Settings:
@@ -0,0 +1,219 @@
+"""
+Shared HTTP Transport
+One pooled, keep-alive httpx client per host for LLM and device calls
+"""
+import asyncio
+import time
+import logging
+from typing import Dict, Any, Iterable, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.utils.config import get_settings
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# HTTP/2 needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+# Request extension marking pre-warm / keep-warm pings, which stay out of the request counts
+_WARMUP = "aiden.warmup"
+
+
+class _HostStats:
+    """Connection accounting for one origin"""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.request_connections = 0
+        self.tls_handshakes = 0
+        self.warmup_requests = 0
+        self.http2_requests = 0
+        self.keep_warm_pings = 0
+
+
+class HTTPTransport:
+    """
+    Hands out one pooled httpx.AsyncClient per origin
+
+    A client per origin gives each host its own connection limits, so a
+    slow ESP32 cannot starve LLM requests. HTTPS hosts use HTTP/2 when h2 is
+    installed. Every request carries an httpcore trace hook that counts new
+    TCP connections and TLS handshakes, from which connection reuse is
+    derived. LLM hosts can be pre-warmed at startup and pinged when idle so
+    their connection stays open. The connections and TLS handshakes those
+    pings perform are counted, but the pings themselves are not requests:
+    a real request riding a pre-warmed connection shows up as reused.
+    """
+
+    def __init__(self):
+        self.settings = get_settings().http
+        self.http2 = self.settings.http2 and H2_AVAILABLE
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, _HostStats] = {}
+        self._last_used: Dict[str, float] = {}
+        self._warm_origins: Set[str] = set()
+        self._keep_warm_task: Optional[asyncio.Task] = None
+
+        if self.settings.http2 and not H2_AVAILABLE:
+            logger.warning("h2 not installed - shared HTTP transport falls back to HTTP/1.1 keep-alive")
+
+    @staticmethod
+    def origin(url: str) -> str:
+        """scheme://host[:port] of a URL"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def client_for(self, url: str, timeout: float = 30.0) -> httpx.AsyncClient:
+        """
+        Get the shared client for a URL's host
+
+        Args:
+            url: Any URL on the host
+            timeout: Default timeout for the client if it is created now
+                     (pass timeout= per request to override)
+
+        Returns:
+            Pooled AsyncClient (do not close it; see close_http_transport)
+        """
+        origin = self.origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            use_http2 = self.http2 and origin.startswith("https://")
+            client = httpx.AsyncClient(
+                timeout=timeout,
+                http2=use_http2,
+                limits=httpx.Limits(
+                    max_connections=self.settings.max_connections_per_host,
+                    max_keepalive_connections=self.settings.max_keepalive_per_host,
+                    keepalive_expiry=self.settings.keepalive_expiry,
+                ),
+                event_hooks={"request": [self._hook_for(origin)]},
+            )
+            self._clients[origin] = client
+            self._stats.setdefault(origin, _HostStats())
+            logger.debug(f"HTTP client created for {origin} (http2={use_http2})")
+        return client
+
+    def _hook_for(self, origin: str):
+        """Request hook that attaches the trace callback and marks the host used"""
+        stats = self._stats.setdefault(origin, _HostStats())
+
+        def trace_for(warmup: bool):
+            async def trace(event_name: str, info: Dict[str, Any]):
+                if event_name == "connection.connect_tcp.complete":
+                    stats.connections += 1
+                    if not warmup:
+                        stats.request_connections += 1
+                elif event_name == "connection.start_tls.complete":
+                    stats.tls_handshakes += 1
+                elif warmup:
+                    return
+                elif event_name == "http11.send_request_headers.started":
+                    stats.requests += 1
+                elif event_name == "http2.send_request_headers.started":
+                    stats.requests += 1
+                    stats.http2_requests += 1
+            return trace
+
+        real_trace, warmup_trace = trace_for(False), trace_for(True)
+
+        async def on_request(request: httpx.Request):
+            if request.extensions.get(_WARMUP):
+                stats.warmup_requests += 1
+                request.extensions["trace"] = warmup_trace
+            else:
+                request.extensions["trace"] = real_trace
+            self._last_used[origin] = time.monotonic()
+
+        return on_request
+
+    async def prewarm(self, urls: Iterable[str]):
+        """
+        Open connections (TCP + TLS) ahead of the first real request
+
+        Args:
+            urls: URLs whose hosts should be warmed; they are also kept warm
+        """
+        for url in urls:
+            origin = self.origin(url)
+            self._warm_origins.add(origin)
+            if self.settings.prewarm:
+                await self._ping(origin)
+
+    async def _ping(self, origin: str) -> bool:
+        """Lightweight request that opens or refreshes a pooled connection"""
+        try:
+            await self.client_for(origin).head(origin + "/", timeout=5.0, extensions={_WARMUP: True})
+            return True
+        except Exception as e:
+            logger.debug(f"Warm-up ping to {origin} failed (non-critical): {e}")
+            return False
+
+    def start_keep_warm(self):
+        """Start pinging idle warm hosts in the background"""
+        interval = self.settings.keep_warm_interval
+        if interval <= 0 or (self._keep_warm_task and not self._keep_warm_task.done()):
+            return
+        self._keep_warm_task = asyncio.create_task(self._keep_warm_loop(interval))
+
+    async def _keep_warm_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval / 2)
+            now = time.monotonic()
+            for origin in list(self._warm_origins):
+                if now - self._last_used.get(origin, 0.0) >= interval:
+                    if await self._ping(origin):
+                        self._stats[origin].keep_warm_pings += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-host handshake and connection reuse statistics"""
+        hosts = {}
+        for origin, stats in self._stats.items():
+            reused = max(stats.requests - stats.request_connections, 0)
+            hosts[origin] = {
+                "requests": stats.requests,
+                "connections_opened": stats.connections,
+                "tls_handshakes": stats.tls_handshakes,
+                "warmup_requests": stats.warmup_requests,
+                "reused_requests": reused,
+                "reuse_rate": (reused / max(stats.requests, 1)) * 100,
+                "http2_requests": stats.http2_requests,
+                "keep_warm_pings": stats.keep_warm_pings,
+            }
+        return {"http2": self.http2, "hosts": hosts}
+
+    async def close(self):
+        """Close all pooled clients"""
+        if self._keep_warm_task:
+            self._keep_warm_task.cancel()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# Global instance
+_http_transport: Optional[HTTPTransport] = None
+
+
+def get_http_transport() -> HTTPTransport:
+    """Get or create global HTTP transport"""
+    global _http_transport
+    if _http_transport is None:
+        _http_transport = HTTPTransport()
+    return _http_transport
+
+
+async def close_http_transport():
+    """Close global HTTP transport"""
+    global _http_transport
+    if _http_transport:
+        await _http_transport.close()
+        _http_transport = None
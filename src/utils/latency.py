@@ -0,0 +1,73 @@
+"""
+Latency Tracking
+Rolling per-operation latency samples with percentile queries
+"""
+from collections import deque
+from typing import Deque, Dict, Any, Optional
+
+import numpy as np
+
+
+class LatencyTracker:
+    """
+    Keeps the most recent latency samples for each named operation
+
+    Percentiles are computed over a fixed-size window so they follow the
+    provider's current behaviour rather than its whole history.
+    """
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, name: str, latency_ms: float):
+        """Record one latency sample in milliseconds"""
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(latency_ms)
+
+    def count(self, name: str) -> int:
+        """Number of samples currently held for an operation"""
+        return len(self._samples.get(name, ()))
+
+    def percentile(self, name: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Get a latency percentile for an operation
+
+        Args:
+            name: Operation name
+            percentile: Percentile (0-100)
+            min_samples: Return None until at least this many samples exist
+
+        Returns:
+            Latency in milliseconds, or None if there is not enough data
+        """
+        samples = self._samples.get(name)
+        if not samples or len(samples) < min_samples:
+            return None
+        return float(np.percentile(np.fromiter(samples, dtype=np.float64), percentile))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get p50/p95/p99 for every tracked operation"""
+        return {
+            name: {
+                "samples": len(samples),
+                "p50_ms": self.percentile(name, 50),
+                "p95_ms": self.percentile(name, 95),
+                "p99_ms": self.percentile(name, 99),
+            }
+            for name, samples in self._samples.items()
+        }
+
+
+# Global instance
+_latency_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Get or create global latency tracker"""
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = LatencyTracker()
+    return _latency_tracker
@@ -0,0 +1,153 @@
+"""
+Prompt Registry
+Loads prompts.yaml once, hands out immutable prompts and hot-reloads on change
+"""
+import os
+import time
+import string
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+from pydantic import BaseModel, ConfigDict
+
+from src.utils.logger import get_logger
+from src.utils.tokens import estimate_tokens
+
+logger = get_logger(__name__)
+
+DEFAULT_SYSTEM_PROMPT = "You are Aiden, an intelligent Windows assistant."
+
+# Keys rendered with str.format; everything else (e.g. system_prompt, which
+# is full of JSON braces) is used verbatim
+_TEMPLATE_KEYS = {"conversation_context_template", "enhancement_prompt"}
+
+
+class Prompt(BaseModel):
+    """An immutable prompt with its precomputed token count"""
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    text: str
+    tokens: int
+    fields: Tuple[str, ...] = ()
+    version: int = 0
+
+    def render(self, **values: Any) -> str:
+        """Fill template fields (verbatim prompts are returned unchanged)"""
+        if not self.fields:
+            return self.text
+        return self.text.format(**values)
+
+
+class PromptRegistry:
+    """
+    Single source of prompts for the whole process
+
+    The YAML file is parsed once; afterwards get() only stats the file, and
+    at most every `check_interval` seconds, to pick up edits. Listeners are
+    notified after a reload so derived state (e.g. the intent router's
+    tables) can be rebuilt.
+    """
+
+    def __init__(self, prompts_file: str = "config/prompts.yaml", check_interval: float = 2.0):
+        self.path = Path(prompts_file)
+        self.check_interval = check_interval
+        self.version = 0
+        self._prompts: Dict[str, Prompt] = {}
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._listeners: List[Callable[[], None]] = []
+        self._load()
+
+    def _load(self):
+        """Parse the prompts file and build prompt objects"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            if self._mtime is not None or self.version == 0:
+                logger.warning(f"{self.path} not found, using default prompt")
+            self._mtime = None
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = yaml.safe_load(f) or {}
+        except Exception as e:
+            logger.error(f"Error loading {self.path}: {e}")
+            self._mtime = mtime  # Don't retry a broken file until it changes again
+            return
+
+        version = self.version + 1
+        prompts = {}
+        for name, text in raw.items():
+            if not isinstance(text, str):
+                continue
+            fields = ()
+            if name in _TEMPLATE_KEYS:
+                fields = tuple(f for _, f, _, _ in string.Formatter().parse(text) if f)
+            prompts[name] = Prompt(
+                name=name, text=text, tokens=estimate_tokens(text), fields=fields, version=version
+            )
+
+        self._prompts = prompts
+        self._mtime = mtime
+        self.version = version
+        logger.info(f"Loaded {len(prompts)} prompts from {self.path} (v{version})")
+
+    def _maybe_reload(self):
+        """Reload if the file changed (throttled to one stat per interval)"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        previous = self.version
+        self._load()
+        if self.version != previous:
+            for listener in self._listeners:
+                try:
+                    listener()
+                except Exception as e:
+                    logger.error(f"Prompt reload listener failed: {e}")
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[Prompt]:
+        """
+        Get a prompt by its prompts.yaml key
+
+        Args:
+            name: Key in prompts.yaml
+            default: Text to use if the key is missing
+
+        Returns:
+            Prompt, or None if missing and no default was given
+        """
+        self._maybe_reload()
+        prompt = self._prompts.get(name)
+        if prompt is None and default is not None:
+            prompt = Prompt(name=name, text=default, tokens=estimate_tokens(default), version=self.version)
+        return prompt
+
+    def on_reload(self, listener: Callable[[], None]):
+        """Register a callback to run after the prompts are reloaded"""
+        self._listeners.append(listener)
+
+
+# Global instance
+_prompt_registry: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get or create global prompt registry"""
+    global _prompt_registry
+    if _prompt_registry is None:
+        _prompt_registry = PromptRegistry()
+    return _prompt_registry
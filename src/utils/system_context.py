@@ -263,11 +263,15 @@ class SystemContextProvider:
         
         return processes
     
-    async def get_ai_context(self) -> Dict[str, Any]:
+    async def get_ai_context(self, max_apps: Optional[int] = 80, max_processes: Optional[int] = 60) -> Dict[str, Any]:
         """
         Get system context formatted for AI
         Returns minimal, relevant information to help AI make decisions
         
+        Args:
+            max_apps: Most installed apps returned (None = all, e.g. for ranking)
+            max_processes: Most process names returned (None = all)
+        
         Returns:
             Dictionary with installed_apps and running_processes
         """
@@ -323,8 +327,8 @@ class SystemContextProvider:
             process_list = sorted(priority_processes) + sorted(other_processes)
             
             return {
-                "installed_apps": app_list[:80],  # Limit to 80 with paths
-                "running_processes": process_list[:60],  # Increased to 60 with smart prioritization
+                "installed_apps": app_list[:max_apps],  # Limit to 80 with paths by default
+                "running_processes": process_list[:max_processes],  # 60 with smart prioritization by default
                 "total_apps": len(apps),
                 "total_processes": len(processes)
             }
@@ -0,0 +1,41 @@
+"""
+Text Similarity Helpers
+Hashed character n-gram vectors for fast fuzzy matching of short texts
+"""
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+
+class NGramVectorizer:
+    """
+    Maps short texts to L2-normalized hashed character n-gram vectors
+
+    Cosine similarity between two texts is then a single dot product, and a
+    whole index can be scored with one matrix-vector multiply.
+    """
+
+    def __init__(self, dim: int = 512, ngram_sizes: Iterable[int] = (2, 3, 4)):
+        self.dim = dim
+        self.ngram_sizes = tuple(ngram_sizes)
+
+    def vectorize(self, text: str) -> np.ndarray:
+        """Vectorize a single text"""
+        vec = np.zeros(self.dim, dtype=np.float32)
+        padded = f" {text} "
+        for n in self.ngram_sizes:
+            for i in range(len(padded) - n + 1):
+                bucket = zlib.crc32(padded[i:i + n].encode("utf-8")) % self.dim
+                vec[bucket] += 1.0
+
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec /= norm
+        return vec
+
+    def vectorize_many(self, texts: List[str]) -> np.ndarray:
+        """Vectorize a batch of texts into a (len(texts), dim) matrix"""
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack([self.vectorize(text) for text in texts])
@@ -0,0 +1,63 @@
+"""
+Token Estimation
+Fast, dependency-free token counts for prompt budgeting
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+# Words, numbers and individual punctuation marks
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+# Average characters per BPE token for plain English words
+_CHARS_PER_TOKEN = 4
+
+# Per-message overhead of chat formats (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens a BPE tokenizer produces for text
+
+    Short words are one token, long words are split every few characters,
+    digits are grouped in threes and punctuation is a token per mark. Close
+    enough to Llama/Gemini tokenizers for budgeting without loading one.
+    """
+    if not text:
+        return 0
+
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isalpha():
+            tokens += max(1, -(-len(piece) // _CHARS_PER_TOKEN))
+        elif piece[0].isdigit():
+            tokens += -(-len(piece) // 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimate the prompt tokens of a chat message list"""
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def usage_record(
+    messages: List[Dict[str, str]],
+    completion: str,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Token usage of one LLM call
+
+    Uses the provider's counts when it reported them, otherwise estimates
+    both sides locally; `source` records which.
+    """
+    if prompt_tokens is not None and completion_tokens is not None:
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "source": "provider"}
+    return {
+        "prompt_tokens": estimate_message_tokens(messages),
+        "completion_tokens": estimate_tokens(completion),
+        "source": "estimate",
+    }
@@ -0,0 +1,22 @@
+"""Outcome accounting of the context predictor"""
+from src.core.context_predictor import ContextPredictor
+
+
+def test_partial_prediction_is_not_a_saved_round_trip():
+    predictor = ContextPredictor()
+    predictor.record("open spotify", ["installed_apps"], ["installed_apps", "running_processes"], speculated=True)
+
+    stats = predictor.get_stats()
+    assert stats["pass2_overlapped"] == 0
+    assert stats["round_trips_saved"] == 0
+    assert stats["wasted_requests"] == 1
+
+
+def test_covering_prediction_is_a_saved_round_trip():
+    predictor = ContextPredictor()
+    predictor.record("open spotify", ["installed_apps", "running_processes"], ["installed_apps"], speculated=True)
+
+    stats = predictor.get_stats()
+    assert stats["pass2_overlapped"] == 1
+    assert stats["round_trips_saved"] == 1
+    assert stats["wasted_requests"] == 0
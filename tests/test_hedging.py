@@ -0,0 +1,53 @@
+"""Field forwarding of hedged LLM requests"""
+import asyncio
+
+from src.ai.hedging import HedgedLLMClient
+
+COMMANDS = [{"type": "launch_app", "params": {"name": "chrome.exe"}}]
+
+
+class FakeClient:
+    """Streams the given fields, then waits `delay` seconds and returns a reply"""
+
+    def __init__(self, fields, delay, reply):
+        self.fields = fields
+        self.delay = delay
+        self.reply = reply
+
+    async def chat(self, messages, on_field=None, priority=None, max_tokens=None, tier=None):
+        for key, value in self.fields:
+            on_field(key, value)
+        await asyncio.sleep(self.delay)
+        return dict(self.reply)
+
+
+def test_losing_providers_response_is_replaced_by_the_winners():
+    primary = FakeClient(
+        [("needs_context", []), ("response", "Opening Chrome")], delay=5,
+        reply={"intent": "command", "response": "Opening Chrome", "commands": COMMANDS},
+    )
+    secondary = FakeClient(
+        [], delay=0,
+        reply={"intent": "command", "response": "Closing Chrome", "commands": [{"type": "kill_process", "params": {"name": "chrome.exe"}}]},
+    )
+    client = HedgedLLMClient(primary, secondary, "groq", "gemini")
+    client.hedge_delay_ms = lambda provider: 10
+
+    seen = []
+    result = asyncio.run(client.chat([{"role": "user", "content": "chrome"}], on_field=lambda k, v: seen.append((k, v))))
+
+    assert result["response"] == "Closing Chrome"
+    assert [value for key, value in seen if key == "response"] == ["Opening Chrome", "Closing Chrome"]
+
+
+def test_matching_response_is_not_forwarded_twice():
+    reply = {"intent": "command", "response": "Opening Chrome", "commands": COMMANDS}
+    primary = FakeClient([("response", "Opening Chrome")], delay=5, reply=reply)
+    secondary = FakeClient([], delay=0, reply=reply)
+    client = HedgedLLMClient(primary, secondary, "groq", "gemini")
+    client.hedge_delay_ms = lambda provider: 10
+
+    seen = []
+    asyncio.run(client.chat([{"role": "user", "content": "open chrome"}], on_field=lambda k, v: seen.append((k, v))))
+
+    assert [value for key, value in seen if key == "response"] == ["Opening Chrome"]
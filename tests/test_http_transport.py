@@ -0,0 +1,36 @@
+"""Connection accounting of the shared HTTP transport"""
+import asyncio
+
+import httpx
+
+from src.utils.http_transport import _WARMUP, HTTPTransport
+
+ORIGIN = "https://llm.example"
+
+
+async def _send(hook, events, warmup=False):
+    """Run a request's hook and feed its trace the given httpcore events"""
+    request = httpx.Request("HEAD" if warmup else "POST", ORIGIN + "/", extensions={_WARMUP: True} if warmup else {})
+    await hook(request)
+    for event in events:
+        await request.extensions["trace"](event, {})
+
+
+def test_warmup_handshakes_count_but_warmup_requests_do_not():
+    transport = HTTPTransport()
+    hook = transport._hook_for(ORIGIN)
+    new_connection = ["connection.connect_tcp.complete", "connection.start_tls.complete"]
+
+    async def run():
+        await _send(hook, new_connection + ["http11.send_request_headers.started"], warmup=True)
+        await _send(hook, ["http11.send_request_headers.started"])
+        await _send(hook, new_connection + ["http11.send_request_headers.started"])
+
+    asyncio.run(run())
+    stats = transport.get_stats()["hosts"][ORIGIN]
+
+    assert stats["tls_handshakes"] == 2
+    assert stats["connections_opened"] == 2
+    assert stats["warmup_requests"] == 1
+    assert stats["requests"] == 2
+    assert stats["reused_requests"] == 1
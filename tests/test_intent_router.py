@@ -0,0 +1,31 @@
+"""Fast-path routing of common commands"""
+import pytest
+
+from src.core.intent_router import IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+def test_plain_notepad_routes(router):
+    assert router.route("open notepad")["commands"] == [{"type": "launch_app", "params": {"name": "notepad.exe"}}]
+    assert router.route("close notepad")["commands"] == [{"type": "kill_process", "params": {"name": "notepad.exe"}}]
+
+
+@pytest.mark.parametrize("text", [
+    "open notepad++",
+    "close notepad++",
+    "kill notepad++",
+    "open c#",
+    "open f# interactive",
+    "close notepad++ and turn off the fan",
+])
+def test_names_with_symbols_fall_through_to_llm(router, text):
+    assert router.route(text) is None
+
+
+def test_ampersand_still_joins_commands(router):
+    result = router.route("open notepad & turn off the fan")
+    assert [cmd["type"] for cmd in result["commands"]] == ["launch_app", "fan_control"]
@@ -0,0 +1,65 @@
+"""Quota accounting of the OpenAI-compatible key pool"""
+import asyncio
+
+import httpx
+
+from src.ai.openai_compatible import KeyPool, OpenAICompatibleClient
+from src.utils.config import OpenAICompatibleConfig
+
+
+def _config(**values):
+    return OpenAICompatibleConfig(_env_file=None, rpm=30, burst=5, **values)
+
+
+def test_key_on_two_endpoints_gets_one_quota():
+    pool = KeyPool("pooltest", _config(
+        api_key="key-a",
+        api_keys="key-b",
+        base_url="https://one.example/v1/chat/completions",
+        base_urls="https://two.example/v1/chat/completions",
+    ))
+
+    assert [slot.key for slot in pool.slots] == ["key-a", "key-b"]
+    assert len({id(slot.limiter) for slot in pool.slots}) == 2
+    assert pool.get_stats()["capacity_rpm"] == 60
+
+
+def test_connection_error_moves_key_to_next_endpoint():
+    pool = KeyPool("pooltest-endpoints", _config(
+        api_key="key-a",
+        base_url="https://one.example/v1/chat/completions",
+        base_urls="https://two.example/v1/chat/completions",
+    ))
+    slot = pool.slots[0]
+
+    assert slot.url.startswith("https://one.example")
+    slot.next_endpoint()
+    assert slot.url.startswith("https://two.example")
+    slot.next_endpoint()
+    assert slot.url.startswith("https://one.example")
+
+
+def test_text_completion_holds_a_key_slot_and_rotates_on_429():
+    client = OpenAICompatibleClient("texttest", _config(
+        api_key="key-a",
+        api_keys="key-b",
+        base_url="https://one.example/v1/chat/completions",
+    ))
+    in_flight = []
+
+    def handler(request):
+        in_flight.append(sum(slot.in_flight for slot in client.pool.slots))
+        if request.headers["authorization"] == "Bearer key-a":
+            return httpx.Response(429, headers={"retry-after": "30"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": " The fan is on. "}}]})
+
+    for slot in client.pool.slots:
+        slot.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    text = asyncio.run(client.complete_text([{"role": "user", "content": "fan: ON"}], wait=1.0))
+
+    assert text == "The fan is on."
+    assert in_flight == [1, 1]
+    assert [slot.rate_limited for slot in client.pool.slots] == [1, 0]
+    assert client.pool.rotations == 1
+    assert all(slot.in_flight == 0 for slot in client.pool.slots)
@@ -0,0 +1,29 @@
+"""Complexity estimate of the model tier router"""
+import pytest
+
+from src.ai.model_tiers import ModelTierRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return ModelTierRouter()
+
+
+@pytest.mark.parametrize("text", [
+    "can you open spotify",
+    "could you turn on the fan",
+    "Can you lock my PC?",
+    "would you close chrome",
+])
+def test_polite_command_is_not_a_question(router, text):
+    assert router.estimate(text, {})[1] == 0
+
+
+@pytest.mark.parametrize("text", [
+    "can you explain how dns works",
+    "is it going to rain today",
+    "does chrome use a lot of memory",
+    "what time is it",
+])
+def test_question_scores_a_point(router, text):
+    assert router.estimate(text, {})[1] == 1
@@ -0,0 +1,57 @@
+"""Field order of the output schemas in config/prompts.yaml"""
+import json
+import re
+from pathlib import Path
+
+import yaml
+
+PROMPTS = yaml.safe_load((Path(__file__).resolve().parent.parent / "config" / "prompts.yaml").read_text(encoding="utf-8"))
+
+
+def _schema_keys(text: str) -> list:
+    """Keys of the first JSON object in a prompt, in the order they are written"""
+    start = text.index("{")
+    depth = 0
+    for end, char in enumerate(text[start:], start):
+        depth += {"{": 1, "}": -1}.get(char, 0)
+        if depth == 0:
+            break
+    return re.findall(r'"(\w+)"\s*:', text[start:end + 1])
+
+
+def _example_keys(text: str, marker: str) -> list:
+    """Key order of every one-line JSON example after `marker`"""
+    examples = []
+    for line in text[text.index(marker):].splitlines():
+        if "{" in line:
+            examples.append(list(json.loads(line[line.index("{"):]).keys()))
+    return examples
+
+
+def test_system_prompt_schema_puts_response_before_commands():
+    keys = _schema_keys(PROMPTS["system_prompt"])
+    assert keys[:3] == ["needs_context", "is_followup", "response"]
+    assert keys.index("response") < keys.index("commands")
+
+
+def test_system_prompt_examples_put_response_before_commands():
+    examples = _example_keys(PROMPTS["system_prompt"].split("\nRULES:")[0], "\nEXAMPLES:")
+    assert examples
+    for keys in examples:
+        assert keys.index("response") < keys.index("commands")
+
+
+def test_pass1_prompt_schema_puts_response_before_commands():
+    keys = _schema_keys(PROMPTS["pass1_prompt"])
+    assert keys[:3] == ["needs_context", "is_followup", "response"]
+    assert keys.index("response") < keys.index("commands")
+
+
+def test_compact_examples_put_response_before_commands():
+    examples = _example_keys(PROMPTS["compact_protocol"], "\nCOMPACT EXAMPLES:")
+    assert examples
+    for keys in examples:
+        assert keys[0] == "n"
+        spoken = keys.index("r") if "r" in keys else keys.index("t")
+        if "c" in keys:
+            assert spoken < keys.index("c")
@@ -0,0 +1,76 @@
+"""Failover of the LLM provider router"""
+import asyncio
+
+from src.ai.provider_router import ProviderRouter
+
+REPLY = {
+    "intent": "command",
+    "commands": [{"type": "launch_app", "params": {"name": "chrome.exe"}}],
+    "response": "Opening Chrome",
+}
+
+
+class FakeClient:
+    """Streams the given fields, then hangs or returns a reply"""
+
+    def __init__(self, fields=(), hang=False, reply=None):
+        self.fields = list(fields)
+        self.hang = hang
+        self.reply = reply
+        self.calls = 0
+
+    def estimated_wait_ms(self, priority):
+        return 0.0
+
+    async def chat(self, messages, on_field=None, priority=None, max_tokens=None, tier=None):
+        self.calls += 1
+        for key, value in self.fields:
+            if on_field:
+                on_field(key, value)
+            await asyncio.sleep(0)
+        if self.hang:
+            await asyncio.sleep(10)
+        return self.reply
+
+
+def _router(first, second):
+    router = ProviderRouter({"groq": first, "qwen": second})
+    router.timeout_for = lambda name, tier=None: 0.05
+    return router
+
+
+def _chat(router):
+    seen = []
+    result = asyncio.run(router.chat([{"role": "user", "content": "open chrome"}], on_field=lambda k, v: seen.append((k, v))))
+    return result, seen
+
+
+def test_stream_timing_out_after_response_does_not_fail_over():
+    first = FakeClient(fields=[
+        ("needs_context", []),
+        ("response", "Opening Chrome"),
+        ("commands[]", {"type": "launch_app", "params": {"name": "chrome.exe"}}),
+    ], hang=True)
+    second = FakeClient(reply={**REPLY, "response": "Sure, launching Chrome"})
+    router = _router(first, second)
+
+    result, seen = _chat(router)
+
+    assert second.calls == 0
+    assert [value for key, value in seen if key == "response"] == ["Opening Chrome"]
+    assert result["response"] == "Opening Chrome"
+    assert result["commands"] == REPLY["commands"]
+    assert router.partial_replies == 1
+
+
+def test_stream_timing_out_before_acting_fails_over():
+    first = FakeClient(fields=[("needs_context", [])], hang=True)
+    second = FakeClient(fields=[("response", "Opening Chrome")], reply=REPLY)
+    router = _router(first, second)
+
+    result, seen = _chat(router)
+
+    assert second.calls == 1
+    assert result == REPLY
+    assert [value for key, value in seen if key == "response"] == ["Opening Chrome"]
+    assert router.failovers == 1
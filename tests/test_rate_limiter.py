@@ -0,0 +1,35 @@
+"""Token bucket rate and priority thresholds"""
+import asyncio
+
+import pytest
+
+from src.ai.rate_limiter import Priority, TokenBucketScheduler
+
+
+@pytest.mark.parametrize("rpm, burst", [(15, 3), (30, 5), (60, 1)])
+def test_refill_matches_quota(rpm, burst):
+    limiter = TokenBucketScheduler("test", rpm=rpm, burst=burst)
+    assert limiter.capacity == burst
+    assert limiter.refill_per_sec * 60 == pytest.approx(rpm)
+
+
+def test_background_is_granted_with_burst_of_one():
+    async def run():
+        limiter = TokenBucketScheduler("test", rpm=600, burst=1, voice_reserve=1)
+        assert await limiter.acquire(Priority.BACKGROUND, timeout=0.5)
+        # Bucket is empty now; the next background request waits for one refill (0.1 s)
+        assert await limiter.acquire(Priority.BACKGROUND, timeout=0.5)
+
+    asyncio.run(run())
+
+
+def test_background_keeps_voice_reserve_when_bucket_allows():
+    async def run():
+        limiter = TokenBucketScheduler("test", rpm=6, burst=3, voice_reserve=1)
+        assert await limiter.acquire(Priority.BACKGROUND, timeout=0.05)
+        assert await limiter.acquire(Priority.BACKGROUND, timeout=0.05)
+        # One token left: held back for a voice turn
+        assert not await limiter.acquire(Priority.BACKGROUND, timeout=0.05)
+        assert await limiter.acquire(Priority.VOICE, timeout=0.05)
+
+    asyncio.run(run())
@@ -0,0 +1,49 @@
+"""Near-duplicate matching in the LLM response cache"""
+import pytest
+
+from src.ai.response_cache import ResponseCache
+
+RESPONSE = {
+    "intent": "command",
+    "commands": [{"type": "launch_app", "params": {"name": "winword.exe"}}],
+    "response": "Opening Word",
+}
+
+
+def _cache(threshold=None):
+    cache = ResponseCache()
+    if threshold is not None:
+        cache.threshold = threshold
+    return cache
+
+
+@pytest.mark.parametrize("threshold", [None, 0.5])
+@pytest.mark.parametrize("stored, asked", [
+    ("open word", "open wordpad"),
+    ("open chrome", "open chromium"),
+    ("open vlc", "open vlc player"),
+    ("close chrome", "close chromium"),
+    ("open chrome and close notepad", "close chrome and open notepad"),
+])
+def test_different_target_is_a_miss(stored, asked, threshold):
+    cache = _cache(threshold)
+    assert cache.store(stored, "ctx", RESPONSE, persist=False)
+    assert cache.lookup(asked, "ctx") is None
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("open chrome please", "open chrome"),
+    ("could you open chrome for me", "Open Chrome."),
+    ("hey aiden open notepad", "open note pad"),
+])
+def test_fillers_and_stt_variants_still_hit(stored, asked):
+    cache = _cache()
+    assert cache.store(stored, "ctx", RESPONSE, persist=False)
+    assert cache.lookup(asked, "ctx") is not None
+
+
+def test_near_duplicate_picks_entry_with_same_content():
+    cache = _cache(threshold=0.5)
+    cache.store("open wordpad", "ctx", {**RESPONSE, "response": "Opening WordPad"}, persist=False)
+    cache.store("open word please", "ctx", RESPONSE, persist=False)
+    assert cache.lookup("open word now", "ctx")["response"] == "Opening Word"